@@ -2,6 +2,7 @@ import sys
 sys.path.append('./backend')
 
 from backend.config import DB_CONFIG
+from backend.table_versions import bump, create_table
 import mysql.connector
 from mysql.connector import Error
 
@@ -10,6 +11,8 @@ def add_price_column():
         # Connect to database
         connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
+        # bump() needs TABLE_VERSION; DDL commits, so create it before any write
+        create_table(cursor)
         
         # Check if price_per_night column already exists
         cursor.execute("SHOW COLUMNS FROM ROOM LIKE 'price_per_night'")
@@ -34,6 +37,8 @@ def add_price_column():
                 END
             """)
             
+            # Tell running backends to reload their room catalog
+            bump(cursor, 'ROOM')
             connection.commit()
             print("Price column added and prices set for all rooms")
         else:
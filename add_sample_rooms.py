@@ -2,6 +2,7 @@ import sys
 sys.path.append('./backend')
 
 from backend.config import DB_CONFIG
+from backend.table_versions import bump, create_table
 import mysql.connector
 from mysql.connector import Error
 
@@ -10,6 +11,8 @@ def add_sample_rooms():
         # Connect to database
         connection = mysql.connector.connect(**DB_CONFIG)
         cursor = connection.cursor()
+        # bump() needs TABLE_VERSION; DDL commits, so create it before any write
+        create_table(cursor)
         
         # Check if we already have room data
         cursor.execute("SELECT COUNT(*) FROM ROOM")
@@ -33,6 +36,8 @@ def add_sample_rooms():
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """, room)
             
+            # Tell running backends to reload their room catalog
+            bump(cursor, 'ROOM')
             connection.commit()
             print(f"Added {len(rooms)} sample rooms to the database")
         else:
@@ -52,6 +57,7 @@ def add_sample_rooms():
                 END
             WHERE Room_no IN (101, 102, 103, 104, 105)
             """)
+            bump(cursor, 'ROOM')
             connection.commit()
             print("Updated prices for sample rooms")
         
@@ -1,94 +1,454 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-import mysql.connector
 from mysql.connector import Error
 from datetime import datetime
 
+import click
+import json
 import logging
-from config import DB_CONFIG
-from db_mapper import (
-    map_reservation_to_booking, 
-    map_booking_to_reservation,
-    map_customer_to_guest,
-    map_guest_to_customer,
-    map_room_data
+import time
+import urllib.request
+from config import (
+    DB_CONFIG, POOL_CONFIG, AVAILABILITY_CONFIG, ROOM_NIGHT_CONFIG, ID_ALLOCATOR_CONFIG,
+    RESERVATION_PAGE_CONFIG, STREAM_CONFIG, ROOM_CACHE_CONFIG, STATS_CONFIG,
+    QUERY_CACHE_CONFIG, CONSOLE_CONFIG, JOBS_CONFIG, SLOW_QUERY_CONFIG, STATEMENT_STATS_CONFIG,
+    QUERY_BUDGET_CONFIG, METRICS_CONFIG, STAY_LENGTH_CONFIG, PAYMENT_LEDGER_CONFIG,
+    PENDING_PAYMENT_CONFIG, TABLE_STATS_CONFIG
 )
+from availability import AvailabilityIndex, to_date
+from db_pool import ConnectionPool
+from streaming import stream_mode, stream_rows
+from pagination import InvalidPageRequest, encode_cursor, decode_cursor, parse_limit, descending_after
+from id_allocator import IdAllocator
+import room_inventory
+from room_inventory import RoomAlreadyBooked
+from db_mapper import row_mapper
+from json_provider import FastJSONProvider
+from room_catalog import RoomCatalog
+from stats_summary import StatsSummary
+from query_catalog import QueryCatalog
+from result_cache import ResultCache, tables_read
+import table_versions
+from sql_console import (
+    Budget, ConsoleRequestError, RunningQueries, ER_QUERY_INTERRUPTED, ER_QUERY_TIMEOUT
+)
+from query_jobs import QueryJobManager, JobLimitReached, SUCCEEDED, rows_as_csv
+from query_monitor import QueryMonitor, SlowQueryLog, explain, rows_examined
+from statement_stats import StatementStats
+from request_budget import RequestQueryBudget
+from metrics import Metrics
+from stay_lengths import StayLengths, is_missing_feature
+import payment_ledger
+import pending_balances
+from table_stats import TableStats
+import index_set
+import index_advisor
 
 app = Flask(__name__)
-CORS(app)
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'Server-Timing'])
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 app.logger.setLevel(logging.DEBUG)
 
-def create_connection():
-    connection = None
+db_pool = ConnectionPool('default', DB_CONFIG, **POOL_CONFIG)
+# The SQL console gets its own small pool so long reporting queries cannot
+# take the connections booking requests need
+console_pool = ConnectionPool('console', DB_CONFIG, **CONSOLE_CONFIG['pool'])
+console_queries = RunningQueries()
+jobs_pool = ConnectionPool('jobs', DB_CONFIG, pool_size=JOBS_CONFIG['max_concurrent'], max_overflow=0)
+# Id blocks are fetched while the request holds a default-pool connection,
+# so they come from a connection of their own
+ids_pool = ConnectionPool('ids', DB_CONFIG, pool_size=1, max_overflow=0)
+query_jobs = QueryJobManager(
+    jobs_pool,
+    db_pool,
+    max_concurrent=JOBS_CONFIG['max_concurrent'],
+    max_queued=JOBS_CONFIG['max_queued'],
+    retention_seconds=JOBS_CONFIG['retention_seconds'],
+    batch_size=STREAM_CONFIG['batch_size']
+)
+
+# Every statement run on the pools goes through the query monitor
+query_monitor = QueryMonitor()
+for pool in (db_pool, console_pool, jobs_pool, ids_pool):
+    pool.instrument = query_monitor.wrap
+slow_query_log = SlowQueryLog(
+    query_monitor,
+    SLOW_QUERY_CONFIG['threshold_ms'],
+    SLOW_QUERY_CONFIG['capacity'],
+    plan_pool=console_pool if SLOW_QUERY_CONFIG['explain'] else None
+)
+if SLOW_QUERY_CONFIG['enabled']:
+    query_monitor.listeners.append(slow_query_log)
+statement_stats = StatementStats(STATEMENT_STATS_CONFIG['max_digests'], STATEMENT_STATS_CONFIG['samples'])
+if STATEMENT_STATS_CONFIG['enabled']:
+    query_monitor.listeners.append(statement_stats)
+query_budget = RequestQueryBudget(
+    QUERY_BUDGET_CONFIG['max_queries'],
+    QUERY_BUDGET_CONFIG['max_db_ms'],
+    QUERY_BUDGET_CONFIG['routes'],
+    QUERY_BUDGET_CONFIG['repeat_threshold']
+)
+if QUERY_BUDGET_CONFIG['enabled']:
+    query_monitor.listeners.append(query_budget)
+    query_budget.init_app(app)
+if METRICS_CONFIG['enabled']:
+    metrics = Metrics(pools=(db_pool, console_pool, jobs_pool, ids_pool))
+    metrics.init_app(app, query_monitor)
+availability_index = AvailabilityIndex(AVAILABILITY_CONFIG['refresh_seconds'])
+id_allocator = IdAllocator(ids_pool, **ID_ALLOCATOR_CONFIG)
+room_catalog = RoomCatalog(ROOM_CACHE_CONFIG['ttl_seconds'], ROOM_CACHE_CONFIG['check_seconds'])
+stats_summary = StatsSummary(STATS_CONFIG['slots'])
+query_catalog = QueryCatalog()
+result_cache = ResultCache(QUERY_CACHE_CONFIG['max_entries'], QUERY_CACHE_CONFIG['max_rows'])
+stay_lengths = StayLengths()
+table_stats = TableStats(
+    db_pool,
+    DB_CONFIG['database'],
+    table_versions.TRACKED_TABLES,
+    TABLE_STATS_CONFIG['ttl_seconds'],
+    TABLE_STATS_CONFIG['approximate_ttl_seconds']
+)
+
+def get_db():
+    """Borrow one pooled connection for the current request.
+
+    The connection is stored on flask.g and handed back to the pool by
+    release_db() when the app context is torn down, so handlers must not
+    close it themselves.
+    """
+    connection = g.get('db')
+    if connection is None or connection.released:
+        try:
+            connection = db_pool.acquire()
+        except Error as e:
+            app.logger.error(f"Database connection error: {e}")
+            return None
+        g.db = connection
+    return connection
+
+def get_console_db():
+    """Like get_db(), but from the SQL console pool"""
+    connection = g.get('console_db')
+    if connection is None or connection.released:
+        try:
+            connection = console_pool.acquire()
+        except Error as e:
+            app.logger.error(f"Console connection error: {e}")
+            return None
+        g.console_db = connection
+    return connection
+
+@app.teardown_appcontext
+def release_db(exc):
+    # Unregister a console query before its connection can serve anyone else
+    query_id = g.pop('console_query', None)
+    if query_id is not None:
+        console_queries.finish(query_id)
+    for name in ('db', 'console_db'):
+        connection = g.pop(name, None)
+        if connection is not None:
+            connection.close()
+
+def detach_db(name='db'):
+    """Take the request's connection off flask.g for a streamed response.
+
+    release_db() runs as soon as the view returns, before a streamed body
+    is generated. The returned callable releases the connection, and
+    unregisters the console query running on it, once the body is done; pass
+    it to stream_rows() as on_close.
+    """
+    connection = g.pop(name)
+    query_id = g.pop('console_query', None) if name == 'console_db' else None
+
+    def release():
+        if query_id is not None:
+            console_queries.finish(query_id)
+        connection.close()
+    return release
+
+def find_overlapping_booking(cursor, room_id, check_in, check_out):
+    """Return the BookID of a booking that overlaps the given dates, if any"""
+    cursor.execute("""
+        SELECT BookID FROM BOOKING 
+        WHERE Room_no = %s 
+        AND (
+            (Check_in <= %s AND Check_out >= %s) OR
+            (Check_in <= %s AND Check_out >= %s) OR
+            (Check_in >= %s AND Check_out <= %s)
+        )
+        LIMIT 1
+    """, (
+        room_id,
+        check_in, check_in,    # Room is booked on check-in date
+        check_out, check_out,  # Room is booked on check-out date
+        check_in, check_out    # Booking spans the entire requested period
+    ))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def room_is_free(cursor, room_id, check_in, check_out):
+    """Availability of one room from ROOM_NIGHT, the in-memory index or BOOKING"""
+    if ROOM_NIGHT_CONFIG['enabled']:
+        return room_inventory.is_available(cursor, room_id, check_in, check_out)
+    
+    if not AVAILABILITY_CONFIG['enabled']:
+        return find_overlapping_booking(cursor, room_id, check_in, check_out) is None
+    
+    if not availability_index.current(cursor):
+        # BOOKING changed since the index was loaded: answer from SQL
+        availability_index.refresh_in_background(db_pool)
+        return find_overlapping_booking(cursor, room_id, check_in, check_out) is None
+    available = availability_index.is_free(room_id, check_in, check_out)
+    
+    if AVAILABILITY_CONFIG['verify']:
+        sql_available = find_overlapping_booking(cursor, room_id, check_in, check_out) is None
+        if sql_available != available:
+            app.logger.error(
+                f"Availability index disagrees with BOOKING for room {room_id} "
+                f"{check_in}..{check_out}: index={available} sql={sql_available}")
+            available = sql_available
+    return available
+
+def create_table_versions():
+    """Create TABLE_VERSION on databases that predate it, outside any request transaction"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        print("MySQL database connection successful")
+        with db_pool.connection() as connection:
+            cursor = connection.cursor()
+            table_versions.create_table(cursor)
+            cursor.close()
     except Error as e:
-        print(f"Database connection error: {e}")
-    return connection
+        app.logger.warning(f"Could not create TABLE_VERSION: {e}")
+
+create_table_versions()
+
+def load_availability_index():
+    """Build the availability index from BOOKING; failures leave the SQL path in charge"""
+    try:
+        with db_pool.connection() as connection:
+            cursor = connection.cursor()
+            availability_index.load(cursor)
+            cursor.close()
+        app.logger.info(f"Availability index loaded: {availability_index.stats()}")
+    except Error as e:
+        app.logger.warning(f"Could not load availability index: {e}")
+
+def sync_availability(cursor, write, *book_ids):
+    """Refresh bookings in the availability index after a committed, tracked write"""
+    if availability_index.loaded:
+        for book_id in book_ids:
+            availability_index.sync_booking(cursor, book_id)
+        availability_index.advance(cursor, write)
+
+if AVAILABILITY_CONFIG['enabled']:
+    load_availability_index()
+
+def load_room_catalog():
+    """Fill the room catalog cache at startup; on failure the first request fills it"""
+    try:
+        with db_pool.connection() as connection:
+            cursor = connection.cursor()
+            room_catalog.load(cursor)
+            cursor.close()
+        app.logger.info(f"Room catalog loaded: {room_catalog.stats()['rooms']} rooms")
+    except Error as e:
+        app.logger.warning(f"Could not load room catalog: {e}")
+
+if ROOM_CACHE_CONFIG['enabled']:
+    load_room_catalog()
+
+def probe_stay_lengths(cursor=None):
+    """Look up the length-of-stay schema features once; on failure the first request retries"""
+    try:
+        if cursor is not None:
+            return stay_lengths.probe(cursor, DB_CONFIG['database'])
+        with db_pool.connection() as connection:
+            cursor = connection.cursor()
+            capabilities = stay_lengths.probe(cursor, DB_CONFIG['database'])
+            cursor.close()
+        app.logger.info(f"Length-of-stay capabilities: {capabilities}")
+        return capabilities
+    except Error as e:
+        app.logger.warning(f"Could not probe length-of-stay capabilities: {e}")
+        return None
+
+probe_stay_lengths()
+
+try:
+    query_catalog.queries()
+except OSError as e:
+    app.logger.warning(f"Could not load predefined queries: {e}")
 
 # API Routes
+# ?expand= field -> (table, key column, reservation field holding the key)
+RESERVATION_EXPANSIONS = {
+    'customer': ('GUEST', 'GusID', 'customer_id'),
+    'room': ('ROOM', 'Room_no', 'room_id')
+}
+
+def parse_expand(default=''):
+    """Related objects requested with ?expand=customer,room"""
+    fields = [field.strip() for field in request.args.get('expand', default).split(',') if field.strip()]
+    unknown = [field for field in fields if field not in RESERVATION_EXPANSIONS]
+    if unknown:
+        raise ValueError(f"Cannot expand: {', '.join(unknown)}. Use: {', '.join(RESERVATION_EXPANSIONS)}")
+    return fields
+
+def expand_reservations(cursor, reservations, fields, batch_size=1000):
+    """Attach related objects to a list of reservations with batched IN queries.
+
+    Costs one query per expanded field (per batch_size distinct keys) however
+    many reservations are in the list.
+    """
+    for field in fields:
+        table, column, key = RESERVATION_EXPANSIONS[field]
+        ids = sorted({reservation[key] for reservation in reservations if reservation[key] is not None})
+        related = {}
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"SELECT * FROM {table} WHERE {column} IN ({placeholders})", batch)
+            map_row = row_mapper(table, cursor)
+            for row in cursor.fetchall():
+                item = map_row(row)
+                related[item['id']] = item
+        for reservation in reservations:
+            if reservation[key] in related:
+                reservation[field] = related[reservation[key]]
+
+# Query parameter -> SQL condition for the reservation list filters
+RESERVATION_FILTERS = {
+    'customer_id': "GusID = %s",
+    'room_id': "Room_no = %s",
+    'state': "State = %s",
+    'check_in_from': "Check_in >= %s",
+    'check_in_to': "Check_in <= %s",
+    'booked_from': "Book_date >= %s",
+    'booked_to': "Book_date <= %s"
+}
+
 @app.route('/api/reservations', methods=['GET'])
 def get_reservations():
-    connection = create_connection()
+    """List reservations, newest first.
+
+    Filters run in SQL. With ?limit=N the list is paged by keyset on
+    (Book_date, BookID): the X-Next-Cursor response header holds the value
+    to pass as ?cursor= for the next page and is absent on the last page.
+    ?expand=customer,room embeds the related guest and room.
+    """
+    try:
+        expand = parse_expand()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    conditions = []
+    params = []
+    for name, condition in RESERVATION_FILTERS.items():
+        value = request.args.get(name)
+        if value:
+            conditions.append(condition)
+            params.append(value)
+    
+    try:
+        limit = parse_limit(request.args.get('limit'), RESERVATION_PAGE_CONFIG['max_limit'])
+        cursor_token = request.args.get('cursor')
+        if cursor_token:
+            condition, values = descending_after('Book_date', 'BookID', *decode_cursor(cursor_token, 2))
+            conditions.append(condition)
+            params.extend(values)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
+    
+    query = "SELECT * FROM BOOKING"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY Book_date DESC, BookID DESC"
+    if limit:
+        # One extra row tells us whether there is a next page
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    
+    # Unpaged lists can be streamed; pages are already bounded by limit.
+    # Expansion needs the connection for its own queries, so it is buffered.
+    mode = None if limit or expand else stream_mode()
+    
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
-            cursor.execute("""
-                SELECT * FROM BOOKING
-                ORDER BY Book_date DESC
-            """)
+            cursor.execute(query, params)
+            map_booking = row_mapper('BOOKING', cursor)
+            if mode:
+                return stream_rows(cursor, map_booking, mode, STREAM_CONFIG['batch_size'], on_close=detach_db())
             bookings = cursor.fetchall()
-            cursor.close()
-            connection.close()
             
             # Map database results to API format
-            reservations = [map_booking_to_reservation(booking) for booking in bookings]
-            return jsonify(reservations)
+            reservations = [map_booking(booking) for booking in bookings]
+            
+            next_cursor = None
+            if limit and len(reservations) > limit:
+                reservations = reservations[:limit]
+                next_cursor = encode_cursor(reservations[-1]['created_at'], reservations[-1]['id'])
+            
+            expand_reservations(cursor, reservations, expand)
+            cursor.close()
+            
+            response = jsonify(reservations)
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
         except Error as e:
             return jsonify({"error": str(e)}), 500
     return jsonify({"error": "Database connection failed"}), 500
 
 @app.route('/api/reservations/<int:reservation_id>', methods=['GET'])
 def get_reservation(reservation_id):
-    connection = create_connection()
+    """One reservation with its guest and room (narrow with ?expand=)"""
+    try:
+        expand = parse_expand('customer,room')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # One joined query; the NULL marker columns separate each table's columns
+    columns = ["B.*"]
+    joins = []
+    if 'customer' in expand:
+        columns += ["NULL AS expand_customer", "G.*"]
+        joins.append("LEFT JOIN GUEST G ON G.GusID = B.GusID")
+    if 'room' in expand:
+        columns += ["NULL AS expand_room", "R.*"]
+        joins.append("LEFT JOIN ROOM R ON R.Room_no = B.Room_no")
+    
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
-            cursor.execute("""
-                SELECT * FROM BOOKING WHERE BookID = %s
+            cursor.execute(f"""
+                SELECT {', '.join(columns)} FROM BOOKING B
+                {' '.join(joins)}
+                WHERE B.BookID = %s
             """, (reservation_id,))
             booking = cursor.fetchone()
             
             if not booking:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Reservation not found"}), 404
             
-            # Get guest information
-            cursor.execute("""
-                SELECT * FROM GUEST WHERE GusID = %s
-            """, (booking[1],))  # booking[1] is GusID
-            guest = cursor.fetchone()
+            names = [column[0] for column in cursor.description]
+            markers = [index for index, name in enumerate(names) if name.startswith('expand_')]
             
-            # Get room information
-            cursor.execute("""
-                SELECT * FROM ROOM WHERE Room_no = %s
-            """, (booking[6],))  # booking[6] is Room_no
-            room = cursor.fetchone()
+            # Map to API format
+            reservation = row_mapper('BOOKING', cursor, 0, markers[0] if markers else None)(booking)
+            for position, marker in enumerate(markers):
+                field = names[marker][len('expand_'):]
+                stop = markers[position + 1] if position + 1 < len(markers) else None
+                item = row_mapper(RESERVATION_EXPANSIONS[field][0], cursor, marker + 1, stop)(booking)
+                if item['id'] is not None:  # LEFT JOIN found no row
+                    reservation[field] = item
             
             cursor.close()
-            connection.close()
-            
-            # Map to API format
-            reservation = map_booking_to_reservation(booking)
-            if guest:
-                reservation['customer'] = map_guest_to_customer(guest)
-            if room:
-                reservation['room'] = map_room_data(room)
                 
             return jsonify(reservation)
         except Error as e:
@@ -125,7 +485,7 @@ def create_reservation():
         print(f"Date format error: {str(e)}")
         return jsonify({"error": f"Invalid date format, use YYYY-MM-DD. Error: {str(e)}"}), 400
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             # Start a transaction
@@ -139,31 +499,21 @@ def create_reservation():
             if not room_result:
                 cursor.close()
                 connection.rollback()
-                connection.close()
                 print(f"Room does not exist: {data['room_id']}")
                 return jsonify({"error": "Room does not exist"}), 404
             
-            # Check if room is already booked for the requested dates
-            cursor.execute("""
-                SELECT BookID FROM BOOKING 
-                WHERE Room_no = %s 
-                AND (
-                    (Check_in <= %s AND Check_out >= %s) OR
-                    (Check_in <= %s AND Check_out >= %s) OR
-                    (Check_in >= %s AND Check_out <= %s)
-                )
-            """, (
-                data['room_id'],
-                data['check_in_date'], data['check_in_date'],  # Room is booked on check-in date
-                data['check_out_date'], data['check_out_date'],  # Room is booked on check-out date
-                data['check_in_date'], data['check_out_date']   # Booking spans the entire requested period
-            ))
-            
-            existing_booking = cursor.fetchone()
+            # Check if room is already booked for the requested dates. This stays
+            # a SQL check inside the transaction: the in-memory availability
+            # index cannot see bookings written by other worker processes. In
+            # room-night mode the ROOM_NIGHT primary key rejects conflicts when
+            # the nights are claimed below, so no scan is needed.
+            existing_booking = None
+            if not ROOM_NIGHT_CONFIG['enabled']:
+                existing_booking = find_overlapping_booking(
+                    cursor, data['room_id'], data['check_in_date'], data['check_out_date'])
             if existing_booking:
                 cursor.close()
                 connection.rollback()
-                connection.close()
                 print(f"Room {data['room_id']} is already booked for the requested dates")
                 return jsonify({"error": "Room is already booked for the requested dates"}), 400
             
@@ -173,14 +523,11 @@ def create_reservation():
             if not guest_result:
                 cursor.close()
                 connection.rollback()
-                connection.close()
                 print(f"Guest does not exist: {data['customer_id']}")
                 return jsonify({"error": "Guest does not exist"}), 404
             
-            # Generate a new BookID (you might want to implement a better ID generation strategy)
-            cursor.execute("SELECT MAX(BookID) FROM BOOKING")
-            max_id = cursor.fetchone()[0]
-            new_id = 100001 if max_id is None else max_id + 1
+            # Generate a new BookID
+            new_id = id_allocator.next_id('BOOKING')
             
             # Calculate total price (simplified example)
             cursor.execute("SELECT Square_ft FROM ROOM WHERE Room_no = %s", (data['room_id'],))
@@ -199,7 +546,18 @@ def create_reservation():
             
             print(f"Calculated total price: {total_price} for {days} days and {square_ft} square feet")
             
+            if ROOM_NIGHT_CONFIG['enabled']:
+                try:
+                    room_inventory.reserve(cursor, new_id, data['room_id'], data['check_in_date'], data['check_out_date'])
+                except RoomAlreadyBooked:
+                    cursor.close()
+                    connection.rollback()
+                    print(f"Room {data['room_id']} is already booked for the requested dates")
+                    return jsonify({"error": "Room is already booked for the requested dates"}), 400
+            
             # Insert new booking
+            booking_write = availability_index.track_write(cursor)
+            book_date = datetime.now().strftime('%Y-%m-%d')
             cursor.execute("""
                 INSERT INTO BOOKING (BookID, GusID, Total_Price, Check_in, Check_out, Book_date, Room_no, State, City, Street)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
@@ -209,16 +567,22 @@ def create_reservation():
                 total_price,
                 data['check_in_date'],
                 data['check_out_date'],
-                datetime.now().strftime('%Y-%m-%d'),
+                book_date,
                 data['room_id'],
                 data.get('state', ''),
                 data.get('city', ''),
                 data.get('street', '')
             ))
+            booking_write.written(cursor)
+            if STATS_CONFIG['enabled']:
+                stats_summary.record_booking(cursor, book_date, total_price)
             
             connection.commit()
+            
+            if availability_index.loaded:
+                availability_index.put(new_id, data['room_id'], data['check_in_date'], data['check_out_date'])
+                availability_index.advance(cursor, booking_write)
             cursor.close()
-            connection.close()
             
             return jsonify({"id": new_id, "message": "Reservation created successfully"}), 201
         except Error as e:
@@ -231,18 +595,35 @@ def create_reservation():
 def update_reservation(reservation_id):
     data = request.json
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             
-            # Check if reservation exists
-            cursor.execute("SELECT BookID FROM BOOKING WHERE BookID = %s", (reservation_id,))
-            if not cursor.fetchone():
+            # Check if reservation exists (locking it while its nights are moved)
+            cursor.execute("""
+                SELECT Room_no, Check_in, Check_out, Total_Price, Book_date FROM BOOKING
+                WHERE BookID = %s FOR UPDATE
+            """, (reservation_id,))
+            booking = cursor.fetchone()
+            if not booking:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Reservation not found"}), 404
             
+            # Move the booking's nights in the room-night inventory
+            if ROOM_NIGHT_CONFIG['enabled'] and any(field in data for field in ('room_id', 'check_in_date', 'check_out_date')):
+                room_no = data.get('room_id', booking[0])
+                check_in = data.get('check_in_date', booking[1])
+                check_out = data.get('check_out_date', booking[2])
+                room_inventory.release(cursor, reservation_id)
+                if room_no and check_in and check_out:
+                    try:
+                        room_inventory.reserve(cursor, reservation_id, room_no, check_in, check_out)
+                    except RoomAlreadyBooked:
+                        cursor.close()
+                        connection.rollback()
+                        return jsonify({"error": "Room is already booked for the requested dates"}), 400
+            
             # Update reservation
             update_fields = []
             update_values = []
@@ -279,11 +660,15 @@ def update_reservation(reservation_id):
                 query = f"UPDATE BOOKING SET {', '.join(update_fields)} WHERE BookID = %s"
                 update_values.append(reservation_id)
                 
+                booking_write = availability_index.track_write(cursor)
                 cursor.execute(query, update_values)
+                booking_write.written(cursor)
+                if STATS_CONFIG['enabled'] and 'total_price' in data:
+                    stats_summary.record_price_change(cursor, booking[4], booking[3], data['total_price'])
                 connection.commit()
+                sync_availability(cursor, booking_write, reservation_id)
                 
             cursor.close()
-            connection.close()
             return jsonify({"message": "Reservation updated successfully"}), 200
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -291,24 +676,32 @@ def update_reservation(reservation_id):
 
 @app.route('/api/reservations/<int:reservation_id>', methods=['DELETE'])
 def delete_reservation(reservation_id):
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             
             # Check if reservation exists
-            cursor.execute("SELECT BookID FROM BOOKING WHERE BookID = %s", (reservation_id,))
-            if not cursor.fetchone():
+            cursor.execute("SELECT Book_date, Total_Price FROM BOOKING WHERE BookID = %s FOR UPDATE", (reservation_id,))
+            booking = cursor.fetchone()
+            if not booking:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Reservation not found"}), 404
             
             # Delete reservation
+            if ROOM_NIGHT_CONFIG['enabled']:
+                room_inventory.release(cursor, reservation_id)
+            booking_write = availability_index.track_write(cursor)
             cursor.execute("DELETE FROM BOOKING WHERE BookID = %s", (reservation_id,))
+            booking_write.written(cursor)
+            if STATS_CONFIG['enabled']:
+                stats_summary.record_booking(cursor, booking[0], booking[1], sign=-1)
             connection.commit()
+            if availability_index.loaded:
+                availability_index.remove(reservation_id)
+                availability_index.advance(cursor, booking_write)
             
             cursor.close()
-            connection.close()
             return jsonify({"message": "Reservation deleted successfully"}), 200
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -316,17 +709,20 @@ def delete_reservation(reservation_id):
 
 @app.route('/api/customers', methods=['GET'])
 def get_customers():
-    connection = create_connection()
+    mode = stream_mode()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             cursor.execute("SELECT * FROM GUEST")
+            map_guest = row_mapper('GUEST', cursor)
+            if mode:
+                return stream_rows(cursor, map_guest, mode, STREAM_CONFIG['batch_size'], on_close=detach_db())
             guests = cursor.fetchall()
             cursor.close()
-            connection.close()
             
             # Map to API format
-            customers = [map_guest_to_customer(guest) for guest in guests]
+            customers = [map_guest(guest) for guest in guests]
             return jsonify(customers)
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -334,7 +730,7 @@ def get_customers():
 
 @app.route('/api/customers/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -343,14 +739,11 @@ def get_customer(customer_id):
             
             if not guest:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Customer not found"}), 404
             
-            cursor.close()
-            connection.close()
-            
             # Map to API format
-            customer = map_guest_to_customer(guest)
+            customer = row_mapper('GUEST', cursor)(guest)
+            cursor.close()
             return jsonify(customer)
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -393,7 +786,7 @@ def update_customer(customer_id):
         if not state_pattern.match(data['state'].upper()):
             return jsonify({"error": "State must be exactly 2 letters (e.g., NY, CA)"}), 400
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -402,14 +795,12 @@ def update_customer(customer_id):
             cursor.execute("SELECT GusID FROM GUEST WHERE GusID = %s", (customer_id,))
             if not cursor.fetchone():
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Customer not found"}), 404
                 
             # Check if email already exists for a different customer
             cursor.execute("SELECT GusID FROM GUEST WHERE Email = %s AND GusID != %s", (data['email'], customer_id))
             if cursor.fetchone():
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Email already registered to another customer"}), 400
             
             # Build Address from street, city, state if they exist, otherwise use address field
@@ -449,7 +840,6 @@ def update_customer(customer_id):
             
             connection.commit()
             cursor.close()
-            connection.close()
             return jsonify({"id": customer_id, "message": "Customer updated successfully"}), 200
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -492,7 +882,7 @@ def create_customer():
         if not state_pattern.match(data['state'].upper()):
             return jsonify({"error": "State must be exactly 2 letters (e.g., NY, CA)"}), 400
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -501,13 +891,10 @@ def create_customer():
             cursor.execute("SELECT GusID FROM GUEST WHERE Email = %s", (data['email'],))
             if cursor.fetchone():
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Email already registered"}), 400
             
             # Generate a new GusID
-            cursor.execute("SELECT MAX(GusID) FROM GUEST")
-            max_id = cursor.fetchone()[0]
-            new_id = 1 if max_id is None else max_id + 1
+            new_id = id_allocator.next_id('GUEST')
             
             # Build Address from street, city, state if they exist, otherwise use address field
             address = ""
@@ -542,10 +929,11 @@ def create_customer():
                 data['email'].strip(),
                 address
             ))
+            if STATS_CONFIG['enabled']:
+                stats_summary.record_guest(cursor)
             
             connection.commit()
             cursor.close()
-            connection.close()
             return jsonify({"id": new_id, "message": "Customer created successfully"}), 201
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -553,17 +941,22 @@ def create_customer():
 
 @app.route('/api/rooms', methods=['GET'])
 def get_rooms():
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
+            if ROOM_CACHE_CONFIG['enabled']:
+                room_list = room_catalog.rooms(cursor)
+                cursor.close()
+                return jsonify(room_list)
+            
             cursor.execute("SELECT * FROM ROOM")
+            map_room = row_mapper('ROOM', cursor)
             rooms = cursor.fetchall()
             cursor.close()
-            connection.close()
             
             # Map to API format
-            room_list = [map_room_data(room) for room in rooms]
+            room_list = [map_room(room) for room in rooms]
             return jsonify(room_list)
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -571,23 +964,27 @@ def get_rooms():
 
 @app.route('/api/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
+            if ROOM_CACHE_CONFIG['enabled']:
+                room_data = room_catalog.get(cursor, room_id)
+                cursor.close()
+                if room_data is None:
+                    return jsonify({"error": "Room not found"}), 404
+                return jsonify(room_data)
+            
             cursor.execute("SELECT * FROM ROOM WHERE Room_no = %s", (room_id,))
             room = cursor.fetchone()
             
             if not room:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Room not found"}), 404
             
-            cursor.close()
-            connection.close()
-            
             # Map to API format
-            room_data = map_room_data(room)
+            room_data = row_mapper('ROOM', cursor)(room)
+            cursor.close()
             return jsonify(room_data)
         except Error as e:
             return jsonify({"error": str(e)}), 500
@@ -597,23 +994,17 @@ def get_room(room_id):
 
 @app.route('/api/cancellations', methods=['GET'])
 def get_cancellations():
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             cursor.execute("SELECT * FROM CANCELLATION ORDER BY Can_date DESC")
+            map_cancellation = row_mapper('CANCELLATION', cursor)
             cancellations = cursor.fetchall()
             cursor.close()
-            connection.close()
             
             # Map to API format
-            result = [{
-                'id': c[0],
-                'booking_id': c[1],
-                'customer_id': c[2],
-                'refund_amount': float(c[3]) if c[3] else 0,
-                'cancellation_date': c[4].strftime('%Y-%m-%d') if c[4] else None
-            } for c in cancellations]
+            result = [map_cancellation(c) for c in cancellations]
             
             return jsonify(result)
         except Error as e:
@@ -624,7 +1015,7 @@ def get_cancellations():
 def cancel_reservation(reservation_id):
     data = request.json or {}
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             # Start a transaction
@@ -638,19 +1029,16 @@ def cancel_reservation(reservation_id):
             if not booking:
                 cursor.close()
                 connection.rollback()
-                connection.close()
                 return jsonify({"error": "Reservation not found"}), 404
             
             # Generate cancellation ID
-            cursor.execute("SELECT MAX(SUBSTRING(CanID, 2)) FROM CANCELLATION")
-            result = cursor.fetchone()[0]
-            next_id = 1 if result is None else int(result) + 1
-            can_id = f"C{next_id:04d}"
+            can_id = f"C{id_allocator.next_id('CANCELLATION'):04d}"
             
             # Calculate refund amount (default to full refund if not specified)
             refund_amount = data.get('refund_amount', booking[2])
             
             # Insert cancellation record
+            booking_write = availability_index.track_write(cursor)
             cursor.execute("""
                 INSERT INTO CANCELLATION (CanID, BookID, GusID, Refund_amt, Can_date)
                 VALUES (%s, %s, %s, %s, %s)
@@ -663,10 +1051,15 @@ def cancel_reservation(reservation_id):
             ))
             
             # The trigger will update the BOOKING table to mark the room as available
+            booking_write.written(cursor)
+            if ROOM_NIGHT_CONFIG['enabled']:
+                room_inventory.release(cursor, booking[0])
+            if STATS_CONFIG['enabled']:
+                stats_summary.record_cancellation(cursor)
             
             connection.commit()
+            sync_availability(cursor, booking_write, booking[0])
             cursor.close()
-            connection.close()
             
             return jsonify({
                 "id": can_id,
@@ -681,25 +1074,20 @@ def cancel_reservation(reservation_id):
 
 @app.route('/api/payments', methods=['GET'])
 def get_payments():
-    connection = create_connection()
+    mode = stream_mode()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             cursor.execute("SELECT * FROM PAYMENT")
+            map_payment = row_mapper('PAYMENT', cursor)
+            if mode:
+                return stream_rows(cursor, map_payment, mode, STREAM_CONFIG['batch_size'], on_close=detach_db())
             payments = cursor.fetchall()
             cursor.close()
-            connection.close()
             
             # Map to API format
-            result = [{
-                'id': p[0],
-                'booking_id': p[1],
-                'customer_id': p[2],
-                'amount_paid': float(p[3]) if p[3] else 0,
-                'remaining_balance': float(p[4]) if p[4] else 0,
-                'payment_method': p[5],
-                'is_fully_paid': bool(p[6])
-            } for p in payments]
+            result = [map_payment(p) for p in payments]
             
             return jsonify(result)
         except Error as e:
@@ -716,39 +1104,42 @@ def create_payment():
     if missing_fields:
         return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             
-            # Check if booking exists
-            cursor.execute("SELECT BookID, Total_Price FROM BOOKING WHERE BookID = %s", (data['booking_id'],))
-            booking = cursor.fetchone()
+            # Check if booking exists; in ledger mode this also locks it and
+            # reads the paid-to-date kept in BOOKING_BALANCE
+            if PAYMENT_LEDGER_CONFIG['enabled']:
+                booking = payment_ledger.lock_booking(cursor, data['booking_id'])
+            else:
+                cursor.execute("SELECT Total_Price FROM BOOKING WHERE BookID = %s", (data['booking_id'],))
+                booking = cursor.fetchone()
             if not booking:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Booking not found"}), 404
             
             # Check if customer exists
             cursor.execute("SELECT GusID FROM GUEST WHERE GusID = %s", (data['customer_id'],))
             if not cursor.fetchone():
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Customer not found"}), 404
             
             # Generate payment ID
-            cursor.execute("SELECT MAX(PayID) FROM PAYMENT")
-            max_id = cursor.fetchone()[0]
-            new_id = 5671 if max_id is None else max_id + 1
+            new_id = id_allocator.next_id('PAYMENT')
             
             # Calculate remaining balance
-            total_price = float(booking[1])
+            total_price = float(booking[0])
             amount_paid = float(data['amount_paid'])
             
-            # Check if there are existing payments
-            cursor.execute("SELECT SUM(Pd_amt) FROM PAYMENT WHERE BookID = %s", (data['booking_id'],))
-            existing_payments = cursor.fetchone()[0]
-            existing_payments = float(existing_payments) if existing_payments else 0
+            if PAYMENT_LEDGER_CONFIG['enabled']:
+                existing_payments = float(booking[1])
+            else:
+                # Check if there are existing payments
+                cursor.execute("SELECT SUM(Pd_amt) FROM PAYMENT WHERE BookID = %s", (data['booking_id'],))
+                existing_payments = cursor.fetchone()[0]
+                existing_payments = float(existing_payments) if existing_payments else 0
             
             remaining_balance = total_price - (existing_payments + amount_paid)
             fully_paid = 1 if remaining_balance <= 0 else 0
@@ -766,10 +1157,11 @@ def create_payment():
                 data['payment_method'],
                 fully_paid
             ))
+            if PAYMENT_LEDGER_CONFIG['enabled']:
+                payment_ledger.record(cursor, new_id)
             
             connection.commit()
             cursor.close()
-            connection.close()
             
             return jsonify({
                 "id": new_id,
@@ -783,7 +1175,7 @@ def create_payment():
 
 @app.route('/api/reviews', methods=['GET'])
 def get_reviews():
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -795,7 +1187,6 @@ def get_reviews():
             """)
             reviews = cursor.fetchall()
             cursor.close()
-            connection.close()
             
             # Map to API format
             result = [{
@@ -826,7 +1217,7 @@ def create_review():
     if not 1 <= int(data['rating']) <= 5:
         return jsonify({"error": "Rating must be between 1 and 5"}), 400
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -835,14 +1226,10 @@ def create_review():
             cursor.execute("SELECT GusID FROM GUEST WHERE GusID = %s", (data['customer_id'],))
             if not cursor.fetchone():
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Customer not found"}), 404
             
             # Generate review ID
-            cursor.execute("SELECT MAX(SUBSTRING(RevID, 2)) FROM REVIEW")
-            result = cursor.fetchone()[0]
-            next_id = 1 if result is None else int(result) + 1
-            rev_id = f"R{next_id:04d}"
+            rev_id = f"R{id_allocator.next_id('REVIEW'):04d}"
             
             # Insert review
             cursor.execute("""
@@ -855,10 +1242,11 @@ def create_review():
                 data['comments'][:100],  # Truncate to fit VARCHAR(100)
                 datetime.now().strftime('%Y-%m-%d')
             ))
+            if STATS_CONFIG['enabled']:
+                stats_summary.record_review(cursor, data['rating'])
             
             connection.commit()
             cursor.close()
-            connection.close()
             
             return jsonify({
                 "id": rev_id,
@@ -868,9 +1256,20 @@ def create_review():
             return jsonify({"error": str(e)}), 500
     return jsonify({"error": "Database connection failed"}), 500
 
+def map_invoice(i):
+    return {
+        'invoice_number': i[0],
+        'booking_id': i[1],
+        'customer_id': i[2],
+        'total_amount': float(i[3]) if i[3] else 0,
+        'booking_date': i[4].strftime('%Y-%m-%d') if i[4] else None,
+        'customer_name': f"{i[5]} {i[6]}"  # First name + Last name
+    }
+
 @app.route('/api/invoices', methods=['GET'])
 def get_invoices():
-    connection = create_connection()
+    mode = stream_mode()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -881,19 +1280,13 @@ def get_invoices():
                 JOIN GUEST g ON i.GusID = g.GusID
                 ORDER BY i1.Book_date DESC
             """)
+            if mode:
+                return stream_rows(cursor, map_invoice, mode, STREAM_CONFIG['batch_size'], on_close=detach_db())
             invoices = cursor.fetchall()
             cursor.close()
-            connection.close()
             
             # Map to API format
-            result = [{
-                'invoice_number': i[0],
-                'booking_id': i[1],
-                'customer_id': i[2],
-                'total_amount': float(i[3]) if i[3] else 0,
-                'booking_date': i[4].strftime('%Y-%m-%d') if i[4] else None,
-                'customer_name': f"{i[5]} {i[6]}"  # First name + Last name
-            } for i in invoices]
+            result = [map_invoice(i) for i in invoices]
             
             return jsonify(result)
         except Error as e:
@@ -902,7 +1295,7 @@ def get_invoices():
 
 @app.route('/api/invoices/<string:invoice_id>', methods=['GET'])
 def get_invoice(invoice_id):
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
@@ -918,7 +1311,6 @@ def get_invoice(invoice_id):
             
             if not invoice:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Invoice not found"}), 404
             
             # Get payment information
@@ -929,7 +1321,6 @@ def get_invoice(invoice_id):
             payments = cursor.fetchall()
             
             cursor.close()
-            connection.close()
             
             # Map to API format
             result = {
@@ -960,11 +1351,16 @@ def get_invoice(invoice_id):
 @app.route('/api/statistics', methods=['GET'])
 def get_statistics():
     """Get hotel statistics for dashboard"""
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             
+            if STATS_CONFIG['enabled']:
+                statistics = stats_summary.read(cursor)
+                cursor.close()
+                return jsonify(statistics)
+            
             # Get total number of bookings
             cursor.execute("SELECT COUNT(*) FROM BOOKING")
             total_bookings = cursor.fetchone()[0]
@@ -998,7 +1394,6 @@ def get_statistics():
             bookings_by_month = {row[0]: row[1] for row in cursor.fetchall()}
             
             cursor.close()
-            connection.close()
             
             return jsonify({
                 'total_bookings': total_bookings,
@@ -1016,37 +1411,54 @@ def get_statistics():
 # Add a test endpoint to verify database connection and schema
 @app.route('/api/test/database', methods=['GET'])
 def test_database():
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             
-            # Test each table
+            # Test each table. Counts are InnoDB's estimates unless ?exact=1,
+            # which serves COUNT(*) results cached by table_stats
+            exact = request.args.get('exact') in ('1', 'true')
             tables = ['BOOKING', 'GUEST', 'PAYMENT', 'CANCELLATION', 'INVOICE', 'INVOICE1', 'REVIEW', 'ROOM']
             results = {}
             
+            # Counting errors are reported per table by exact(); the
+            # estimates come from one information_schema query
+            try:
+                if exact:
+                    counts = table_stats.exact(cursor, tables)
+                else:
+                    counts = {table: {'count': count} for table, count in table_stats.approximate(cursor).items()}
+            except Error as e:
+                counts = dict.fromkeys(tables, {'error': str(e)})
             for table in tables:
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = cursor.fetchone()[0]
+                stats = counts.get(table, {'error': "Table not found"})
+                if 'error' in stats:
                     results[table] = {
-                        'status': 'OK',
-                        'record_count': count
+                        'status': 'ERROR',
+                        'message': stats['error']
                     }
-                except Error as e:
+                else:
                     results[table] = {
-                        'status': 'ERROR',
-                        'message': str(e)
+                        'status': 'OK',
+                        'record_count': stats['count'],
+                        'approximate': not exact
                     }
             
             # Test view
             try:
-                cursor.execute("SELECT COUNT(*) FROM PENDING_PMT")
-                count = cursor.fetchone()[0]
-                results['PENDING_PMT'] = {
-                    'status': 'OK',
-                    'record_count': count
-                }
+                if exact:
+                    cursor.execute("SELECT COUNT(*) FROM PENDING_PMT")
+                    results['PENDING_PMT'] = {
+                        'status': 'OK',
+                        'record_count': cursor.fetchone()[0]
+                    }
+                else:
+                    cursor.execute("SELECT 1 FROM PENDING_PMT LIMIT 1")
+                    cursor.fetchall()
+                    results['PENDING_PMT'] = {
+                        'status': 'OK'
+                    }
             except Error as e:
                 results['PENDING_PMT'] = {
                     'status': 'ERROR',
@@ -1068,7 +1480,6 @@ def test_database():
                 }
             
             cursor.close()
-            connection.close()
             
             return jsonify({
                 'database_connection': 'OK',
@@ -1088,6 +1499,15 @@ def test_database():
 # Custom SQL Query execution endpoint
 @app.route('/api/execute-query', methods=['POST'])
 def execute_query():
+    """Run a SELECT from the SQL console.
+
+    Optional request fields: maxRows and timeoutMs (capped by
+    CONSOLE_CONFIG), queryId (to cancel the query from another request),
+    cache (false skips the result cache) and explain (true adds the EXPLAIN
+    FORMAT=JSON plan and the rows examined). "truncated" is true when the
+    result had more than maxRows rows.
+    """
+    started = time.perf_counter()
     data = request.json
     if not data or 'query' not in data:
         return jsonify({"error": "No query provided"}), 400
@@ -1100,32 +1520,97 @@ def execute_query():
     if not query.strip().upper().startswith('SELECT'):
         return jsonify({"error": "Only SELECT queries are allowed for security reasons"}), 403
     
-    connection = create_connection()
+    try:
+        budget = Budget.from_request(data, CONSOLE_CONFIG['max_rows'], CONSOLE_CONFIG['timeout_ms'])
+    except ConsoleRequestError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Buffered results of SELECTs over tracked tables are cached; send
+    # "cache": false to always run the query
+    with_plan = data.get('explain') is True
+    mode = None if with_plan else stream_mode()
+    use_cache = QUERY_CACHE_CONFIG['enabled'] and data.get('cache', True) is not False and not mode and not with_plan
+    
+    connection = get_console_db()
     if connection:
         try:
+            versions = None
+            tables = tables_read(query, DB_CONFIG['database']) if use_cache else None
+            if tables is not None:
+                cursor = connection.cursor()
+                versions = table_versions.current(cursor, sorted(tables)) if tables else {}
+                cursor.close()
+            
+            cache_key = result_cache.key(query)
+            if versions is None:
+                result_cache.bypass()
+            else:
+                cached = result_cache.get(cache_key, versions)
+                if cached:
+                    column_names, results = cached
+                    return jsonify({
+                        "success": True,
+                        "results": results[:budget.max_rows],
+                        "columns": column_names,
+                        "rowCount": min(len(results), budget.max_rows),
+                        "truncated": len(results) > budget.max_rows,
+                        "cache": "hit",
+                        "elapsedMs": round((time.perf_counter() - started) * 1000, 3)
+                    })
+            
             cursor = connection.cursor(dictionary=True)
+            plan = explain(cursor, query) if with_plan else None
+            query_id = g.console_query = console_queries.start(connection.connection_id, query, data.get('queryId'))
+            budget.apply(cursor, streaming=bool(mode))
             cursor.execute(query)
             
-            # For SELECT queries, fetch results
-            if query.strip().upper().startswith('SELECT'):
-                results = cursor.fetchall()
-                
-                # Get column names
+            if mode:
                 column_names = [column[0] for column in cursor.description]
-                
-                cursor.close()
-                connection.close()
-                
-                return jsonify({
-                    "success": True,
-                    "results": results,
-                    "columns": column_names,
-                    "rowCount": len(results)
-                })
+                head = '{"success": true, "columns": ' + app.json.dumps(column_names) + ', "results": ['
+                return stream_rows(cursor, lambda row: row, mode, STREAM_CONFIG['batch_size'], head=head,
+                                   tail=lambda count: f'], "rowCount": {count}, "maxRows": {budget.max_rows}}}',
+                                   on_close=detach_db('console_db'))
+            
+            results = cursor.fetchall()
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+            column_names = [column[0] for column in cursor.description]
+            cursor.close()
+            
+            truncated = len(results) > budget.max_rows
+            if truncated:
+                results = results[:budget.max_rows]
+            elif versions is not None:
+                result_cache.put(cache_key, versions, column_names, results)
             
+            response = {
+                "success": True,
+                "queryId": query_id,
+                "results": results,
+                "columns": column_names,
+                "rowCount": len(results),
+                "truncated": truncated,
+                "cache": "bypass" if versions is None else "miss",
+                "elapsedMs": elapsed_ms
+            }
+            if with_plan:
+                cursor = connection.cursor()
+                with query_monitor.suspended():
+                    response["rowsExamined"] = rows_examined(cursor)
+                cursor.close()
+                response["plan"] = plan
+            return jsonify(response)
+        
+        except ConsoleRequestError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         except Error as e:
-            if connection:
-                connection.close()
+            if e.errno == ER_QUERY_TIMEOUT:
+                return jsonify({
+                    "success": False,
+                    "error": f"Query exceeded the {budget.timeout_ms} ms time limit",
+                    "timedOut": True
+                }), 504
+            if e.errno == ER_QUERY_INTERRUPTED:
+                return jsonify({"success": False, "error": "Query was cancelled", "cancelled": True}), 409
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -1133,33 +1618,111 @@ def execute_query():
     
     return jsonify({"error": "Database connection failed"}), 500
 
+# Stop a running console query (the queryId sent with /api/execute-query).
+# Runs on the main pool so it works while the console pool is exhausted.
+@app.route('/api/execute-query/<query_id>/cancel', methods=['POST'])
+def cancel_query(query_id):
+    connection = get_db()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            cancelled = console_queries.cancel(
+                query_id, lambda connection_id: cursor.execute(f"KILL QUERY {int(connection_id)}"))
+            cursor.close()
+            if not cancelled:
+                return jsonify({"error": "Query is not running"}), 404
+            return jsonify({"id": query_id, "message": "Query cancelled"})
+        except Error as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Database connection failed"}), 500
+
+# Background query jobs: submit, poll, then page through or download the rows
+@app.route('/api/query-jobs', methods=['POST'])
+def create_query_job():
+    data = request.json
+    if not data or 'query' not in data:
+        return jsonify({"error": "No query provided"}), 400
+    
+    query = data['query']
+    if not query.strip().upper().startswith('SELECT'):
+        return jsonify({"error": "Only SELECT queries are allowed for security reasons"}), 403
+    
+    try:
+        budget = Budget.from_request(data, JOBS_CONFIG['max_rows'], JOBS_CONFIG['timeout_ms'])
+        job = query_jobs.submit(query, budget)
+    except ConsoleRequestError as e:
+        return jsonify({"error": str(e)}), 400
+    except JobLimitReached as e:
+        return jsonify({"error": str(e)}), 429
+    
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/query-jobs', methods=['GET'])
+def get_query_jobs():
+    return jsonify(query_jobs.list())
+
+@app.route('/api/query-jobs/<job_id>', methods=['GET'])
+def get_query_job(job_id):
+    job = query_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Query job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/query-jobs/<job_id>/results', methods=['GET'])
+def get_query_job_results(job_id):
+    """Rows of a finished job: ?offset=&limit= pages, or ?format=csv for all of them"""
+    job = query_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Query job not found"}), 404
+    if job.state != SUCCEEDED:
+        return jsonify({"error": f"Query job is {job.state}", "state": job.state}), 409
+    
+    if request.args.get('format') == 'csv':
+        return Response(rows_as_csv(job.columns, job.rows, STREAM_CONFIG['batch_size']), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename="query-{job.id}.csv"'})
+    
+    try:
+        limit = parse_limit(request.args.get('limit'), JOBS_CONFIG['max_page_size'], JOBS_CONFIG['page_size'])
+        offset = request.args.get('offset', '0')
+        if not offset.isdigit():
+            raise InvalidPageRequest("Offset must be a non-negative integer")
+        offset = int(offset)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
+    
+    rows = job.rows[offset:offset + limit]
+    return jsonify({
+        "success": True,
+        "columns": job.columns,
+        "results": [dict(zip(job.columns, row)) for row in rows],
+        "offset": offset,
+        "rowCount": len(rows),
+        "totalRows": len(job.rows),
+        "truncated": job.truncated,
+        "nextOffset": offset + limit if offset + limit < len(job.rows) else None
+    })
+
+@app.route('/api/query-jobs/<job_id>', methods=['DELETE'])
+def cancel_query_job(job_id):
+    try:
+        cancelled = query_jobs.cancel(job_id)
+    except Error as e:
+        return jsonify({"error": str(e)}), 500
+    if not cancelled:
+        return jsonify({"error": "Query job is not queued or running"}), 404
+    return jsonify({"id": job_id, "message": "Query job cancelled"})
+
+# Console queries running in this worker process
+@app.route('/api/admin/console-queries', methods=['GET'])
+def get_console_queries():
+    return jsonify(console_queries.list())
+
 # Endpoint to get predefined queries from dbSQL.sql
 @app.route('/api/predefined-queries', methods=['GET'])
 def get_predefined_queries():
     try:
-        # Read the dbSQL.sql file
-        with open('database/dbSQL.sql', 'r') as file:
-            content = file.read()
-            
-        # Parse the content to extract queries and their descriptions
-        # Each query starts with a comment and ends before the next comment
-        import re
-        queries = []
-        
-        # Match pattern: -- Comment text\nSELECT...;
-        pattern = r'--\s+(.*?)\n(.*?;)'
-        matches = re.findall(pattern, content, re.DOTALL)
-        
-        for idx, (description, query) in enumerate(matches):
-            # Clean up the query by removing extra whitespace
-            clean_query = query.strip()
-            # Only include SELECT queries
-            if clean_query.upper().startswith('SELECT'):
-                queries.append({
-                    "id": idx + 1,
-                    "description": description.strip(),
-                    "query": clean_query
-                })
+        # Parsed once and reloaded only when dbSQL.sql changes (see query_catalog.py)
+        queries = [query.to_dict() for query in query_catalog.queries()]
         
         return jsonify({
             "success": True,
@@ -1172,21 +1735,50 @@ def get_predefined_queries():
             "error": str(e)
         }), 500
 
-# Get all pending payments (demonstrates VIEW usage)
+# Get all pending payments (outstanding balance per booking)
 @app.route('/api/pending-payments', methods=['GET'])
 def get_pending_payments():
-    connection = create_connection()
+    """Bookings with an outstanding balance, from PENDING_BALANCE when it exists.
+
+    ?sort=balance (largest first, default) or ?sort=booking, ?order=asc|desc,
+    paged with ?limit= and ?cursor= like GET /api/reservations.
+    """
+    sort = request.args.get('sort', 'balance')
+    order = request.args.get('order')
+    if sort not in pending_balances.SORTS:
+        return jsonify({"success": False, "error": "sort must be balance or booking"}), 400
+    if order not in (None, 'asc', 'desc'):
+        return jsonify({"success": False, "error": "order must be asc or desc"}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'), PENDING_PAYMENT_CONFIG['max_page_size'],
+                            default=PENDING_PAYMENT_CONFIG['page_size'])
+        cursor_token = request.args.get('cursor')
+        after = decode_cursor(cursor_token, 2) if cursor_token else None
+    except InvalidPageRequest as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM PENDING_PMT")
-            payments = cursor.fetchall()
+            payments = pending_balances.page(
+                cursor, limit + 1, sort, None if order is None else order == 'desc', after)
             cursor.close()
-            connection.close()
-            return jsonify({
+
+            next_cursor = None
+            if len(payments) > limit:
+                payments = payments[:limit]
+                last = payments[-1]
+                column = pending_balances.SORTS[sort][0]
+                next_cursor = encode_cursor(str(last[column]), last['BookID'])
+            response = jsonify({
                 "success": True,
-                "payments": payments
+                "payments": payments,
+                "next_cursor": next_cursor
             })
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
         except Error as e:
             return jsonify({
                 "success": False,
@@ -1194,75 +1786,61 @@ def get_pending_payments():
             }), 500
     return jsonify({"error": "Database connection failed"}), 500
 
-# Get reservation lengths using STAY_LEN function
+# Get reservation lengths (Stay_len column, else the STAY_LEN function)
 @app.route('/api/reservation-lengths', methods=['GET'])
 def get_reservation_lengths():
-    connection = create_connection()
+    """Length of stay per booking, paged by BookID, with the histogram of all stays.
+
+    ?limit=N (default STAY_LENGTH_CONFIG['page_size']) and ?cursor= page
+    the listing like GET /api/reservations; ?booking=<id>, ?min_days= and
+    ?max_days= filter it.
+    """
+    try:
+        limit = parse_limit(request.args.get('limit'), STAY_LENGTH_CONFIG['max_page_size'],
+                            default=STAY_LENGTH_CONFIG['page_size'])
+        cursor_token = request.args.get('cursor')
+        after = decode_cursor(cursor_token, 1)[0] if cursor_token else None
+        filters = {}
+        for name, arg in (('book_id', 'booking'), ('min_days', 'min_days'), ('max_days', 'max_days')):
+            value = request.args.get(arg)
+            if value is not None:
+                filters[name] = int(value)
+    except InvalidPageRequest as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except ValueError:
+        return jsonify({"success": False, "error": "booking, min_days and max_days must be integers"}), 400
+
+    connection = get_db()
     if connection:
         try:
-            cursor = connection.cursor(dictionary=True)
-
-            # Add diagnostics
-            diagnostics = {}
-            
-            # Check if STAY_LEN function exists
-            try:
-                cursor.execute("SHOW FUNCTION STATUS WHERE Db = %s AND Name = 'STAY_LEN'", (DB_CONFIG['database'],))
-                function_exists = cursor.fetchone() is not None
-                diagnostics['function_exists'] = function_exists
-            except Error as e:
-                diagnostics['function_check_error'] = str(e)
-            
-            # Check for bookings with non-NULL dates
-            try:
-                cursor.execute("SELECT COUNT(*) as count FROM BOOKING WHERE Check_in IS NOT NULL AND Check_out IS NOT NULL")
-                result = cursor.fetchone()
-                diagnostics['bookings_with_dates'] = result['count'] if result else 0
-            except Error as e:
-                diagnostics['booking_check_error'] = str(e)
-            
-            # Check a few sample bookings
-            try:
-                cursor.execute("SELECT BookID, Check_in, Check_out FROM BOOKING LIMIT 5")
-                sample_bookings = cursor.fetchall()
-                diagnostics['sample_bookings'] = sample_bookings
-            except Error as e:
-                diagnostics['sample_error'] = str(e)
-            
-            # Try the main query
+            cursor = connection.cursor()
+            if stay_lengths.capabilities is None and probe_stay_lengths(cursor) is None:
+                return jsonify({"success": False, "error": "Could not read the database schema"}), 500
             try:
-                cursor.execute("SELECT BookID, STAY_LEN(Check_in, Check_out) as No_of_days FROM BOOKING")
-                results = cursor.fetchall()
+                results = stay_lengths.page(cursor, limit + 1, after, **filters)
+                histogram = stay_lengths.histogram(cursor)
             except Error as e:
-                diagnostics['main_query_error'] = str(e)
-                # If the main query fails, create a sample booking with valid dates
-                try:
-                    # First check if we already have a sample booking
-                    cursor.execute("SELECT BookID FROM BOOKING WHERE BookID = 9999")
-                    if not cursor.fetchone():
-                        cursor.execute("""
-                            INSERT INTO BOOKING (BookID, GusID, Total_Price, Check_in, Check_out, Book_date, Room_no)
-                            VALUES (9999, 1, 100.00, '2023-01-01', '2023-01-05', '2022-12-01', 101)
-                        """)
-                        connection.commit()
-                        diagnostics['sample_booking_created'] = True
-                    
-                    # Try again with the new sample booking
-                    cursor.execute("SELECT BookID, STAY_LEN(Check_in, Check_out) as No_of_days FROM BOOKING WHERE BookID = 9999")
-                    results = cursor.fetchall()
-                    diagnostics['retry_successful'] = True
-                except Error as retry_error:
-                    diagnostics['retry_error'] = str(retry_error)
-                    results = []
-            
+                if is_missing_feature(e):
+                    # Schema changed since the probe; look again on the next call
+                    stay_lengths.capabilities = None
+                raise
             cursor.close()
-            connection.close()
-            
-            return jsonify({
+
+            next_cursor = None
+            if len(results) > limit:
+                results = results[:limit]
+                next_cursor = encode_cursor(results[-1]['BookID'])
+            response = jsonify({
                 "success": True,
                 "reservation_lengths": results,
-                "diagnostics": diagnostics
+                "histogram": [{"days": days, "bookings": bookings} for days, bookings in histogram],
+                "next_cursor": next_cursor,
+                "diagnostics": dict(stay_lengths.capabilities,
+                                    bookings_with_dates=sum(bookings for _, bookings in histogram))
             })
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
         except Error as e:
             return jsonify({
                 "success": False,
@@ -1283,7 +1861,7 @@ def create_cancellation():
     if missing_fields:
         return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
     
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             # Start a transaction
@@ -1297,7 +1875,6 @@ def create_cancellation():
             if not booking:
                 cursor.close()
                 connection.rollback()
-                connection.close()
                 return jsonify({"error": "Booking does not exist"}), 404
             
             # Check if guest exists
@@ -1306,15 +1883,13 @@ def create_cancellation():
             if not guest:
                 cursor.close()
                 connection.rollback()
-                connection.close()
                 return jsonify({"error": "Guest does not exist"}), 404
             
             # Generate a cancellation ID
-            cursor.execute("SELECT MAX(CAST(CanID AS UNSIGNED)) FROM CANCELLATION")
-            max_id = cursor.fetchone()[0]
-            new_id = '100001' if max_id is None else str(int(max_id) + 1)
+            new_id = str(id_allocator.next_id('CANCELLATION_NUMERIC'))
             
             # Create the cancellation
+            booking_write = availability_index.track_write(cursor)
             cursor.execute("""
                 INSERT INTO CANCELLATION (CanID, BookID, GusID, Refund_amt, Can_date)
                 VALUES (%s, %s, %s, %s, %s)
@@ -1325,6 +1900,12 @@ def create_cancellation():
                 data['refundAmount'],
                 data.get('cancellationDate', datetime.now().strftime('%Y-%m-%d'))
             ))
+            booking_write.written(cursor)
+            
+            if ROOM_NIGHT_CONFIG['enabled']:
+                room_inventory.release(cursor, data['bookingId'])
+            if STATS_CONFIG['enabled']:
+                stats_summary.record_cancellation(cursor)
             
             # Commit the transaction - this will trigger the UPDATE_ROOM_ON_CANCELLATION trigger
             connection.commit()
@@ -1332,9 +1913,9 @@ def create_cancellation():
             # Verify the trigger worked by checking if room_no was set to 0000
             cursor.execute("SELECT Room_no FROM BOOKING WHERE BookID = %s", (data['bookingId'],))
             updated_room = cursor.fetchone()[0]
+            sync_availability(cursor, booking_write, data['bookingId'])
             
             cursor.close()
-            connection.close()
             
             return jsonify({
                 "success": True,
@@ -1346,7 +1927,6 @@ def create_cancellation():
         except Error as e:
             if connection:
                 connection.rollback()
-                connection.close()
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -1360,69 +1940,86 @@ def create_sample_data():
     """
     Creates sample data for testing database features like functions, views, and triggers.
     """
-    connection = create_connection()
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             results = {}
             
-            # Create test bookings with check-in and check-out dates
+            # Create test bookings with check-in and check-out dates. Ids come
+            # from the allocator, so a sample booking is recognised by its
+            # guest, room and stay rather than by a fixed BookID
+            sample_bookings = [
+                (1, 150.00, '2023-01-01', '2023-01-05', '2022-12-01', 101),
+                (2, 200.00, '2023-02-10', '2023-02-15', '2023-01-15', 102),
+                (3, 300.00, '2023-03-20', '2023-03-25', '2023-02-28', 103)
+            ]
+            booking_ids = []
             try:
-                # Check if we already have sample bookings
-                cursor.execute("SELECT COUNT(*) FROM BOOKING WHERE BookID >= 9000")
-                if cursor.fetchone()[0] < 3:
-                    # Create new sample bookings
-                    sample_bookings = [
-                        (9001, 1, 150.00, '2023-01-01', '2023-01-05', '2022-12-01', 101),
-                        (9002, 2, 200.00, '2023-02-10', '2023-02-15', '2023-01-15', 102),
-                        (9003, 3, 300.00, '2023-03-20', '2023-03-25', '2023-02-28', 103)
-                    ]
-                    
-                    for booking in sample_bookings:
+                created = []
+                booking_write = availability_index.track_write(cursor)
+                for gus_id, price, check_in, check_out, book_date, room_no in sample_bookings:
+                    cursor.execute("""
+                        SELECT BookID FROM BOOKING
+                        WHERE GusID = %s AND Check_in = %s AND Check_out = %s AND Room_no = %s
+                    """, (gus_id, check_in, check_out, room_no))
+                    row = cursor.fetchone()
+                    if row:
+                        booking_ids.append((row[0], gus_id))
+                        continue
+                    book_id = id_allocator.next_id('BOOKING')
+                    cursor.execute("""
+                        INSERT INTO BOOKING (BookID, GusID, Total_Price, Check_in, Check_out, Book_date, Room_no)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, (book_id, gus_id, price, check_in, check_out, book_date, room_no))
+                    if ROOM_NIGHT_CONFIG['enabled']:
                         try:
-                            cursor.execute("""
-                                INSERT INTO BOOKING (BookID, GusID, Total_Price, Check_in, Check_out, Book_date, Room_no)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            """, booking)
-                        except Error as e:
-                            # If booking already exists, just ignore the error
-                            if "Duplicate entry" not in str(e):
-                                raise
-                    
-                    connection.commit()
+                            room_inventory.reserve(cursor, book_id, room_no, check_in, check_out)
+                        except RoomAlreadyBooked:
+                            cursor.execute("DELETE FROM BOOKING WHERE BookID = %s", (book_id,))
+                            results.setdefault('bookings_skipped', []).append(room_no)
+                            continue
+                    if STATS_CONFIG['enabled']:
+                        stats_summary.record_booking(cursor, book_date, price)
+                    booking_ids.append((book_id, gus_id))
+                    created.append(book_id)
+                
+                booking_write.written(cursor)
+                connection.commit()
+                sync_availability(cursor, booking_write, *created)
+                if created:
                     results['bookings_created'] = True
             except Error as e:
                 results['booking_error'] = str(e)
             
-            # Create test payments (for PENDING_PMT view)
+            # Create test payments (for PENDING_PMT view) on the first two
+            # sample bookings that have no payment yet
             try:
-                # Check if we already have sample payments
-                cursor.execute("SELECT COUNT(*) FROM PAYMENT WHERE PayID >= 6000")
-                if cursor.fetchone()[0] < 2:
-                    # Create new sample payments with remaining balances
-                    sample_payments = [
-                        (6001, 9001, 1, 75.00, 75.00, 'Credit Card', 0),
-                        (6002, 9002, 2, 100.00, 100.00, 'Cash', 0)
-                    ]
-                    
-                    for payment in sample_payments:
-                        try:
-                            cursor.execute("""
-                                INSERT INTO PAYMENT (PayID, BookID, GusID, Pd_amt, Remain_bal, Method, Fully_pd)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            """, payment)
-                        except Error as e:
-                            # If payment already exists, just ignore the error
-                            if "Duplicate entry" not in str(e):
-                                raise
-                    
-                    connection.commit()
+                sample_payments = [
+                    (75.00, 75.00, 'Credit Card', 0),
+                    (100.00, 100.00, 'Cash', 0)
+                ]
+                created = False
+                for (book_id, gus_id), payment in zip(booking_ids, sample_payments):
+                    cursor.execute("SELECT COUNT(*) FROM PAYMENT WHERE BookID = %s", (book_id,))
+                    if cursor.fetchone()[0]:
+                        continue
+                    pay_id = id_allocator.next_id('PAYMENT')
+                    cursor.execute("""
+                        INSERT INTO PAYMENT (PayID, BookID, GusID, Pd_amt, Remain_bal, Method, Fully_pd)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """, (pay_id, book_id, gus_id) + payment)
+                    if PAYMENT_LEDGER_CONFIG['enabled']:
+                        payment_ledger.record(cursor, pay_id)
+                    created = True
+                
+                connection.commit()
+                if created:
                     results['payments_created'] = True
             except Error as e:
                 results['payment_error'] = str(e)
             
             cursor.close()
-            connection.close()
             
             return jsonify({
                 "success": True,
@@ -1433,7 +2030,6 @@ def create_sample_data():
         except Error as e:
             if connection:
                 connection.rollback()
-                connection.close()
             return jsonify({
                 "success": False,
                 "error": str(e)
@@ -1441,15 +2037,6 @@ def create_sample_data():
     
     return jsonify({"error": "Database connection failed"}), 500
 
-if __name__ == '__main__':
-    app.run(debug=True)
-
-
-
-
-## 2. Create a Room Availability Endpoint
-
-
 @app.route('/api/rooms/<int:room_id>/availability', methods=['GET'])
 def check_room_availability(room_id):
     check_in = request.args.get('check_in')
@@ -1458,42 +2045,409 @@ def check_room_availability(room_id):
     if not check_in or not check_out:
         return jsonify({"error": "Check-in and check-out dates are required"}), 400
     
-    connection = create_connection()
+    try:
+        if to_date(check_out) < to_date(check_in):
+            return jsonify({"error": "Check-out date must not be before check-in date", "available": False}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date format, use YYYY-MM-DD. Error: {str(e)}", "available": False}), 400
+    
+    connection = get_db()
     if connection:
         try:
             cursor = connection.cursor()
             
             # Check if room exists
-            cursor.execute("SELECT Room_no FROM ROOM WHERE Room_no = %s", (room_id,))
-            if not cursor.fetchone():
+            if ROOM_CACHE_CONFIG['enabled']:
+                room_exists = room_catalog.get(cursor, room_id) is not None
+            else:
+                cursor.execute("SELECT Room_no FROM ROOM WHERE Room_no = %s", (room_id,))
+                room_exists = cursor.fetchone() is not None
+            if not room_exists:
                 cursor.close()
-                connection.close()
                 return jsonify({"error": "Room not found", "available": False}), 404
             
-            # Check if room is already booked for the requested dates
-            cursor.execute("""
-                SELECT BookID FROM BOOKING 
-                WHERE Room_no = %s 
-                AND (
-                    (Check_in <= %s AND Check_out >= %s) OR
-                    (Check_in <= %s AND Check_out >= %s) OR
-                    (Check_in >= %s AND Check_out <= %s)
-                )
-            """, (
-                room_id,
-                check_out, check_out,  # Room is booked on check-out date
-                check_in, check_in,    # Room is booked on check-in date
-                check_in, check_out    # Booking spans the entire requested period
-            ))
-            
-            existing_booking = cursor.fetchone()
+            available = room_is_free(cursor, room_id, check_in, check_out)
             cursor.close()
-            connection.close()
             
             return jsonify({
                 "room_id": room_id,
-                "available": not bool(existing_booking)
+                "available": available
             })
         except Error as e:
             return jsonify({"error": str(e), "available": False}), 500
-    return jsonify({"error": "Database connection failed", "available": False}), 500
\ No newline at end of file
+    return jsonify({"error": "Database connection failed", "available": False}), 500
+
+# Every free room matching the filters in one request (replaces one
+# /api/rooms/<id>/availability call per room)
+ROOM_VIEW_FLAGS = {
+    'ocean': 'Ocean_view_flag',
+    'city': 'Cityview_flag',
+    'mountain': 'Mtview_flag'
+}
+
+@app.route('/api/availability/search', methods=['GET'])
+def search_availability():
+    check_in = request.args.get('check_in')
+    check_out = request.args.get('check_out')
+    
+    if not check_in or not check_out:
+        return jsonify({"error": "Check-in and check-out dates are required"}), 400
+    
+    try:
+        if to_date(check_out) < to_date(check_in):
+            return jsonify({"error": "Check-out date must not be before check-in date"}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Invalid date format, use YYYY-MM-DD. Error: {str(e)}"}), 400
+    
+    # Room filters
+    conditions = []
+    params = []
+    
+    capacity = request.args.get('capacity')
+    if capacity:
+        if not capacity.isdigit():
+            return jsonify({"error": "Capacity must be a positive integer"}), 400
+        conditions.append("R.Capacity >= %s")
+        params.append(int(capacity))
+    
+    view = request.args.get('view')
+    if view:
+        if view.lower() not in ROOM_VIEW_FLAGS:
+            return jsonify({"error": f"View must be one of: {', '.join(ROOM_VIEW_FLAGS)}"}), 400
+        conditions.append(f"R.{ROOM_VIEW_FLAGS[view.lower()]} = 'Y'")
+    
+    deluxe = request.args.get('deluxe')
+    if deluxe:
+        if deluxe.lower() in ('true', 'y', '1'):
+            conditions.append("R.Deluxe_flag = 'Y'")
+        elif deluxe.lower() in ('false', 'n', '0'):
+            conditions.append("(R.Deluxe_flag IS NULL OR R.Deluxe_flag <> 'Y')")
+        else:
+            return jsonify({"error": "Deluxe must be true or false"}), 400
+    
+    where = " AND ".join(conditions) if conditions else "1 = 1"
+    
+    connection = get_db()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            
+            use_index = AVAILABILITY_CONFIG['enabled'] and not ROOM_NIGHT_CONFIG['enabled']
+            if use_index and not availability_index.current(cursor):
+                # BOOKING changed since the index was loaded: answer from SQL
+                availability_index.refresh_in_background(db_pool)
+                use_index = False
+            
+            if ROOM_NIGHT_CONFIG['enabled']:
+                # Anti-join against the room-night inventory primary key
+                cursor.execute(f"""
+                    SELECT R.* FROM ROOM R
+                    WHERE {where}
+                    AND NOT EXISTS (
+                        SELECT 1 FROM ROOM_NIGHT N
+                        WHERE N.Room_no = R.Room_no
+                        AND N.Night >= %s AND N.Night <= %s
+                    )
+                    ORDER BY R.Room_no
+                """, params + [check_in, check_out])
+                map_room = row_mapper('ROOM', cursor)
+                rooms = [map_room(room) for room in cursor.fetchall()]
+            elif use_index and not AVAILABILITY_CONFIG['verify']:
+                # Filter the matching rooms against the in-memory index
+                cursor.execute(f"SELECT R.* FROM ROOM R WHERE {where} ORDER BY R.Room_no", params)
+                map_room = row_mapper('ROOM', cursor)
+                rooms = [room for room in map(map_room, cursor.fetchall())
+                         if availability_index.is_free(room['id'], check_in, check_out)]
+            else:
+                # Single anti-join: rooms with no booking overlapping the dates,
+                # using the same overlap rule as find_overlapping_booking()
+                cursor.execute(f"""
+                    SELECT R.* FROM ROOM R
+                    WHERE {where}
+                    AND NOT EXISTS (
+                        SELECT 1 FROM BOOKING B
+                        WHERE B.Room_no = R.Room_no
+                        AND B.Check_in <= %s AND B.Check_out >= %s
+                    )
+                    ORDER BY R.Room_no
+                """, params + [check_out, check_in])
+                map_room = row_mapper('ROOM', cursor)
+                rooms = [map_room(room) for room in cursor.fetchall()]
+                
+                if use_index:
+                    # Ask the index about every matching room, not just the
+                    # ones SQL found free, so misses show up as well as extras
+                    cursor.execute(f"SELECT R.Room_no FROM ROOM R WHERE {where}", params)
+                    index_rooms = {room_no for (room_no,) in cursor.fetchall()
+                                   if availability_index.is_free(room_no, check_in, check_out)}
+                    sql_rooms = {room['id'] for room in rooms}
+                    if index_rooms != sql_rooms:
+                        app.logger.error(
+                            f"Availability index disagrees with BOOKING for {check_in}..{check_out}: "
+                            f"free only in index={sorted(index_rooms - sql_rooms)} "
+                            f"free only in sql={sorted(sql_rooms - index_rooms)}")
+            
+            cursor.close()
+            
+            return jsonify({
+                "check_in": check_in,
+                "check_out": check_out,
+                "count": len(rooms),
+                "rooms": rooms
+            })
+        except Error as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Database connection failed"}), 500
+
+# Compare the availability index with BOOKING (consistency verification)
+@app.route('/api/admin/availability', methods=['GET'])
+def get_availability_index_status():
+    result = availability_index.stats()
+    if request.args.get('verify') != 'true':
+        return jsonify(result)
+    
+    connection = get_db()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            result['verification'] = availability_index.verify(cursor)
+            cursor.close()
+            return jsonify(result)
+        except Error as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Database connection failed"}), 500
+
+# Backfill the room-night inventory from BOOKING:
+#   flask --app app rebuild-room-nights
+@app.cli.command('rebuild-room-nights')
+def rebuild_room_nights():
+    """Refill ROOM_NIGHT from BOOKING before enabling ROOM_NIGHT_CONFIG"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor()
+        result = room_inventory.rebuild(cursor)
+        connection.commit()
+        cursor.close()
+    print(f"Wrote {result['nights']} room nights")
+    if result['conflicting_bookings']:
+        print(f"Bookings overlapping an earlier booking of the same room: {result['conflicting_bookings']}")
+
+# Backfill or repair the dashboard counters:
+#   flask --app app rebuild-stats
+@app.cli.command('rebuild-stats')
+def rebuild_stats():
+    """Recount STATS_SUMMARY from BOOKING, GUEST, CANCELLATION and REVIEW"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor()
+        rows = stats_summary.rebuild(cursor)
+        connection.commit()
+        cursor.close()
+    print(f"Wrote {rows} STATS_SUMMARY rows")
+
+# Backfill or repair the length-of-stay histogram:
+#   flask --app app rebuild-stay-lengths
+@app.cli.command('rebuild-stay-lengths')
+def rebuild_stay_lengths():
+    """Recount STAY_LENGTH_HISTOGRAM from BOOKING"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor()
+        rows = stay_lengths.rebuild(cursor)
+        connection.commit()
+        cursor.close()
+    print(f"Wrote {rows} STAY_LENGTH_HISTOGRAM rows")
+
+# Backfill or repair the outstanding balances behind /api/pending-payments:
+#   flask --app app rebuild-pending-balances
+@app.cli.command('rebuild-pending-balances')
+def rebuild_pending_balances():
+    """Refill PENDING_BALANCE from the latest payment of each booking"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor()
+        counts = pending_balances.rebuild(cursor)
+        connection.commit()
+        cursor.close()
+    print(f"Wrote {counts['bookings']} PENDING_BALANCE rows, {counts['outstanding']} with a balance due")
+
+# Compare the booking balances of the payment ledger with PAYMENT and,
+# with --fix, rewrite them (also the backfill before enabling the ledger):
+#   flask --app app reconcile-payments [--fix]
+@app.cli.command('reconcile-payments')
+@click.option('--fix', is_flag=True, help="Rewrite drifted balances from PAYMENT")
+def reconcile_payments(fix):
+    """Report bookings whose BOOKING_BALANCE differs from their PAYMENT rows"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor()
+        drift = payment_ledger.reconcile(cursor, fix=fix)
+        connection.commit()
+        cursor.close()
+    for row in drift:
+        print(f"Booking {row['booking_id']}: ledger {row['ledger_paid']:.2f} in {row['ledger_payments']} payments, "
+              f"PAYMENT {row['paid']:.2f} in {row['payments']} payments")
+    print(f"{len(drift)} bookings drifted" + (", balances rewritten" if fix and drift else ""))
+
+# Create the indexes of index_set.py an existing database lacks:
+#   flask --app app apply-indexes
+@app.cli.command('apply-indexes')
+def apply_indexes():
+    """Bring the database's secondary indexes up to index_set.VERSION"""
+    with db_pool.connection() as connection:
+        cursor = connection.cursor()
+        created, failed, skipped = index_set.apply(cursor, DB_CONFIG['database'])
+        connection.commit()
+        cursor.close()
+    for name in created:
+        print(f"Created {name}")
+    for name in skipped:
+        print(f"Warning: skipped {name}, its columns do not exist yet (see index_set.py)")
+    for name, error in failed:
+        print(f"Could not create {name}: {error}")
+    if not failed:
+        print(f"Index set is at version {index_set.VERSION}")
+
+# Replay captured statements through EXPLAIN and list those still scanning:
+#   flask --app app index-advisor                    (MySQL's digest table)
+#   flask --app app index-advisor --url http://localhost:5000
+#                                                    (a running backend's digests)
+@app.cli.command('index-advisor')
+@click.option('--url', help="Base URL of a running backend to read its captured digests from")
+@click.option('--min-rows', default=1000, show_default=True, help="Ignore scans estimated below this many rows")
+@click.option('--limit', default=200, show_default=True, help="Digests read from performance_schema")
+def index_advisor_command(url, min_rows, limit):
+    """Report statements EXPLAIN still plans as full table or index scans"""
+    if url:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/api/admin/index-advisor?min_rows={min_rows}") as response:
+            result = json.loads(response.read())
+        missing, report = result['index_set']['missing'], result['full_scans']
+    else:
+        with db_pool.connection() as connection:
+            cursor = connection.cursor()
+            with query_monitor.suspended():
+                examples = index_advisor.from_performance_schema(cursor, DB_CONFIG['database'], limit)
+                report = index_advisor.advise(cursor, examples, min_rows)
+                missing = [{"name": name, "table": table, "columns": list(columns)}
+                           for name, table, columns, _ in index_set.missing(cursor, DB_CONFIG['database'])]
+            cursor.close()
+    for index in missing:
+        print(f"Missing index {index['name']} on {index['table']} ({', '.join(index['columns'])}); run apply-indexes")
+    for entry in report:
+        if 'error' in entry:
+            print(f"Could not EXPLAIN: {entry['query'][:120]}\n  {entry['error']}")
+            continue
+        print(entry['query'][:200])
+        for scan in entry['scans']:
+            keys = ', '.join(scan['possible_keys'] or []) or 'none'
+            print(f"  {scan['access']} of {scan['table']}, ~{scan['rows_per_scan']} rows (possible keys: {keys})")
+    print(f"{sum(1 for entry in report if 'scans' in entry)} statements still scan")
+
+# Statements slower than SLOW_QUERY_CONFIG['threshold_ms'], newest first,
+# with their EXPLAIN plans (DELETE empties the buffer)
+@app.route('/api/admin/slow-queries', methods=['GET', 'DELETE'])
+def get_slow_queries():
+    if request.method == 'DELETE':
+        slow_query_log.clear()
+    return jsonify({
+        "enabled": SLOW_QUERY_CONFIG['enabled'],
+        "threshold_ms": slow_query_log.threshold_ms,
+        "captured": slow_query_log.captured,
+        "queries": slow_query_log.entries()
+    })
+
+# Per-digest statement statistics of this worker process since the last
+# reset, ordered by ?order=total|mean|p95|calls|rows (DELETE resets them)
+@app.route('/api/admin/statements', methods=['GET', 'DELETE'])
+def get_statement_stats():
+    if request.method == 'DELETE':
+        statement_stats.reset()
+    order = request.args.get('order', 'total')
+    if order not in ('total', 'mean', 'p95', 'calls', 'rows'):
+        return jsonify({"error": "order must be one of total, mean, p95, calls, rows"}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'), STATEMENT_STATS_CONFIG['max_digests'])
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "enabled": STATEMENT_STATS_CONFIG['enabled'],
+        "since": datetime.fromtimestamp(statement_stats.reset_at).isoformat(),
+        "evicted": statement_stats.evicted,
+        "statements": statement_stats.snapshot(order, limit)
+    })
+
+# Row counts of the application tables: InnoDB estimates, plus the cached
+# exact counts (?exact=1 counts the tables not counted yet)
+@app.route('/api/admin/table-stats', methods=['GET'])
+def get_table_stats():
+    connection = get_db()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            result = {"approximate": table_stats.approximate(cursor)}
+            if request.args.get('exact') in ('1', 'true'):
+                result["exact"] = table_stats.exact(cursor)
+            cursor.close()
+            result["cache"] = table_stats.stats()
+            return jsonify(result)
+        except Error as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Database connection failed"}), 500
+
+# Statements captured by /api/admin/statements that EXPLAIN still plans as
+# full table or index scans (?min_rows= ignores smaller scans), and the
+# indexes of index_set.py the database lacks
+@app.route('/api/admin/index-advisor', methods=['GET'])
+def get_index_advice():
+    min_rows = request.args.get('min_rows', '0')
+    if not min_rows.isdigit():
+        return jsonify({"error": "min_rows must be a non-negative integer"}), 400
+    connection = get_console_db()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            with query_monitor.suspended():
+                report = index_advisor.advise(cursor, statement_stats.examples(), int(min_rows))
+                missing = index_set.missing(cursor, DB_CONFIG['database'])
+                installed = index_set.installed_version(cursor)
+            cursor.close()
+            return jsonify({
+                "index_set": {
+                    "version": index_set.VERSION,
+                    "installed_version": installed,
+                    "missing": [{"name": name, "table": table, "columns": list(columns)}
+                                for name, table, columns, _ in missing]
+                },
+                "statements": len(statement_stats.examples()),
+                "full_scans": report
+            })
+        except Error as e:
+            return jsonify({"error": str(e)}), 500
+    return jsonify({"error": "Database connection failed"}), 500
+
+# Query job counts and limits of this worker process
+@app.route('/api/admin/query-jobs', methods=['GET'])
+def get_query_job_stats():
+    return jsonify(query_jobs.stats())
+
+# SQL console result cache of this worker process (DELETE empties it)
+@app.route('/api/admin/query-cache', methods=['GET', 'DELETE'])
+def get_query_cache_stats():
+    if request.method == 'DELETE':
+        result_cache.clear()
+    return jsonify(result_cache.stats())
+
+# Connection pool usage, for sizing POOL_CONFIG
+@app.route('/api/admin/pool', methods=['GET'])
+def get_pool_stats():
+    pool = console_pool if request.args.get('pool') == 'console' else db_pool
+    return jsonify(pool.stats())
+
+# Id blocks reserved by this worker process
+@app.route('/api/admin/id-allocator', methods=['GET'])
+def get_id_allocator_stats():
+    return jsonify(id_allocator.stats())
+
+# Room catalog cache hits and misses in this worker process
+@app.route('/api/admin/room-cache', methods=['GET'])
+def get_room_cache_stats():
+    return jsonify(room_catalog.stats())
+
+if __name__ == '__main__':
+    app.run(debug=True)
+
@@ -0,0 +1,274 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from mysql.connector import Error
+
+import table_versions
+
+logger = logging.getLogger(__name__)
+
+
+def to_date(value):
+    """Accept DATE values from MySQL or 'YYYY-MM-DD' strings from the API"""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class RoomIntervals:
+    """Bookings of a single room kept sorted by check-in date.
+
+    max_end[i] holds the latest check-out among the first i+1 bookings, so
+    "does any booking overlap [check_in, check_out]" is a single bisect even
+    when legacy data contains overlapping bookings.
+    """
+
+    def __init__(self):
+        self.entries = []   # (check_in, check_out, book_id), sorted
+        self.starts = []    # check_in of each entry, for bisect
+        self.max_end = []
+
+    def _rebuild_from(self, pos):
+        running = self.max_end[pos - 1] if pos > 0 else None
+        del self.max_end[pos:]
+        for _, end, _ in self.entries[pos:]:
+            running = end if running is None or end > running else running
+            self.max_end.append(running)
+
+    def add(self, book_id, check_in, check_out):
+        entry = (check_in, check_out, book_id)
+        pos = bisect_left(self.entries, entry)
+        self.entries.insert(pos, entry)
+        self.starts.insert(pos, check_in)
+        self._rebuild_from(pos)
+
+    def remove(self, book_id, check_in, check_out):
+        entry = (check_in, check_out, book_id)
+        pos = bisect_left(self.entries, entry)
+        if pos < len(self.entries) and self.entries[pos] == entry:
+            del self.entries[pos]
+            del self.starts[pos]
+            self._rebuild_from(pos)
+
+    def overlaps(self, check_in, check_out):
+        # Same rule as the SQL check: an existing booking conflicts when it
+        # starts on or before check_out and ends on or after check_in
+        pos = bisect_right(self.starts, check_out)
+        return pos > 0 and self.max_end[pos - 1] >= check_in
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TrackedWrite:
+    """Rows one transaction writes to BOOKING, counted on its version slot.
+
+    Create it with AvailabilityIndex.track_write() before the writes and call
+    written() after them, both inside the transaction.
+    """
+
+    def __init__(self, cursor, generation):
+        self.generation = generation
+        self.before = table_versions.lock_slot(cursor, 'BOOKING') if cursor else None
+        self.count = None
+
+    def written(self, cursor):
+        if self.before is not None:
+            self.count = table_versions.lock_slot(cursor, 'BOOKING') - self.before
+
+
+class AvailabilityIndex:
+    """Per-process interval index of BOOKING rows keyed by room.
+
+    The index records the BOOKING version from TABLE_VERSION it was loaded
+    at. current() compares it with the database before every use: after a
+    write to BOOKING from another process the index is not trusted and
+    callers answer from SQL while refresh_in_background() reloads it off the
+    request path. This process's own writes are tracked (see track_write())
+    and move the version forward once applied, so they keep the index in
+    use. Without TABLE_VERSION, refresh_seconds is the only bound on
+    staleness.
+    """
+
+    LOAD_QUERY = """
+        SELECT BookID, Room_no, Check_in, Check_out FROM BOOKING
+        WHERE Room_no IS NOT NULL AND Check_in IS NOT NULL AND Check_out IS NOT NULL
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at = None
+        self.version = None
+        self._generation = 0    # loads so far; a tracked write must not span one
+        self._rooms = {}
+        self._bookings = {}     # book_id -> (room_no, check_in, check_out)
+        self._lock = threading.RLock()
+        self._reloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='availability-reload')
+        self._reloading = False
+
+    @staticmethod
+    def _build(rows):
+        rooms, bookings = {}, {}
+        for book_id, room_no, check_in, check_out in rows:
+            bookings[book_id] = (room_no, to_date(check_in), to_date(check_out))
+        for book_id, (room_no, check_in, check_out) in bookings.items():
+            rooms.setdefault(room_no, []).append((check_in, check_out, book_id))
+
+        built = {}
+        for room_no, entries in rooms.items():
+            intervals = RoomIntervals()
+            intervals.entries = sorted(entries)
+            intervals.starts = [entry[0] for entry in intervals.entries]
+            intervals._rebuild_from(0)
+            built[room_no] = intervals
+        return built, bookings
+
+    def load(self, cursor):
+        """(Re)build the whole index from BOOKING"""
+        # Version first: a write landing between the two queries then only
+        # causes one extra reload instead of a stale index
+        versions = table_versions.current(cursor, ['BOOKING'])
+        cursor.execute(self.LOAD_QUERY)
+        rooms, bookings = self._build(cursor.fetchall())
+        with self._lock:
+            self._rooms, self._bookings = rooms, bookings
+            self.version = versions and versions['BOOKING']
+            self.loaded_at = time.monotonic()
+            self._generation += 1
+
+    def current(self, cursor):
+        """Whether the index reflects every committed BOOKING write"""
+        if self.is_stale():
+            return False
+        versions = table_versions.current(cursor, ['BOOKING'])
+        return versions is None or versions['BOOKING'] == self.version
+
+    def track_write(self, cursor):
+        """Start counting the BOOKING rows written in cursor's transaction.
+
+        Call before the writes; the connection's version slot stays locked
+        until commit. Once the write is committed and applied with put(),
+        remove() or sync_booking(), pass the result to advance().
+        """
+        with self._lock:
+            generation = self._generation
+        return TrackedWrite(cursor if self.loaded else None, generation)
+
+    def advance(self, cursor, write):
+        """Move the version past a committed, applied write.
+
+        The index stays current only when the write was the only change to
+        BOOKING since its version, i.e. the database is exactly write.count
+        versions ahead and the index was not reloaded meanwhile. Otherwise
+        the next current() fails and the index is reloaded as usual.
+        """
+        if write.count is None:
+            return False
+        versions = table_versions.current(cursor, ['BOOKING'])
+        with self._lock:
+            if (versions and self.version is not None and write.generation == self._generation
+                    and versions['BOOKING'] == self.version + write.count):
+                self.version = versions['BOOKING']
+                return True
+        return False
+
+    def refresh_in_background(self, pool):
+        """Reload from BOOKING on a background thread; concurrent calls share one reload"""
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        self._reloader.submit(self._reload, pool)
+
+    def _reload(self, pool):
+        try:
+            with pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    self.load(cursor)
+                finally:
+                    cursor.close()
+        except Error as e:
+            logger.warning(f"Could not reload availability index: {e}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def is_stale(self):
+        if not self.loaded:
+            return True
+        if self.refresh_seconds is None:
+            return False
+        return time.monotonic() - self.loaded_at > self.refresh_seconds
+
+    def remove(self, book_id):
+        with self._lock:
+            previous = self._bookings.pop(book_id, None)
+            if previous:
+                room_no, check_in, check_out = previous
+                self._rooms[room_no].remove(book_id, check_in, check_out)
+
+    def put(self, book_id, room_no, check_in, check_out):
+        """Insert or replace a booking; rows without a room or dates are dropped"""
+        check_in, check_out = to_date(check_in), to_date(check_out)
+        with self._lock:
+            self.remove(book_id)
+            if room_no is None or check_in is None or check_out is None:
+                return
+            room_no = int(room_no)
+            self._bookings[book_id] = (room_no, check_in, check_out)
+            self._rooms.setdefault(room_no, RoomIntervals()).add(book_id, check_in, check_out)
+
+    def sync_booking(self, cursor, book_id):
+        """Re-read one booking after a write and update the index to match"""
+        cursor.execute("SELECT BookID, Room_no, Check_in, Check_out FROM BOOKING WHERE BookID = %s", (book_id,))
+        row = cursor.fetchone()
+        if row:
+            self.put(*row)
+        else:
+            self.remove(book_id)
+
+    def is_free(self, room_no, check_in, check_out):
+        check_in, check_out = to_date(check_in), to_date(check_out)
+        with self._lock:
+            intervals = self._rooms.get(room_no)
+            return intervals is None or not intervals.overlaps(check_in, check_out)
+
+    def verify(self, cursor):
+        """Compare the index with BOOKING and return the booking ids that differ"""
+        cursor.execute(self.LOAD_QUERY)
+        _, expected = self._build(cursor.fetchall())
+        with self._lock:
+            actual = dict(self._bookings)
+        missing = sorted(book_id for book_id in expected if book_id not in actual)
+        extra = sorted(book_id for book_id in actual if book_id not in expected)
+        changed = sorted(book_id for book_id in expected
+                         if book_id in actual and actual[book_id] != expected[book_id])
+        return {
+            'consistent': not (missing or extra or changed),
+            'indexed_bookings': len(actual),
+            'missing': missing,
+            'extra': extra,
+            'changed': changed
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'age_seconds': round(time.monotonic() - self.loaded_at, 3) if self.loaded else None,
+                'version': self.version,
+                'reloading': self._reloading,
+                'rooms': len(self._rooms),
+                'bookings': len(self._bookings)
+            }
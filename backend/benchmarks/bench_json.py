@@ -0,0 +1,70 @@
+"""Before/after timings for serializing the list endpoints' payloads.
+
+Run from the backend directory:
+
+    python benchmarks/bench_json.py [--rows 100000]
+
+"before" is the old path: positional db_mapper functions converting every
+DECIMAL/DATE by hand, then Flask's default JSON provider. "after" is the
+compiled row mapper plus json_provider.FastJSONProvider, with orjson when it
+is installed and with the standard json module otherwise.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import json_provider  # noqa: E402
+from db_mapper import (  # noqa: E402
+    TABLE_FIELDS, compile_mapper, map_booking_to_reservation, map_guest_to_customer, map_room_data
+)
+from bench_row_mapper import booking_rows, guest_rows, room_rows  # noqa: E402
+
+
+def render(app, mapper, rows):
+    with app.app_context():
+        started = time.perf_counter()
+        body = app.json.response([mapper(row) for row in rows]).get_data()
+        return time.perf_counter() - started, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    before_app = Flask('before')
+    before_app.json = DefaultJSONProvider(before_app)
+    after_app = Flask('after')
+    after_app.json = json_provider.FastJSONProvider(after_app)
+
+    variants = [('before', before_app, None)]
+    if json_provider.orjson is not None:
+        variants.append(('after/orjson', after_app, json_provider.orjson))
+    variants.append(('after/stdlib', after_app, None))
+
+    cases = [
+        ('GET /api/reservations', 'BOOKING', booking_rows, map_booking_to_reservation),
+        ('GET /api/customers', 'GUEST', guest_rows, map_guest_to_customer),
+        ('GET /api/rooms', 'ROOM', room_rows, map_room_data)
+    ]
+    for endpoint, table, make_rows, positional in cases:
+        rows = make_rows(args.rows)
+        compiled = compile_mapper(table, [column for column, _, _ in TABLE_FIELDS[table]])
+        print(f"{endpoint}: {args.rows} rows")
+        baseline = None
+        for label, app, orjson_module in variants:
+            json_provider.orjson = orjson_module
+            mapper = positional if label == 'before' else compiled
+            elapsed, size = render(app, mapper, rows)
+            baseline = baseline or elapsed
+            print(f"  {label:<13} {elapsed:7.3f}s  {size / 1e6:6.1f} MB  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
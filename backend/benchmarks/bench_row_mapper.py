@@ -0,0 +1,84 @@
+"""Compare the positional db_mapper functions with the compiled row mappers.
+
+Run from the backend directory:
+
+    python benchmarks/bench_row_mapper.py [--rows 1000000]
+
+The compiled mappers leave DECIMAL and DATE values for json_provider to
+serialize, so their output is compared after JSON encoding. Rows are
+synthetic tuples shaped like mysql.connector results (Decimal,
+date, 'Y'/'N' flags), so no database is needed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_provider import _default  # noqa: E402
+
+from db_mapper import (  # noqa: E402
+    TABLE_FIELDS, compile_mapper, map_booking_to_reservation, map_guest_to_customer, map_room_data
+)
+
+
+def booking_rows(count):
+    start = date(2024, 1, 1)
+    return [
+        (100001 + i, 1 + i % 5000, Decimal('199.99'), start + timedelta(days=i % 365),
+         start + timedelta(days=i % 365 + 3), start, 101 + i % 300, 'NY', 'New York', '1 Main St')
+        for i in range(count)
+    ]
+
+
+def guest_rows(count):
+    return [(i, 'Smith', 'Anna', '555-0100', f'guest{i}@example.com', None if i % 2 else 'NY')
+            for i in range(count)]
+
+
+def room_rows(count):
+    return [
+        (101 + i, None, 'King', 2, 400, 'Y', 'Full Kitchen', 'N', 'Large Balcony', 'N', 'Wi-Fi, TV',
+         'Y', 'Full Ocean', 'N', None, 'N', None, Decimal('250.00'))
+        for i in range(count)
+    ]
+
+
+def timed(label, func, rows):
+    started = time.perf_counter()
+    for row in rows:
+        func(row)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed:8.3f}s  {len(rows) / elapsed / 1e6:6.2f}M rows/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    cases = [
+        ('BOOKING', booking_rows, map_booking_to_reservation),
+        ('GUEST', guest_rows, map_guest_to_customer),
+        ('ROOM', room_rows, map_room_data)
+    ]
+    for table, make_rows, positional in cases:
+        rows = make_rows(args.rows)
+        compiled = compile_mapper(table, [column for column, _, _ in TABLE_FIELDS[table]])
+        # Compiled mappers leave Decimal/date to the JSON provider
+        assert (json.dumps(compiled(rows[0]), default=_default, sort_keys=True)
+                == json.dumps(positional(rows[0]), sort_keys=True))
+
+        print(f"{table}: {args.rows} rows")
+        before = timed('positional', positional, rows)
+        after = timed('compiled', compiled, rows)
+        print(f"  speedup    {before / after:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,3 +15,171 @@ DB_CONFIG = {
     'password': '123456',
     'database': 'hotel_management'
 }
+
+# Connection pool used by the Flask backend (see db_pool.py)
+POOL_CONFIG = {
+    'pool_size': 5,        # connections kept open between requests
+    'max_overflow': 10,    # extra connections opened under peak load
+    'timeout': 30,         # seconds to wait for a free connection
+    'recycle': 3600,       # reconnect connections older than this many seconds
+    'pre_ping': True       # ping idle connections before handing them out
+}
+
+# In-memory room availability index (see availability.py)
+AVAILABILITY_CONFIG = {
+    'enabled': True,
+    'verify': False,          # also run the SQL overlap check and log any disagreement
+    'refresh_seconds': 300    # also reload after this long (only bound without TABLE_VERSION)
+}
+
+# Room-night inventory: one ROOM_NIGHT row per booked (room, day), check-in
+# through check-out inclusive like the SQL overlap check, so the database
+# rejects double bookings. Run "flask --app app rebuild-room-nights"
+# after creating the table and before enabling (see db_scripts/create_room_night.sql).
+ROOM_NIGHT_CONFIG = {
+    'enabled': False
+}
+
+# Payment ledger: POST /api/payments locks the booking and keeps its
+# paid-to-date in BOOKING_BALANCE instead of summing PAYMENT each time.
+# Run "flask --app app reconcile-payments --fix" after creating the table and
+# before enabling (see db_scripts/create_booking_balance.sql).
+PAYMENT_LEDGER_CONFIG = {
+    'enabled': False
+}
+
+# Primary keys are reserved from the ID_SEQUENCE table in blocks of this size
+# per worker process (see id_allocator.py), over a connection of their own
+ID_ALLOCATOR_CONFIG = {
+    'block_size': 50
+}
+
+# Keyset pagination of GET /api/reservations (?limit=&cursor=)
+RESERVATION_PAGE_CONFIG = {
+    'max_limit': 500
+}
+
+# Rows fetched per round trip when a list endpoint streams its response
+# (Accept: application/x-ndjson or application/stream+json, see streaming.py)
+STREAM_CONFIG = {
+    'batch_size': 500
+}
+
+# Per-process copy of the ROOM table behind /api/rooms (see room_catalog.py).
+# Writes bump TABLE_VERSION (db_scripts/create_table_version.sql); each
+# process reads that version at most every check_seconds.
+ROOM_CACHE_CONFIG = {
+    'enabled': True,
+    'ttl_seconds': 300,     # reload at least this often, even without a version change
+    'check_seconds': 5
+}
+
+# Dashboard statistics from the STATS_SUMMARY counters instead of scanning
+# BOOKING, GUEST, CANCELLATION and REVIEW (see stats_summary.py). Create the
+# table (db_scripts/create_stats_summary.sql) and run
+# "flask --app app rebuild-stats" before enabling.
+STATS_CONFIG = {
+    'enabled': False,
+    'slots': 8      # rows per counter; more slots, less lock contention between writers
+}
+
+# Result cache of POST /api/execute-query (see result_cache.py). Entries are
+# dropped when a table they read changes (TABLE_VERSION, see
+# db_scripts/create_table_version.sql).
+QUERY_CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 128,     # least recently used results are evicted first
+    'max_rows': 5000        # larger results are not cached
+}
+
+# SQL console (POST /api/execute-query, see sql_console.py). Console queries
+# run on their own connection pool; each request may lower, but not raise,
+# the row cap and the MAX_EXECUTION_TIME statement timeout.
+CONSOLE_CONFIG = {
+    'pool': {
+        'pool_size': 2,
+        'max_overflow': 1,
+        'timeout': 5,         # seconds to wait for a console connection
+        'reset_session': True  # drop the query's row cap and timeout on release
+    },
+    'max_rows': 10000,
+    'timeout_ms': 30000
+}
+
+# Background query jobs (POST /api/query-jobs, see query_jobs.py). Jobs run
+# on their own connection pool of max_concurrent connections; up to
+# max_queued more wait for a free worker and further jobs are refused.
+JOBS_CONFIG = {
+    'max_concurrent': 2,
+    'max_queued': 10,
+    'max_rows': 100000,
+    'timeout_ms': 600000,
+    'retention_seconds': 900,   # finished jobs and their rows are dropped after this
+    'page_size': 100,
+    'max_page_size': 1000
+}
+
+# Statements on any backend pool slower than threshold_ms are kept, with
+# their EXPLAIN FORMAT=JSON plan, in a ring buffer of the last `capacity`
+# (GET /api/admin/slow-queries, see query_monitor.py)
+SLOW_QUERY_CONFIG = {
+    'enabled': True,
+    'threshold_ms': 200,
+    'capacity': 100,
+    'explain': True     # fetch plans on a console pool connection
+}
+
+# Per-digest statement statistics in the style of pg_stat_statements:
+# statements are grouped with their literals stripped, keeping call count,
+# latency and rows for up to max_digests digests, p95 over the last
+# `samples` calls of each (GET/DELETE /api/admin/statements)
+STATEMENT_STATS_CONFIG = {
+    'enabled': True,
+    'max_digests': 500,
+    'samples': 1000
+}
+
+# Per-request query budget: queries and database time of every request are
+# reported in a Server-Timing header, and a warning is logged for requests
+# over their route's budget (routes are keyed by endpoint function name) or
+# repeating one statement shape more than repeat_threshold times (N+1)
+QUERY_BUDGET_CONFIG = {
+    'enabled': True,
+    'max_queries': 10,
+    'max_db_ms': 500,
+    'repeat_threshold': 5,
+    'routes': {
+        'create_reservation': {'max_queries': 8},
+        'get_statistics': {'max_queries': 6},
+        'get_reservation_lengths': {'max_queries': 3},
+        'execute_query': {'max_db_ms': None}      # bounded by CONSOLE_CONFIG['timeout_ms']
+    }
+}
+
+# Prometheus metrics at /metrics (needs prometheus_client). Behind a
+# pre-fork server, export PROMETHEUS_MULTIPROC_DIR=<empty shared directory>
+# before starting the workers, see metrics.py
+METRICS_CONFIG = {
+    'enabled': True
+}
+
+# Page size of GET /api/pending-payments (see pending_balances.py)
+PENDING_PAYMENT_CONFIG = {
+    'page_size': 100,
+    'max_page_size': 1000
+}
+
+# Page size of GET /api/reservation-lengths (see stay_lengths.py)
+STAY_LENGTH_CONFIG = {
+    'page_size': 100,
+    'max_page_size': 1000
+}
+
+# Table row counts for /api/test/database and /api/admin/table-stats (see
+# table_stats.py): information_schema estimates are reused for
+# approximate_ttl_seconds; exact COUNT(*) results are served for up to
+# ttl_seconds, then recounted in the background
+TABLE_STATS_CONFIG = {
+    'ttl_seconds': 300,
+    'approximate_ttl_seconds': 60
+}
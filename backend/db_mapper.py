@@ -78,4 +78,124 @@ def map_room_data(room_data):
         'has_mountain_view': room_data[15] == 'Y',  # Mtview_flag
         'mountain_description': room_data[16],  # Mountain
         'price_per_night': price_per_night  # Price per night (new column)
-    }
\ No newline at end of file
+    }
+
+# ---------------------------------------------------------------------------
+# Compiled row mappers
+#
+# The positional functions above break silently when a column is added or
+# reordered. The mappers below are generated from cursor.description instead:
+# the first time a (table, column layout) pair is seen, a function with one
+# inlined expression per column is compiled and cached, so mapping a row is a
+# single dict display with no per-row lookups or length checks.
+# ---------------------------------------------------------------------------
+
+# Conversion applied to a column value; {v} is replaced by the row item.
+# DECIMAL and DATE values are passed through untouched: json_provider
+# serializes them as numbers and ISO dates.
+CONVERSIONS = {
+    None: "{v}",
+    'float_or_zero': "(float({v}) if {v} else 0)",
+    'flag': "({v} == 'Y')",
+    'bool': "bool({v})",
+    'or_empty': "({v} or \"\")"
+}
+
+# Table -> [(column, API field, conversion)], in API field order. Fields whose
+# column is missing from a result set are returned as None.
+TABLE_FIELDS = {
+    'BOOKING': [
+        ('BookID', 'id', None),
+        ('GusID', 'customer_id', None),
+        ('Total_Price', 'total_price', None),
+        ('Check_in', 'check_in_date', None),
+        ('Check_out', 'check_out_date', None),
+        ('Book_date', 'created_at', None),
+        ('Room_no', 'room_id', None),
+        ('State', 'state', None),
+        ('City', 'city', None),
+        ('Street', 'street', None)
+    ],
+    'GUEST': [
+        ('GusID', 'id', None),
+        ('Lname', 'last_name', None),
+        ('Fname', 'first_name', None),
+        ('Phone', 'phone', None),
+        ('Email', 'email', None),
+        ('Address', 'address', 'or_empty')
+    ],
+    'ROOM': [
+        ('Room_no', 'id', None),
+        ('BookID', 'booking_id', None),
+        ('Descriptions', 'type', None),
+        ('Capacity', 'capacity', None),
+        ('Square_ft', 'square_feet', None),
+        ('Deluxe_flag', 'is_deluxe', 'flag'),
+        ('Kitchen', 'kitchen', None),
+        ('Superior_flag', 'is_superior', 'flag'),
+        ('Balcony', 'balcony', None),
+        ('Standard_flag', 'is_standard', 'flag'),
+        ('Amentities', 'amenities', None),
+        ('Ocean_view_flag', 'has_ocean_view', 'flag'),
+        ('Ocean', 'ocean_description', None),
+        ('Cityview_flag', 'has_city_view', 'flag'),
+        ('City', 'city_description', None),
+        ('Mtview_flag', 'has_mountain_view', 'flag'),
+        ('Mountain', 'mountain_description', None),
+        ('price_per_night', 'price_per_night', None)
+    ],
+    'PAYMENT': [
+        ('PayID', 'id', None),
+        ('BookID', 'booking_id', None),
+        ('GusID', 'customer_id', None),
+        ('Pd_amt', 'amount_paid', 'float_or_zero'),
+        ('Remain_bal', 'remaining_balance', 'float_or_zero'),
+        ('Method', 'payment_method', None),
+        ('Fully_pd', 'is_fully_paid', 'bool')
+    ],
+    'CANCELLATION': [
+        ('CanID', 'id', None),
+        ('BookID', 'booking_id', None),
+        ('GusID', 'customer_id', None),
+        ('Refund_amt', 'refund_amount', 'float_or_zero'),
+        ('Can_date', 'cancellation_date', None)
+    ]
+}
+
+_compiled_mappers = {}
+
+
+def compile_mapper(table, columns, start=0):
+    """Build a row -> dict function for a table from result column names.
+
+    start is the position of the table's first column in the row, which lets
+    one joined row be split into several objects. Column names are matched
+    case-insensitively; columns the table does not know are ignored.
+    """
+    positions = {}
+    for index, name in enumerate(columns):
+        positions.setdefault(name.lower(), start + index)
+
+    items = []
+    for column, field, conversion in TABLE_FIELDS[table]:
+        index = positions.get(column.lower())
+        value = "None" if index is None else CONVERSIONS[conversion].format(v=f"row[{index}]")
+        items.append(f"{field!r}: {value}")
+
+    source = f"def map_{table.lower()}_row(row):\n    return {{{', '.join(items)}}}\n"
+    namespace = {}
+    exec(compile(source, f"<{table} row mapper>", 'exec'), namespace)
+    return namespace[f"map_{table.lower()}_row"]
+
+
+def row_mapper(table, cursor, start=0, stop=None):
+    """Cached compiled mapper for the column layout of an executed cursor.
+
+    start/stop select the slice of cursor.description that belongs to table.
+    """
+    columns = tuple(column[0] for column in cursor.description[start:stop])
+    key = (table, columns, start)
+    mapper = _compiled_mappers.get(key)
+    if mapper is None:
+        mapper = _compiled_mappers[key] = compile_mapper(table, columns, start)
+    return mapper
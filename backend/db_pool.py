@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class PooledConnection:
+    """Thin proxy around a MySQL connection borrowed from a ConnectionPool.
+
+    Everything except close() is forwarded to the real connection. close()
+    hands the connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.instrument is not None:
+            cursor = self._pool.instrument(cursor, self)
+        return cursor
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self._pool.release(self._raw)
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections with overflow, recycle and pre-ping.
+
+    Up to pool_size connections are kept open between requests. When all of
+    them are busy, up to max_overflow extra connections are opened and closed
+    again once they are returned. Callers beyond that wait up to timeout
+    seconds before PoolTimeout is raised. With reset_session, a returned
+    connection's session state (variables set with SET SESSION, temporary
+    tables, user variables) is cleared as well as its transaction.
+    """
+
+    def __init__(self, name, db_config, pool_size=5, max_overflow=10,
+                 timeout=30, recycle=3600, pre_ping=True, reset_session=False):
+        self.name = name
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.reset_session = reset_session
+        # Optional callable(cursor, connection) -> cursor that wraps every
+        # cursor handed out, e.g. to time statements (see query_monitor.py)
+        self.instrument = None
+
+        self._idle = deque()        # (connection, created_at), most recent last
+        self._created_at = {}       # id(connection) -> created_at
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._connects = 0
+        self._recycled = 0
+        self._invalidated = 0
+        self._timeouts = 0
+        self._connect_errors = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.db_config)
+        self._created_at[id(raw)] = time.monotonic()
+        return raw
+
+    def _discard(self, raw):
+        self._created_at.pop(id(raw), None)
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def _is_usable(self, raw, created_at):
+        """Return False for connections that are too old or no longer alive"""
+        if self.recycle is not None and time.monotonic() - created_at > self.recycle:
+            self._recycled += 1
+            return False
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Error:
+                self._invalidated += 1
+                return False
+        return True
+
+    def acquire(self):
+        """Borrow a connection, waiting up to the pool timeout for one"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, created_at = self._idle.pop()
+                    break
+                if self._open < self.pool_size + self.max_overflow:
+                    raw = None
+                    self._open += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(msg=f"Timed out after {self.timeout}s waiting for a connection from pool '{self.name}'")
+                waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                wait_time = time.monotonic() - started
+                self._waits += 1
+                self._wait_time += wait_time
+                self._max_wait = max(self._max_wait, wait_time)
+
+        # Network round trips happen outside the lock
+        try:
+            if raw is not None and not self._is_usable(raw, created_at):
+                self._discard(raw)
+                raw = None
+            if raw is None:
+                raw = self._connect()
+                self._connects += 1
+        except Error:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._checkouts -= 1
+                self._connect_errors += 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a connection to the pool, resetting any open transaction"""
+        try:
+            if self.reset_session:
+                # COM_RESET_CONNECTION, which also rolls back
+                raw.reset_session()
+            elif raw.in_transaction:
+                raw.rollback()
+            healthy = True
+        except Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.pool_size:
+                self._idle.append((raw, self._created_at.get(id(raw), time.monotonic())))
+                raw = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        if raw is not None:
+            self._discard(raw)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def dispose(self):
+        """Close every idle connection (used after config changes and in scripts)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        """Snapshot of pool usage counters for sizing the pool"""
+        with self._cond:
+            return {
+                'name': self.name,
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'overflow': max(0, self._open - self.pool_size),
+                'checkouts': self._checkouts,
+                'connects': self._connects,
+                'recycled': self._recycled,
+                'invalidated': self._invalidated,
+                'timeouts': self._timeouts,
+                'connect_errors': self._connect_errors,
+                'waits': self._waits,
+                'total_wait_seconds': round(self._wait_time, 6),
+                'avg_wait_seconds': round(self._wait_time / self._waits, 6) if self._waits else 0,
+                'max_wait_seconds': round(self._max_wait, 6)
+            }
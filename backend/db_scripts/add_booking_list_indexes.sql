@@ -0,0 +1,4 @@
+-- Composite indexes behind the keyset-paginated GET /api/reservations.
+-- Already part of database/dbDDL.sql; run this once on existing databases.
+CREATE INDEX IDX_BOOKING_BOOK_DATE ON BOOKING (Book_date, BookID);
+CREATE INDEX IDX_BOOKING_GUEST_BOOK_DATE ON BOOKING (GusID, Book_date, BookID);
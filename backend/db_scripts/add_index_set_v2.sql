@@ -0,0 +1,17 @@
+-- Index set version 2 (see backend/index_set.py). Already part of
+-- database/dbDDL.sql. On existing databases prefer
+--   flask --app app apply-indexes
+-- which only creates the indexes that are missing; this script assumes the
+-- version 1 indexes exist.
+CREATE INDEX IDX_BOOKING_ROOM_DATES ON BOOKING (Room_no, Check_in, Check_out);
+CREATE INDEX IDX_CANCELLATION_BOOKING ON CANCELLATION (BookID);
+CREATE INDEX IDX_REVIEW_GUEST ON REVIEW (GusID);
+CREATE INDEX IDX_GUEST_EMAIL ON GUEST (Email);
+
+CREATE TABLE IF NOT EXISTS SCHEMA_VERSION (
+    Component VARCHAR(30) NOT NULL,
+    Version INT NOT NULL,
+    PRIMARY KEY(Component)
+);
+INSERT INTO SCHEMA_VERSION (Component, Version) VALUES ('INDEX_SET', 2)
+ON DUPLICATE KEY UPDATE Version = 2;
@@ -0,0 +1,13 @@
+-- Paid-to-date per booking for the payment ledger (see backend/payment_ledger.py).
+-- Already part of database/dbDDL.sql; run this once on existing databases, then
+--   flask --app app reconcile-payments --fix
+-- and set PAYMENT_LEDGER_CONFIG['enabled'] = True.
+CREATE TABLE IF NOT EXISTS BOOKING_BALANCE (
+    BookID INT(6) NOT NULL,
+    Paid DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    Payments INT NOT NULL DEFAULT 0,
+    PRIMARY KEY(BookID)
+);
+
+-- Payments of one booking (legacy balance query, invoices, reconciliation)
+CREATE INDEX IDX_PAYMENT_BOOKING ON PAYMENT (BookID);
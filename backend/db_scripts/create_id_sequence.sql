@@ -0,0 +1,8 @@
+-- Block-allocated primary keys (see backend/id_allocator.py). The backend
+-- creates this table on first use if it is missing; each sequence is seeded
+-- from the highest id already stored in its table.
+CREATE TABLE IF NOT EXISTS ID_SEQUENCE (
+    Seq_name VARCHAR(30) NOT NULL,
+    Next_val BIGINT NOT NULL,
+    PRIMARY KEY(Seq_name)
+);
@@ -0,0 +1,59 @@
+-- Outstanding balance per booking (see backend/pending_balances.py) and the
+-- corrected PENDING_PMT view. Already part of database/dbDDL.sql; run this
+-- once on existing databases, then fill the table:
+--   flask --app app rebuild-pending-balances
+-- Each row holds the Remain_bal of the booking's latest payment (highest
+-- PayID); the triggers keep it current whichever client writes PAYMENT.
+DROP VIEW IF EXISTS PENDING_PMT;
+CREATE VIEW PENDING_PMT AS
+SELECT P.PayID, B.GusID, B.Total_Price, P.Remain_bal
+FROM PAYMENT P
+JOIN BOOKING B ON B.BookID = P.BookID
+WHERE P.Remain_bal > 0;
+
+CREATE TABLE IF NOT EXISTS PENDING_BALANCE (
+    BookID INT(6) NOT NULL,
+    PayID INT(6) NOT NULL,
+    GusID INT(6) NOT NULL,
+    Remain_bal DECIMAL(10,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY(BookID),
+    INDEX IDX_PENDING_BALANCE_REMAIN_BAL (Remain_bal, BookID)
+);
+
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_INSERT;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_UPDATE;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_MOVE;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_DELETE;
+
+CREATE TRIGGER PAYMENT_PENDING_INSERT AFTER INSERT ON PAYMENT FOR EACH ROW
+INSERT INTO PENDING_BALANCE (BookID, PayID, GusID, Remain_bal)
+SELECT NEW.BookID, NEW.PayID, NEW.GusID, COALESCE(NEW.Remain_bal, 0) FROM DUAL
+WHERE NEW.BookID IS NOT NULL
+ON DUPLICATE KEY UPDATE
+    GusID = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(GusID), PENDING_BALANCE.GusID),
+    Remain_bal = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(Remain_bal), PENDING_BALANCE.Remain_bal),
+    PayID = GREATEST(PENDING_BALANCE.PayID, VALUES(PayID));
+
+CREATE TRIGGER PAYMENT_PENDING_UPDATE AFTER UPDATE ON PAYMENT FOR EACH ROW
+INSERT INTO PENDING_BALANCE (BookID, PayID, GusID, Remain_bal)
+SELECT NEW.BookID, NEW.PayID, NEW.GusID, COALESCE(NEW.Remain_bal, 0) FROM DUAL
+WHERE NEW.BookID IS NOT NULL
+ON DUPLICATE KEY UPDATE
+    GusID = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(GusID), PENDING_BALANCE.GusID),
+    Remain_bal = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(Remain_bal), PENDING_BALANCE.Remain_bal),
+    PayID = GREATEST(PENDING_BALANCE.PayID, VALUES(PayID));
+
+-- A payment moved to another booking: recompute the one it left
+CREATE TRIGGER PAYMENT_PENDING_MOVE AFTER UPDATE ON PAYMENT FOR EACH ROW
+UPDATE PENDING_BALANCE
+SET Remain_bal = COALESCE((SELECT COALESCE(P.Remain_bal, 0) FROM PAYMENT P
+                           WHERE P.BookID = OLD.BookID ORDER BY P.PayID DESC LIMIT 1), 0),
+    PayID = COALESCE((SELECT MAX(P.PayID) FROM PAYMENT P WHERE P.BookID = OLD.BookID), 0)
+WHERE BookID = OLD.BookID AND NOT (OLD.BookID <=> NEW.BookID);
+
+CREATE TRIGGER PAYMENT_PENDING_DELETE AFTER DELETE ON PAYMENT FOR EACH ROW
+UPDATE PENDING_BALANCE
+SET Remain_bal = COALESCE((SELECT COALESCE(P.Remain_bal, 0) FROM PAYMENT P
+                           WHERE P.BookID = OLD.BookID ORDER BY P.PayID DESC LIMIT 1), 0),
+    PayID = COALESCE((SELECT MAX(P.PayID) FROM PAYMENT P WHERE P.BookID = OLD.BookID), 0)
+WHERE BookID = OLD.BookID AND PayID = OLD.PayID;
@@ -0,0 +1,13 @@
+-- Room-night inventory used when ROOM_NIGHT_CONFIG['enabled'] is True: one
+-- row per day a booking holds its room, check-in through check-out inclusive
+-- (the same rule as the SQL overlap check). After creating the table, or on
+-- a table filled before check-out days were included, backfill it from
+-- BOOKING with:
+--   cd backend && flask --app app rebuild-room-nights
+CREATE TABLE IF NOT EXISTS ROOM_NIGHT (
+    Room_no INT(4) NOT NULL,
+    Night DATE NOT NULL,
+    BookID INT(6) NOT NULL,
+    PRIMARY KEY(Room_no, Night),
+    KEY IDX_ROOM_NIGHT_BOOKID (BookID)
+);
@@ -0,0 +1,16 @@
+-- Dashboard counters (see backend/stats_summary.py). Bucket 'ALL' holds the
+-- totals, 'YYYY-MM' buckets the bookings per month; each counter is spread
+-- over a few Slot rows to avoid a single hot row. After creating the table:
+--   flask --app app rebuild-stats
+-- then set STATS_CONFIG['enabled'] = True.
+CREATE TABLE IF NOT EXISTS STATS_SUMMARY (
+    Bucket VARCHAR(7) NOT NULL,
+    Slot TINYINT NOT NULL,
+    Bookings BIGINT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    Guests BIGINT NOT NULL DEFAULT 0,
+    Cancellations BIGINT NOT NULL DEFAULT 0,
+    Ratings BIGINT NOT NULL DEFAULT 0,
+    Rating_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY(Bucket, Slot)
+);
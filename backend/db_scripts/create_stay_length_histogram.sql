@@ -0,0 +1,45 @@
+-- Length-of-stay column and histogram (see backend/stay_lengths.py).
+-- database/dbDDL.sql creates the histogram and its triggers but not the
+-- Stay_len column: it is INVISIBLE (kept out of SELECT * and column-less
+-- INSERTs), which needs MySQL 8.0.23+. On such a server run this once to
+-- add the column and its index, then backfill the histogram:
+--   flask --app app rebuild-stay-lengths
+-- and restart the backend so it picks the new features up.
+ALTER TABLE BOOKING ADD COLUMN Stay_len INT AS (DATEDIFF(Check_out, Check_in)) STORED INVISIBLE;
+CREATE INDEX IDX_BOOKING_STAY_LEN ON BOOKING (Stay_len);
+
+CREATE TABLE IF NOT EXISTS STAY_LENGTH_HISTOGRAM (
+    Stay_len INT NOT NULL,
+    Slot TINYINT NOT NULL,
+    Bookings BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY(Stay_len, Slot)
+);
+
+DROP TRIGGER IF EXISTS BOOKING_STAY_LENGTH_INSERT;
+DROP TRIGGER IF EXISTS BOOKING_STAY_LENGTH_UPDATE;
+DROP TRIGGER IF EXISTS BOOKING_STAY_LENGTH_DELETE;
+
+CREATE TRIGGER BOOKING_STAY_LENGTH_INSERT AFTER INSERT ON BOOKING FOR EACH ROW
+INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+SELECT DATEDIFF(NEW.Check_out, NEW.Check_in), MOD(CONNECTION_ID(), 8), 1 FROM DUAL
+WHERE NEW.Check_in IS NOT NULL AND NEW.Check_out IS NOT NULL
+ON DUPLICATE KEY UPDATE Bookings = Bookings + 1;
+
+CREATE TRIGGER BOOKING_STAY_LENGTH_UPDATE AFTER UPDATE ON BOOKING FOR EACH ROW
+INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+SELECT * FROM (
+    SELECT DATEDIFF(OLD.Check_out, OLD.Check_in) AS Stay_len, MOD(CONNECTION_ID(), 8) AS Slot, -1 AS Bookings FROM DUAL
+    WHERE OLD.Check_in IS NOT NULL AND OLD.Check_out IS NOT NULL
+    AND NOT (OLD.Check_in <=> NEW.Check_in AND OLD.Check_out <=> NEW.Check_out)
+    UNION ALL
+    SELECT DATEDIFF(NEW.Check_out, NEW.Check_in), MOD(CONNECTION_ID(), 8), 1 FROM DUAL
+    WHERE NEW.Check_in IS NOT NULL AND NEW.Check_out IS NOT NULL
+    AND NOT (OLD.Check_in <=> NEW.Check_in AND OLD.Check_out <=> NEW.Check_out)
+) AS CHANGES
+ON DUPLICATE KEY UPDATE Bookings = STAY_LENGTH_HISTOGRAM.Bookings + CHANGES.Bookings;
+
+CREATE TRIGGER BOOKING_STAY_LENGTH_DELETE AFTER DELETE ON BOOKING FOR EACH ROW
+INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+SELECT DATEDIFF(OLD.Check_out, OLD.Check_in), MOD(CONNECTION_ID(), 8), -1 FROM DUAL
+WHERE OLD.Check_in IS NOT NULL AND OLD.Check_out IS NOT NULL
+ON DUPLICATE KEY UPDATE Bookings = Bookings - 1;
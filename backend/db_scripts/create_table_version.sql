@@ -0,0 +1,134 @@
+-- Change counter per table (see backend/table_versions.py). Backend
+-- processes compare it with the version of their cached data (room catalog,
+-- SQL console result cache) and reload when it moved. The triggers count
+-- every row written to the base tables, whichever client writes it. Each
+-- counter is spread over 8 slot rows picked by connection id, so concurrent
+-- transactions do not queue on one row; the version is the sum of the slots.
+DROP TABLE IF EXISTS TABLE_VERSION;
+CREATE TABLE TABLE_VERSION (
+    Table_name VARCHAR(30) NOT NULL,
+    Slot TINYINT NOT NULL,
+    Version BIGINT NOT NULL,
+    PRIMARY KEY(Table_name, Slot)
+);
+
+DROP TRIGGER IF EXISTS BOOKING_VERSION_INSERT;
+DROP TRIGGER IF EXISTS BOOKING_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS BOOKING_VERSION_DELETE;
+DROP TRIGGER IF EXISTS GUEST_VERSION_INSERT;
+DROP TRIGGER IF EXISTS GUEST_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS GUEST_VERSION_DELETE;
+DROP TRIGGER IF EXISTS PAYMENT_VERSION_INSERT;
+DROP TRIGGER IF EXISTS PAYMENT_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS PAYMENT_VERSION_DELETE;
+DROP TRIGGER IF EXISTS CANCELLATION_VERSION_INSERT;
+DROP TRIGGER IF EXISTS CANCELLATION_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS CANCELLATION_VERSION_DELETE;
+DROP TRIGGER IF EXISTS INVOICE_VERSION_INSERT;
+DROP TRIGGER IF EXISTS INVOICE_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS INVOICE_VERSION_DELETE;
+DROP TRIGGER IF EXISTS INVOICE1_VERSION_INSERT;
+DROP TRIGGER IF EXISTS INVOICE1_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS INVOICE1_VERSION_DELETE;
+DROP TRIGGER IF EXISTS REVIEW_VERSION_INSERT;
+DROP TRIGGER IF EXISTS REVIEW_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS REVIEW_VERSION_DELETE;
+DROP TRIGGER IF EXISTS ROOM_VERSION_INSERT;
+DROP TRIGGER IF EXISTS ROOM_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS ROOM_VERSION_DELETE;
+
+CREATE TRIGGER BOOKING_VERSION_INSERT AFTER INSERT ON BOOKING FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('BOOKING', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER BOOKING_VERSION_UPDATE AFTER UPDATE ON BOOKING FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('BOOKING', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER BOOKING_VERSION_DELETE AFTER DELETE ON BOOKING FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('BOOKING', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER GUEST_VERSION_INSERT AFTER INSERT ON GUEST FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('GUEST', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER GUEST_VERSION_UPDATE AFTER UPDATE ON GUEST FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('GUEST', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER GUEST_VERSION_DELETE AFTER DELETE ON GUEST FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('GUEST', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER PAYMENT_VERSION_INSERT AFTER INSERT ON PAYMENT FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('PAYMENT', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER PAYMENT_VERSION_UPDATE AFTER UPDATE ON PAYMENT FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('PAYMENT', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER PAYMENT_VERSION_DELETE AFTER DELETE ON PAYMENT FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('PAYMENT', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER CANCELLATION_VERSION_INSERT AFTER INSERT ON CANCELLATION FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('CANCELLATION', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER CANCELLATION_VERSION_UPDATE AFTER UPDATE ON CANCELLATION FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('CANCELLATION', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER CANCELLATION_VERSION_DELETE AFTER DELETE ON CANCELLATION FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('CANCELLATION', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE_VERSION_INSERT AFTER INSERT ON INVOICE FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE_VERSION_UPDATE AFTER UPDATE ON INVOICE FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE_VERSION_DELETE AFTER DELETE ON INVOICE FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE1_VERSION_INSERT AFTER INSERT ON INVOICE1 FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE1', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE1_VERSION_UPDATE AFTER UPDATE ON INVOICE1 FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE1', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE1_VERSION_DELETE AFTER DELETE ON INVOICE1 FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE1', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER REVIEW_VERSION_INSERT AFTER INSERT ON REVIEW FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('REVIEW', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER REVIEW_VERSION_UPDATE AFTER UPDATE ON REVIEW FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('REVIEW', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER REVIEW_VERSION_DELETE AFTER DELETE ON REVIEW FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('REVIEW', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER ROOM_VERSION_INSERT AFTER INSERT ON ROOM FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('ROOM', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER ROOM_VERSION_UPDATE AFTER UPDATE ON ROOM FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('ROOM', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER ROOM_VERSION_DELETE AFTER DELETE ON ROOM FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('ROOM', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
@@ -0,0 +1,118 @@
+import threading
+from collections import deque
+
+from mysql.connector import Error, errorcode
+
+
+# Sequence name -> (query returning the highest id already in use, first id)
+SEQUENCES = {
+    'BOOKING': ("SELECT MAX(BookID) FROM BOOKING", 100001),
+    'GUEST': ("SELECT MAX(GusID) FROM GUEST", 1),
+    'PAYMENT': ("SELECT MAX(PayID) FROM PAYMENT", 5671),
+    # CanID "C0001" from /api/reservations/<id>/cancel
+    'CANCELLATION': ("SELECT MAX(CAST(SUBSTRING(CanID, 2) AS UNSIGNED)) FROM CANCELLATION WHERE CanID LIKE 'C%'", 1),
+    # Plain numeric CanID "100001" from POST /api/cancellations
+    'CANCELLATION_NUMERIC': ("SELECT MAX(CAST(CanID AS UNSIGNED)) FROM CANCELLATION WHERE CanID NOT LIKE 'C%'", 100001),
+    # RevID "R0001"
+    'REVIEW': ("SELECT MAX(CAST(SUBSTRING(RevID, 2) AS UNSIGNED)) FROM REVIEW WHERE RevID LIKE 'R%'", 1)
+}
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS ID_SEQUENCE (
+        Seq_name VARCHAR(30) NOT NULL,
+        Next_val BIGINT NOT NULL,
+        PRIMARY KEY(Seq_name)
+    )
+"""
+
+
+class IdAllocator:
+    """Hands out primary keys from blocks reserved in the ID_SEQUENCE table.
+
+    Each worker process reserves block_size ids at a time with a single
+    UPDATE on its own short transaction, then serves ids from memory. Ids are
+    unique across processes but not gap-free: ids of a block still unused when
+    the process exits, or used by a rolled-back insert, are skipped.
+
+    Blocks are fetched over `pool`, which should be dedicated to the
+    allocator: callers usually hold a connection of the main pool already,
+    and waiting for a second one from it could exhaust the pool. The lock is
+    not held during a fetch; a block fetched by a thread that lost the race
+    is queued behind the current one, so no ids are wasted.
+    """
+
+    def __init__(self, pool, block_size=50):
+        self.pool = pool
+        self.block_size = block_size
+        self._blocks = {}           # name -> deque of [next id, end of block (exclusive)]
+        self._lock = threading.Lock()
+        self.blocks_fetched = 0
+
+    def _take(self, name):
+        blocks = self._blocks.get(name)
+        while blocks:
+            block = blocks[0]
+            if block[0] < block[1]:
+                block[0] += 1
+                return block[0] - 1
+            blocks.popleft()
+        return None
+
+    def next_id(self, name):
+        while True:
+            with self._lock:
+                value = self._take(name)
+            if value is not None:
+                return value
+            block = self._fetch_block(name)
+            with self._lock:
+                self._blocks.setdefault(name, deque()).append(block)
+                self.blocks_fetched += 1
+
+    def _fetch_block(self, name):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for _ in range(2):
+                    try:
+                        cursor.execute("""
+                            UPDATE ID_SEQUENCE SET Next_val = LAST_INSERT_ID(Next_val + %s)
+                            WHERE Seq_name = %s
+                        """, (self.block_size, name))
+                    except Error as e:
+                        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+                            raise
+                        cursor.execute(CREATE_TABLE)
+                        self._seed(cursor, name)
+                        continue
+                    if cursor.rowcount:
+                        break
+                    self._seed(cursor, name)
+                else:
+                    raise Error(msg=f"Could not initialise id sequence {name}")
+
+                cursor.execute("SELECT LAST_INSERT_ID()")
+                end = cursor.fetchone()[0]
+                connection.commit()
+            finally:
+                cursor.close()
+        return [end - self.block_size, end]
+
+    @staticmethod
+    def _seed(cursor, name):
+        """Start a sequence after the highest id already stored in its table"""
+        max_query, first_id = SEQUENCES[name]
+        cursor.execute(max_query)
+        max_id = cursor.fetchone()[0]
+        next_val = first_id if max_id is None else max(first_id, int(max_id) + 1)
+        # INSERT IGNORE: another process may have seeded the sequence meanwhile
+        cursor.execute("INSERT IGNORE INTO ID_SEQUENCE (Seq_name, Next_val) VALUES (%s, %s)", (name, next_val))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'block_size': self.block_size,
+                'blocks_fetched': self.blocks_fetched,
+                'remaining': {name: sum(block[1] - block[0] for block in blocks)
+                              for name, blocks in self._blocks.items()}
+            }
@@ -0,0 +1,83 @@
+import re
+
+from mysql.connector import Error
+
+from query_monitor import EXPLAINABLE, explain, statement_text
+
+# EXPLAIN access types that read a whole table or a whole index
+FULL_SCANS = {'ALL': 'full table scan', 'index': 'full index scan'}
+
+# Queries on these schemas are diagnostics, not application queries
+SYSTEM_SCHEMAS = re.compile(r'\b(?:information_schema|performance_schema|mysql|sys)\s*\.', re.IGNORECASE)
+
+
+def full_scans(plan):
+    """[(table, access type, rows per scan, possible keys)] of the scans in an EXPLAIN FORMAT=JSON plan"""
+    scans = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            table = node.get('table_name')
+            access = node.get('access_type')
+            if table and access in FULL_SCANS:
+                scans.append((table, access, node.get('rows_examined_per_scan'), node.get('possible_keys')))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    return scans
+
+
+def advise(cursor, examples, min_rows=0):
+    """EXPLAIN one example statement per digest and report those that still scan.
+
+    examples are (digest text, sql, params) tuples, as returned by
+    StatementStats.examples() or from_performance_schema(). Scans estimated
+    below min_rows rows are ignored (small lookup tables are cheaper to scan).
+    """
+    report = []
+    for text, sql, params in examples:
+        if not sql:
+            continue
+        sql = statement_text(sql)
+        words = sql.split(None, 1)
+        if not words or words[0].upper() not in EXPLAINABLE or SYSTEM_SCHEMAS.search(sql):
+            continue
+        try:
+            plan = explain(cursor, sql, params)
+        except (Error, ValueError, TypeError) as e:
+            # Placeholders without parameters (executemany) or a statement
+            # EXPLAIN cannot run on this server version
+            report.append({'query': text, 'error': str(e)})
+            continue
+        scans = [
+            {
+                'table': table,
+                'access': FULL_SCANS[access],
+                'rows_per_scan': rows,
+                'possible_keys': keys
+            }
+            for table, access, rows, keys in full_scans(plan)
+            if rows is None or rows >= min_rows
+        ]
+        if scans:
+            report.append({'query': text, 'scans': scans})
+    return report
+
+
+def from_performance_schema(cursor, database, limit=200):
+    """(digest text, sample statement, None) of the busiest digests MySQL recorded for a schema.
+
+    Covers every client of the database, including all backend worker
+    processes. Needs MySQL 8.0 (QUERY_SAMPLE_TEXT) and performance_schema.
+    """
+    cursor.execute("""
+        SELECT DIGEST_TEXT, QUERY_SAMPLE_TEXT FROM performance_schema.events_statements_summary_by_digest
+        WHERE SCHEMA_NAME = %s AND QUERY_SAMPLE_TEXT IS NOT NULL
+        ORDER BY SUM_TIMER_WAIT DESC
+        LIMIT %s
+    """, (database, limit))
+    return [(text, sample, None) for text, sample in cursor.fetchall()]
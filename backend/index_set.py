@@ -0,0 +1,117 @@
+from mysql.connector import Error, errorcode
+
+# Secondary indexes the backend's queries rely on, mirrored by the "Create
+# indexes" section of database/dbDDL.sql. Bump VERSION whenever this list
+# changes; "flask --app app apply-indexes" brings an existing database up to
+# date and records the version in SCHEMA_VERSION.
+VERSION = 2
+
+# (index name, table, columns, version that added it)
+INDEXES = (
+    # Reservation list, newest first, optionally for one guest; the second
+    # also serves every other lookup by BOOKING.GusID
+    ('IDX_BOOKING_BOOK_DATE', 'BOOKING', ('Book_date', 'BookID'), 1),
+    ('IDX_BOOKING_GUEST_BOOK_DATE', 'BOOKING', ('GusID', 'Book_date', 'BookID'), 1),
+    ('IDX_PAYMENT_BOOKING', 'PAYMENT', ('BookID',), 1),
+    # Stay_len is added by db_scripts/create_stay_length_histogram.sql,
+    # which creates this index too; skipped on databases without the column
+    ('IDX_BOOKING_STAY_LEN', 'BOOKING', ('Stay_len',), 1),
+    # Overlap check of a room's bookings (find_overlapping_booking)
+    ('IDX_BOOKING_ROOM_DATES', 'BOOKING', ('Room_no', 'Check_in', 'Check_out'), 2),
+    ('IDX_CANCELLATION_BOOKING', 'CANCELLATION', ('BookID',), 2),
+    ('IDX_REVIEW_GUEST', 'REVIEW', ('GusID',), 2),
+    # Duplicate e-mail checks on customer create and update
+    ('IDX_GUEST_EMAIL', 'GUEST', ('Email',), 2)
+)
+
+CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS SCHEMA_VERSION (
+        Component VARCHAR(30) NOT NULL,
+        Version INT NOT NULL,
+        PRIMARY KEY(Component)
+    )
+"""
+
+
+def existing(cursor, database):
+    """{(table, index name): columns} of the secondary indexes in the database"""
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND INDEX_NAME <> 'PRIMARY'
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """, (database,))
+    indexes = {}
+    for table, name, column in cursor.fetchall():
+        indexes.setdefault((table, name), []).append(column)
+    return {key: tuple(columns) for key, columns in indexes.items()}
+
+
+def _columns(cursor, database):
+    """{(TABLE, COLUMN)} of the database, upper-cased"""
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+    """, (database,))
+    return {(table.upper(), column.upper()) for table, column in cursor.fetchall()}
+
+
+def _lacking(cursor, database):
+    """(indexes of the set the database lacks, the ones among them over columns it lacks too)"""
+    present = existing(cursor, database)
+    column_sets = {(table, columns) for (table, _), columns in present.items()}
+    available = _columns(cursor, database)
+    lacking, skipped = [], []
+    for index in INDEXES:
+        name, table, columns, _ = index
+        if (table, name) in present or (table, columns) in column_sets:
+            continue
+        if all((table.upper(), column.upper()) in available for column in columns):
+            lacking.append(index)
+        else:
+            skipped.append(index)
+    return lacking, skipped
+
+
+def missing(cursor, database):
+    """Indexes of the set the database lacks; an index with the same columns under another name counts.
+
+    Indexes over columns the database does not have yet are left out: the
+    migration adding the column creates them.
+    """
+    return _lacking(cursor, database)[0]
+
+
+def installed_version(cursor):
+    try:
+        cursor.execute("SELECT Version FROM SCHEMA_VERSION WHERE Component = 'INDEX_SET'")
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return None
+        raise
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def apply(cursor, database):
+    """Create the missing indexes and record VERSION.
+
+    Returns (created index names, [(index name, error)], skipped index
+    names); the version is only recorded when every index could be created.
+    Indexes over columns the database lacks are skipped, and do not hold
+    back the version.
+    """
+    created, failed = [], []
+    lacking, skipped = _lacking(cursor, database)
+    for name, table, columns, _ in lacking:
+        try:
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+            created.append(name)
+        except Error as e:
+            failed.append((name, str(e)))
+    if not failed:
+        cursor.execute(CREATE_VERSION_TABLE)
+        cursor.execute("""
+            INSERT INTO SCHEMA_VERSION (Component, Version) VALUES ('INDEX_SET', %s)
+            ON DUPLICATE KEY UPDATE Version = VALUES(Version)
+        """, (VERSION,))
+    return created, failed, [name for name, _, _, _ in skipped]
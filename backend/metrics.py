@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+from flask import Response, g, jsonify, request
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+    )
+except ImportError:  # optional: pip install prometheus_client
+    CollectorRegistry = None
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+VERBS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CALL', 'SHOW', 'EXPLAIN', 'SET', 'KILL')
+
+
+def multiprocess_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir')
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges; call from the server's child_exit hook.
+
+    gunicorn.conf.py:
+        def child_exit(server, worker):
+            from metrics import mark_process_dead
+            mark_process_dead(worker.pid)
+    """
+    if CollectorRegistry is not None and multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def _verb(sql):
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql[:16].decode('utf-8', 'replace')
+    verb = sql.lstrip(' \t\r\n(').split(None, 1)[0].upper() if sql.strip(' \t\r\n(') else ''
+    return verb if verb in VERBS else 'OTHER'
+
+
+class Metrics:
+    """Prometheus metrics for requests, statements and connection pools.
+
+    Requests are counted and timed per route template (never per URL, so
+    ids do not create new series), statements per leading verb through the
+    QueryMonitor, and pool gauges are refreshed after every request.
+
+    Behind a pre-fork server, set PROMETHEUS_MULTIPROC_DIR to an empty
+    directory shared by the workers before they start: every process then
+    writes its values to memory-mapped files there and /metrics, whichever
+    worker answers it, aggregates all of them. Without prometheus_client
+    installed, nothing is collected and /metrics answers 501.
+    """
+
+    def __init__(self, pools=()):
+        self.pools = list(pools)
+        self.available = CollectorRegistry is not None
+        if not self.available:
+            return
+        self.requests = Counter(
+            'http_requests_total', 'HTTP requests by route and status', ['method', 'route', 'status'])
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'HTTP request latency by route', ['method', 'route'],
+            buckets=REQUEST_BUCKETS)
+        self.queries = Histogram(
+            'db_query_duration_seconds', 'Statement execution time by leading verb', ['verb'],
+            buckets=QUERY_BUCKETS)
+        # livesum: in multiprocess mode, add up the values of running workers
+        self.pool_open = Gauge(
+            'db_pool_connections_open', 'Open pooled connections', ['pool'], multiprocess_mode='livesum')
+        self.pool_in_use = Gauge(
+            'db_pool_connections_in_use', 'Pooled connections checked out', ['pool'], multiprocess_mode='livesum')
+        self.pool_waiting = Gauge(
+            'db_pool_waiting', 'Requests waiting for a pooled connection', ['pool'], multiprocess_mode='livesum')
+        self.pool_timeouts = Counter(
+            'db_pool_timeouts_total', 'Checkouts that timed out waiting for a connection', ['pool'])
+        self._timeouts_seen = {}
+        self._timeouts_lock = threading.Lock()
+
+    def init_app(self, app, monitor=None):
+        if self.available:
+            app.before_request(self._start)
+            app.after_request(self._finish)
+            if monitor is not None:
+                monitor.listeners.append(self)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+    def __call__(self, sql, params, elapsed, cursor):
+        self.queries.labels(_verb(sql)).observe(elapsed)
+
+    def _start(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish(self, response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            self.latency.labels(request.method, route).observe(time.perf_counter() - started)
+            self.requests.labels(request.method, route, str(response.status_code)).inc()
+        self.observe_pools()
+        return response
+
+    def observe_pools(self):
+        for pool in self.pools:
+            stats = pool.stats()
+            self.pool_open.labels(pool.name).set(stats['open'])
+            self.pool_in_use.labels(pool.name).set(stats['in_use'])
+            self.pool_waiting.labels(pool.name).set(stats['waiting'])
+            # Requests observe concurrently; count each pool timeout once
+            with self._timeouts_lock:
+                new_timeouts = stats['timeouts'] - self._timeouts_seen.get(pool.name, 0)
+                if new_timeouts > 0:
+                    self.pool_timeouts.labels(pool.name).inc(new_timeouts)
+                    self._timeouts_seen[pool.name] = stats['timeouts']
+
+    def view(self):
+        if not self.available:
+            return jsonify({"error": "prometheus_client is not installed"}), 501
+        self.observe_pools()
+        if multiprocess_dir():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import date
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for malformed limit or cursor query parameters"""
+
+
+def encode_cursor(*values):
+    """Opaque cursor for the sort key of the last row on a page"""
+    values = [value.isoformat() if isinstance(value, date) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Inverse of encode_cursor; dates come back as 'YYYY-MM-DD' strings"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidPageRequest("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest("Invalid cursor")
+    return values
+
+
+def parse_limit(value, maximum, default=None):
+    """Page size from the query string, capped at maximum"""
+    if value is None or value == '':
+        return default
+    if not value.isdigit() or int(value) == 0:
+        raise InvalidPageRequest("Limit must be a positive integer")
+    return min(int(value), maximum)
+
+
+def descending_after(column, id_column, last_value, last_id):
+    """WHERE condition and params for the rows after a cursor in
+    ORDER BY column DESC, id_column DESC, where column may be NULL.
+
+    MySQL sorts NULLs last in descending order, so rows with a value are
+    followed by all rows without one.
+    """
+    if last_value is None:
+        return f"({column} IS NULL AND {id_column} < %s)", [last_id]
+    return (f"({column} < %s OR ({column} = %s AND {id_column} < %s) OR {column} IS NULL)",
+            [last_value, last_value, last_id])
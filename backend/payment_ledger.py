@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+
+def lock_booking(cursor, book_id):
+    """Lock a booking for a payment and return (total price, paid to date), or None.
+
+    Must run inside the payment's transaction. The row lock on BOOKING
+    serializes concurrent payments (and price changes) for one booking, so
+    the paid-to-date read here stays correct until the payment commits.
+    """
+    cursor.execute("""
+        SELECT B.Total_Price, COALESCE(L.Paid, 0)
+        FROM BOOKING B
+        LEFT JOIN BOOKING_BALANCE L ON L.BookID = B.BookID
+        WHERE B.BookID = %s
+        FOR UPDATE
+    """, (book_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return Decimal(str(row[0] or 0)), Decimal(str(row[1]))
+
+
+def record(cursor, pay_id):
+    """Add a payment row, as stored (Pd_amt is rounded by its column type), to its booking's balance"""
+    cursor.execute("""
+        INSERT INTO BOOKING_BALANCE (BookID, Paid, Payments)
+        SELECT BookID, COALESCE(Pd_amt, 0), 1 FROM PAYMENT
+        WHERE PayID = %s AND BookID IS NOT NULL
+        ON DUPLICATE KEY UPDATE Paid = Paid + VALUES(Paid), Payments = Payments + 1
+    """, (pay_id,))
+
+
+# Ledger rows next to the PAYMENT totals they should equal; the union of
+# both left joins covers bookings missing on either side
+_DRIFT = """
+    SELECT BookID, SUM(Ledger_paid), SUM(Ledger_payments), SUM(Paid), SUM(Payments) FROM (
+        SELECT BookID, Paid AS Ledger_paid, Payments AS Ledger_payments, 0 AS Paid, 0 AS Payments
+        FROM BOOKING_BALANCE
+        UNION ALL
+        SELECT BookID, 0, 0, COALESCE(SUM(Pd_amt), 0), COUNT(*)
+        FROM PAYMENT WHERE BookID IS NOT NULL
+        GROUP BY BookID
+    ) AS BOTH_SIDES
+    GROUP BY BookID
+    HAVING SUM(Ledger_paid) <> SUM(Paid) OR SUM(Ledger_payments) <> SUM(Payments)
+    ORDER BY BookID
+"""
+
+
+def reconcile(cursor, fix=False):
+    """Compare every booking balance with the PAYMENT table in one set-based pass.
+
+    Returns the drifted bookings. With fix=True the balances are then
+    rewritten from PAYMENT; run that inside a transaction while payments
+    are not being taken (or accept that a payment committed meanwhile is
+    reported again next time).
+    """
+    cursor.execute(_DRIFT)
+    drift = [{
+        'booking_id': book_id,
+        'ledger_paid': float(ledger_paid),
+        'ledger_payments': int(ledger_payments),
+        'paid': float(paid),
+        'payments': int(payments)
+    } for book_id, ledger_paid, ledger_payments, paid, payments in cursor.fetchall()]
+    if fix and drift:
+        cursor.execute("""
+            INSERT INTO BOOKING_BALANCE (BookID, Paid, Payments)
+            SELECT BookID, COALESCE(SUM(Pd_amt), 0), COUNT(*) FROM PAYMENT
+            WHERE BookID IS NOT NULL
+            GROUP BY BookID
+            ON DUPLICATE KEY UPDATE Paid = VALUES(Paid), Payments = VALUES(Payments)
+        """)
+        cursor.execute("""
+            DELETE FROM BOOKING_BALANCE
+            WHERE NOT EXISTS (SELECT 1 FROM PAYMENT P WHERE P.BookID = BOOKING_BALANCE.BookID)
+        """)
+    return drift
@@ -0,0 +1,65 @@
+from mysql.connector import Error, errorcode
+
+# Sort name -> (column of PENDING_BALANCE to page on, default direction)
+SORTS = {
+    'balance': ('Remain_bal', 'DESC'),
+    'booking': ('BookID', 'ASC')
+}
+
+# Each booking's latest payment (highest PayID): what PENDING_BALANCE holds,
+# computed from PAYMENT for databases created without that table
+LATEST_PAYMENTS = """
+    SELECT P.BookID, P.PayID, P.GusID, COALESCE(P.Remain_bal, 0) AS Remain_bal
+    FROM PAYMENT P
+    JOIN (SELECT BookID, MAX(PayID) AS PayID FROM PAYMENT WHERE BookID IS NOT NULL GROUP BY BookID) AS LATEST
+    ON LATEST.PayID = P.PayID
+"""
+
+
+def page(cursor, limit, sort='balance', descending=None, after=None):
+    """Up to limit outstanding balances, ordered by sort then BookID.
+
+    PENDING_BALANCE holds one row per booking with payments (kept by the
+    PAYMENT triggers); the Remain_bal index limits the work to bookings
+    that still owe money. Databases without the table (created by
+    setup.py, or not migrated with db_scripts/create_pending_balance.sql)
+    get the same rows computed from PAYMENT. `after` is the (sort value,
+    BookID) of the last row of the previous page.
+    """
+    column, direction = SORTS[sort]
+    if descending is not None:
+        direction = 'DESC' if descending else 'ASC'
+    comparison = '<' if direction == 'DESC' else '>'
+    conditions = ["PB.Remain_bal > 0"]
+    params = []
+    if after is not None:
+        if column == 'BookID':
+            conditions.append(f"PB.BookID {comparison} %s")
+            params.append(after[1])
+        else:
+            conditions.append(f"(PB.{column}, PB.BookID) {comparison} (%s, %s)")
+            params.extend(after)
+    order_by = f"PB.BookID {direction}" if column == 'BookID' else f"PB.{column} {direction}, PB.BookID {direction}"
+    for source in ('PENDING_BALANCE', f"({LATEST_PAYMENTS})"):
+        try:
+            cursor.execute(f"""
+                SELECT PB.PayID, PB.BookID, PB.GusID, B.Total_Price, PB.Remain_bal
+                FROM {source} PB
+                LEFT JOIN BOOKING B ON B.BookID = PB.BookID
+                WHERE {' AND '.join(conditions)}
+                ORDER BY {order_by}
+                LIMIT %s
+            """, params + [limit])
+            return cursor.fetchall()
+        except Error as e:
+            if e.errno != errorcode.ER_NO_SUCH_TABLE or source != 'PENDING_BALANCE':
+                raise
+
+
+def rebuild(cursor):
+    """Refill PENDING_BALANCE from PAYMENT: each booking's latest payment (backfill or repair)"""
+    cursor.execute("DELETE FROM PENDING_BALANCE")
+    cursor.execute(f"INSERT INTO PENDING_BALANCE (BookID, PayID, GusID, Remain_bal) {LATEST_PAYMENTS}")
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(Remain_bal > 0), 0) FROM PENDING_BALANCE")
+    bookings, outstanding = cursor.fetchone()
+    return {'bookings': int(bookings), 'outstanding': int(outstanding)}
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'dbSQL.sql')
+
+# String literals, quoted identifiers and executable comments (/*! */ and
+# optimizer hints /*+ */) are kept verbatim; other comments and runs of
+# whitespace outside them are not significant
+_TOKENS = re.compile(r"""
+    (?P<literal>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`|/\*[!+].*?\*/)
+  | (?P<comment>--(?=\s|$)[^\n]*|\#[^\n]*|/\*.*?\*/)
+  | (?P<space>\s+)
+""", re.VERBOSE | re.DOTALL)
+
+
+def normalize_sql(sql):
+    """SQL text with comments removed, whitespace collapsed and no trailing ';'.
+
+    Only formatting is discarded: literals and identifier case are kept, so
+    two statements with the same normalized text return the same rows.
+    """
+    parts = []
+    position = 0
+    for match in _TOKENS.finditer(sql):
+        if match.start() > position:
+            parts.append(sql[position:match.start()])
+        if match.group('literal'):
+            parts.append(match.group('literal'))
+        elif parts and parts[-1] != ' ':
+            parts.append(' ')
+        position = match.end()
+    parts.append(sql[position:])
+    normalized = ''.join(parts).strip()
+    return normalized.rstrip(';').rstrip()
+
+
+def fingerprint(sql):
+    """Stable key for a statement: hash of its normalized text"""
+    return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class PredefinedQuery:
+    id: int
+    description: str
+    query: str
+    fingerprint: str
+
+    def to_dict(self):
+        return {'id': self.id, 'description': self.description, 'query': self.query, 'fingerprint': self.fingerprint}
+
+
+def parse(content):
+    """SELECT statements of a script, each described by the first line of the
+    comment block right above it"""
+    queries = []
+    comments = []
+    statement = []
+    for line in content.splitlines():
+        stripped = line.strip()
+        if not statement:
+            if stripped.startswith('--'):
+                comments.append(stripped[2:].strip())
+                continue
+            if not stripped:
+                comments = []
+                continue
+        statement.append(line.rstrip())
+        if stripped.endswith(';'):
+            query = '\n'.join(statement).strip()
+            if query.upper().startswith('SELECT'):
+                queries.append(PredefinedQuery(
+                    id=len(queries) + 1,
+                    description=comments[0] if comments else f"Query {len(queries) + 1}",
+                    query=query,
+                    fingerprint=fingerprint(query)
+                ))
+            comments = []
+            statement = []
+    return tuple(queries)
+
+
+class QueryCatalog:
+    """Predefined queries parsed from dbSQL.sql, kept in memory.
+
+    The file is parsed on first use and again only when its modification
+    time changes. Each snapshot is immutable, so a request keeps a consistent
+    view while another one reloads.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.mtime = None
+        self.loads = 0
+        self._queries = ()
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self.mtime is None:
+                raise
+            logger.warning(f"Predefined query file {self.path} is unavailable, serving the last version")
+            return
+        if mtime == self.mtime:
+            return
+        with self._lock:
+            if mtime == self.mtime:
+                return
+            with open(self.path, 'r') as file:
+                queries = parse(file.read())
+            self._queries = queries
+            self.mtime = mtime
+            self.loads += 1
+
+    def queries(self):
+        self._refresh()
+        return self._queries
@@ -0,0 +1,217 @@
+import csv
+import io
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+
+from sql_console import ER_QUERY_INTERRUPTED, ER_QUERY_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobLimitReached(Exception):
+    """Raised when max_concurrent jobs are running and max_queued are waiting"""
+
+
+class QueryJob:
+    """One console query run in the background, with its result rows"""
+
+    def __init__(self, query, budget):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.budget = budget
+        self.state = QUEUED
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.columns = []
+        self.rows = []
+        self.truncated = False
+        self.error = None
+        self.connection_id = None
+        # Guards connection_id while a KILL for it is in flight
+        self.kill_lock = threading.Lock()
+        self.cancel_requested = False
+        self.future = None
+
+    def to_dict(self):
+        end = self.finished or time.time()
+        return {
+            'id': self.id,
+            'state': self.state,
+            'query': self.query,
+            'rowCount': len(self.rows),
+            'truncated': self.truncated,
+            'columns': self.columns,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'elapsedSeconds': round(end - self.started, 3) if self.started else None,
+            'budget': self.budget.to_dict()
+        }
+
+
+class QueryJobManager:
+    """Runs console queries on a small thread pool instead of request threads.
+
+    Jobs use their own connection pool, sized to max_concurrent, and fetch
+    rows in batches so progress (rowCount) is visible while they run.
+    Finished jobs and their rows are kept for retention_seconds. Jobs live
+    in the memory of the worker process that accepted them.
+    """
+
+    def __init__(self, pool, kill_pool, max_concurrent=2, max_queued=10,
+                 retention_seconds=900, batch_size=500):
+        self.pool = pool
+        self.kill_pool = kill_pool
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='query-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    def submit(self, query, budget):
+        job = QueryJob(query, budget)
+        with self._lock:
+            self._purge()
+            active = sum(1 for other in self._jobs.values() if other.state not in FINISHED)
+            if active >= self.max_concurrent + self.max_queued:
+                self.rejected += 1
+                raise JobLimitReached(f"{active} query jobs are already queued or running")
+            self._jobs[job.id] = job
+            self.submitted += 1
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            self._purge()
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def _purge(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _finish(self, job, state, error=None):
+        with self._lock:
+            job.state = state
+            job.error = error
+            job.finished = time.time()
+            job.connection_id = None
+
+    def _run(self, job):
+        with self._lock:
+            if job.cancel_requested:
+                return
+            job.state = RUNNING
+            job.started = time.time()
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    job.budget.apply(cursor)
+                    with job.kill_lock:
+                        if job.cancel_requested:
+                            raise Error(msg="Query job was cancelled", errno=ER_QUERY_INTERRUPTED)
+                        job.connection_id = connection.connection_id
+                    cursor.execute(job.query)
+                    job.columns = [column[0] for column in cursor.description]
+                    limit = job.budget.max_rows
+                    while not job.cancel_requested:
+                        rows = cursor.fetchmany(self.batch_size)
+                        if not rows:
+                            break
+                        job.rows.extend(rows)
+                    if len(job.rows) > limit:
+                        del job.rows[limit:]
+                        job.truncated = True
+                finally:
+                    # Clear the thread id before the connection can be reused;
+                    # this waits for a KILL that cancel() has already started
+                    with job.kill_lock:
+                        job.connection_id = None
+                    try:
+                        cursor.close()
+                    except Error:
+                        pass
+            self._finish(job, CANCELLED if job.cancel_requested else SUCCEEDED)
+        except Error as e:
+            if e.errno == ER_QUERY_INTERRUPTED or job.cancel_requested:
+                self._finish(job, CANCELLED)
+            elif e.errno == ER_QUERY_TIMEOUT:
+                self._finish(job, FAILED, f"Query exceeded the {job.budget.timeout_ms} ms time limit")
+            else:
+                self._finish(job, FAILED, str(e))
+        except Exception as e:
+            logger.exception(f"Query job {job.id} failed")
+            self._finish(job, FAILED, str(e))
+
+    def cancel(self, job_id):
+        """Stop a queued or running job; False if it does not exist or already finished"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED:
+                return False
+            job.cancel_requested = True
+            if job.state == QUEUED and job.future.cancel():
+                job.state = CANCELLED
+                job.finished = time.time()
+                return True
+        # Only the job's own lock is held while waiting for a connection and
+        # the KILL: the job clears connection_id under it before returning
+        # its connection to the pool, so the KILL cannot hit a reused one
+        with job.kill_lock:
+            if job.connection_id is not None:
+                with self.kill_pool.connection() as connection:
+                    cursor = connection.cursor()
+                    cursor.execute(f"KILL QUERY {int(job.connection_id)}")
+                    cursor.close()
+        return True
+
+    def stats(self):
+        with self._lock:
+            states = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'jobs': states
+            }
+
+
+def rows_as_csv(columns, rows, batch_size=500):
+    """Yield a CSV document (header first) in chunks of batch_size rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for start in range(0, len(rows), batch_size):
+        writer.writerows(['' if value is None else value for value in row] for row in rows[start:start + batch_size])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,211 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+
+class InstrumentedCursor:
+    """Cursor proxy that reports every execute() to a QueryMonitor.
+
+    The time measured is the execute call itself; for unbuffered cursors
+    that covers the server's work up to the first row, not the fetches.
+    Rows fetched afterwards are reported through monitor.fetched().
+    """
+
+    def __init__(self, cursor, connection, monitor):
+        self._cursor = cursor
+        self._connection = connection
+        self._monitor = monitor
+        self._statement = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._monitor.fetched(self._statement, 1)
+            yield row
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._monitor.fetched(self._statement, 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._monitor.fetched(self._statement, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._monitor.fetched(self._statement, len(rows))
+        return rows
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._statement = operation
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._monitor.record(operation, params, time.perf_counter() - started, self._cursor)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._statement = operation
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._monitor.record(operation, None, time.perf_counter() - started, self._cursor)
+
+
+class QueryMonitor:
+    """Hands every statement run on an instrumented pool to its listeners.
+
+    Listeners are callables (sql, params, elapsed_seconds, cursor); those
+    with a fetched(sql, count) method also hear about rows fetched. Install
+    with pool.instrument = monitor.wrap. Statements run inside suspended()
+    (the monitor's own diagnostics) are not reported.
+    """
+
+    def __init__(self):
+        self.listeners = []
+        self._local = threading.local()
+
+    def wrap(self, cursor, connection):
+        return InstrumentedCursor(cursor, connection, self)
+
+    @contextmanager
+    def suspended(self):
+        self._local.suspended = True
+        try:
+            yield
+        finally:
+            self._local.suspended = False
+
+    def record(self, sql, params, elapsed, cursor):
+        if getattr(self._local, 'suspended', False):
+            return
+        for listener in self.listeners:
+            try:
+                listener(sql, params, elapsed, cursor)
+            except Exception:
+                logger.exception("Query monitor listener failed")
+
+    def fetched(self, sql, count):
+        if not count or sql is None or getattr(self._local, 'suspended', False):
+            return
+        for listener in self.listeners:
+            fetched = getattr(listener, 'fetched', None)
+            if fetched is None:
+                continue
+            try:
+                fetched(sql, count)
+            except Exception:
+                logger.exception("Query monitor listener failed")
+
+
+def statement_text(sql):
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    return sql.strip()
+
+
+def explain(cursor, sql, params=None):
+    """EXPLAIN FORMAT=JSON plan of a statement as a dict (the statement is not run)"""
+    cursor.execute("EXPLAIN FORMAT=JSON " + statement_text(sql), params)
+    row = cursor.fetchone()
+    return json.loads(row[0] if not isinstance(row, dict) else next(iter(row.values())))
+
+
+def rows_examined(cursor):
+    """Rows the session's previous statement examined, from performance_schema.
+
+    Returns None when performance_schema is disabled or not readable.
+    """
+    try:
+        cursor.execute("""
+            SELECT H.ROWS_EXAMINED FROM performance_schema.events_statements_history H
+            JOIN performance_schema.threads T ON T.THREAD_ID = H.THREAD_ID
+            WHERE T.PROCESSLIST_ID = CONNECTION_ID()
+            ORDER BY H.EVENT_ID DESC
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+    except Error:
+        return None
+    if row is None:
+        return None
+    return int(row[0] if not isinstance(row, dict) else row['ROWS_EXAMINED'])
+
+
+class SlowQueryLog:
+    """Ring buffer of the last `capacity` statements slower than threshold_ms.
+
+    With a plan pool, the EXPLAIN plan of each captured statement is
+    fetched on a background thread over a separate connection, so the
+    request that ran the slow statement is not delayed further.
+    """
+
+    def __init__(self, monitor, threshold_ms=200, capacity=100, plan_pool=None):
+        self.monitor = monitor
+        self.threshold_ms = threshold_ms
+        self.plan_pool = plan_pool
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query-plan') if plan_pool else None
+        self._pending_plans = 0
+        self.captured = 0
+
+    def __call__(self, sql, params, elapsed, cursor):
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        text = statement_text(sql)
+        entry = {
+            'query': text,
+            'elapsed_ms': round(elapsed_ms, 3),
+            'rows': cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None,
+            'time': time.time(),
+            'plan': None
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.captured += 1
+            explain_it = (self._explainer is not None and text.split(None, 1)[0].upper() in EXPLAINABLE
+                          and self._pending_plans < (self._entries.maxlen or 1))
+            if explain_it:
+                self._pending_plans += 1
+        if explain_it:
+            self._explainer.submit(self._capture_plan, entry, text, params)
+
+    def _capture_plan(self, entry, sql, params):
+        try:
+            with self.monitor.suspended(), self.plan_pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    entry['plan'] = explain(cursor, sql, params)
+                finally:
+                    cursor.close()
+        except Exception as e:
+            entry['plan_error'] = str(e)
+        finally:
+            with self._lock:
+                self._pending_plans -= 1
+
+    def entries(self):
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,127 @@
+import logging
+import re
+import time
+
+from flask import g, has_request_context, request
+
+from statement_stats import digest_text
+
+logger = logging.getLogger(__name__)
+
+_DB_TIMING = re.compile(r'(?:^|,)\s*db;dur=([\d.]+);desc="(\d+) quer')
+
+
+class _Usage:
+    __slots__ = ('started', 'queries', 'seconds', 'digests')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.seconds = 0.0
+        self.digests = {}
+
+
+class RequestQueryBudget:
+    """Counts the statements and database time of each request.
+
+    A QueryMonitor listener; statements run outside a request (query jobs,
+    CLI commands, plan capture) are ignored. Every response gets a
+    Server-Timing header, and when a request ends over its route's budget,
+    or runs one statement shape more than repeat_threshold times (the N+1
+    pattern), a warning is logged. The check runs when the request context
+    is torn down, which for a streamed response is as soon as the view
+    returns: it covers the statements the view executed, but not the time
+    spent fetching rows while the body streams.
+    """
+
+    def __init__(self, max_queries, max_db_ms, routes=None, repeat_threshold=None):
+        self.max_queries = max_queries
+        self.max_db_ms = max_db_ms
+        self.routes = routes or {}
+        self.repeat_threshold = repeat_threshold
+        self.over_budget = 0
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._add_header)
+        app.teardown_request(self._check)
+
+    @staticmethod
+    def usage():
+        if not has_request_context():
+            return None
+        usage = g.get('query_usage')
+        if usage is None:
+            usage = g.query_usage = _Usage()
+        return usage
+
+    def __call__(self, sql, params, elapsed, cursor):
+        usage = self.usage()
+        if usage is None:
+            return
+        usage.queries += 1
+        usage.seconds += elapsed
+        if self.repeat_threshold:
+            if isinstance(sql, (bytes, bytearray)):
+                sql = sql.decode('utf-8', 'replace')
+            text = digest_text(sql)
+            usage.digests[text] = usage.digests.get(text, 0) + 1
+
+    def _start(self):
+        g.query_usage = _Usage()
+
+    def _add_header(self, response):
+        usage = g.get('query_usage')
+        if usage is not None:
+            total = (time.perf_counter() - usage.started) * 1000
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={usage.seconds * 1000:.3f};desc="{usage.queries} queries", total;dur={total:.3f}')
+        return response
+
+    def limits(self, endpoint):
+        """(max queries, max db ms) of a route; routes override the defaults"""
+        limits = self.routes.get(endpoint, {})
+        return limits.get('max_queries', self.max_queries), limits.get('max_db_ms', self.max_db_ms)
+
+    def _check(self, exc):
+        usage = g.pop('query_usage', None)
+        if usage is None:
+            return
+        endpoint = request.endpoint
+        max_queries, max_db_ms = self.limits(endpoint)
+        db_ms = usage.seconds * 1000
+        if (max_queries is not None and usage.queries > max_queries) or (max_db_ms is not None and db_ms > max_db_ms):
+            self.over_budget += 1
+            logger.warning(
+                f"{request.method} {request.path} ({endpoint}) over its query budget: "
+                f"{usage.queries} queries (max {max_queries}), {db_ms:.1f} ms in the database (max {max_db_ms})")
+        if self.repeat_threshold:
+            for text, count in usage.digests.items():
+                if count > self.repeat_threshold:
+                    logger.warning(
+                        f"{request.method} {request.path} ({endpoint}) ran the same statement {count} times, "
+                        f"possible N+1: {text[:200]}")
+
+
+def query_count(response):
+    """Number of queries a response's Server-Timing header reports, or None"""
+    match = _DB_TIMING.search(response.headers.get('Server-Timing', ''))
+    return int(match.group(2)) if match else None
+
+
+def assert_max_queries(response, maximum):
+    """Test helper: fail unless the request behind response ran at most maximum queries.
+
+        response = app.test_client().get('/api/statistics')
+        assert_max_queries(response, 6)
+    """
+    count = query_count(response)
+    assert count is not None, "Response has no Server-Timing query count"
+    assert count <= maximum, f"{_request_line(response)} ran {count} queries, expected at most {maximum}"
+
+
+def _request_line(response):
+    environ = getattr(response, 'request', None)
+    environ = getattr(environ, 'environ', {}) if environ is not None else {}
+    return f"{environ.get('REQUEST_METHOD', '')} {environ.get('PATH_INFO', '')}".strip() or "The request"
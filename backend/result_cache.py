@@ -0,0 +1,155 @@
+import re
+import threading
+from collections import OrderedDict
+
+from query_catalog import fingerprint
+from table_versions import TRACKED_TABLES, VIEWS
+
+_LITERALS = re.compile(r"""'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*\"""")
+_TOKENS = re.compile(r"`[^`]*`(?:\.`[^`]*`)?|[\w$]+(?:\.[\w$]+)?|@+\w*|\S")
+
+# Results that depend on more than the table contents
+UNCACHEABLE = {
+    'NOW', 'CURDATE', 'CURTIME', 'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP', 'LOCALTIME',
+    'LOCALTIMESTAMP', 'SYSDATE', 'UTC_DATE', 'UTC_TIME', 'UTC_TIMESTAMP', 'UNIX_TIMESTAMP', 'RAND',
+    'UUID', 'UUID_SHORT', 'CONNECTION_ID', 'USER', 'CURRENT_USER', 'SESSION_USER', 'SYSTEM_USER',
+    'DATABASE', 'SCHEMA', 'LAST_INSERT_ID', 'FOUND_ROWS', 'ROW_COUNT', 'SLEEP', 'BENCHMARK',
+    'GET_LOCK', 'RELEASE_LOCK', 'IS_FREE_LOCK', 'IS_USED_LOCK', 'SQL_NO_CACHE', 'INTO', 'UPDATE', 'SHARE'
+}
+
+# Keywords that end the table list of a FROM clause
+_FROM_END = {'WHERE', 'GROUP', 'HAVING', 'ORDER', 'LIMIT', 'UNION', 'WINDOW', 'ON', 'USING', 'FOR', 'LOCK'}
+
+
+def tables_read(sql, database=None):
+    """Tracked tables a SELECT reads, or None when its result must not be cached.
+
+    A statement is cacheable when every table named after FROM, JOIN,
+    STRAIGHT_JOIN or a comma in a FROM list (parenthesized lists included)
+    is a tracked table or a view over tracked tables, and it calls no time-,
+    session- or lock-dependent function. Tables qualified with a schema
+    other than database are not tracked.
+    """
+    schemas = {'', (database or '').upper()}
+    tokens = [token.strip('`').upper() for token in _TOKENS.findall(_LITERALS.sub("''", sql))]
+    if any(token in UNCACHEABLE or token.startswith('@') for token in tokens):
+        return None
+
+    tables = set()
+    in_from = False         # inside the table list of a FROM clause
+    expect_table = False
+    opened = False          # previous token opened a parenthesis where a table was expected
+    outer = []              # in_from of the enclosing levels of parentheses
+    for token in tokens:
+        if token == '(':
+            outer.append(in_from)
+            # FROM (...) holds either a table list or a derived table, which
+            # checks its own FROM; the next token tells which
+            in_from = opened = expect_table
+            continue
+        if opened:
+            opened = False
+            if token in ('SELECT', 'WITH', 'VALUES', 'TABLE'):
+                in_from = expect_table = False
+        if token == ')':
+            in_from = outer.pop() if outer else False
+            expect_table = False
+            continue
+        if token in ('FROM', 'JOIN', 'STRAIGHT_JOIN'):
+            in_from = expect_table = True
+            continue
+        if token == ',' and in_from:
+            expect_table = True
+            continue
+        if token in _FROM_END:
+            in_from = False
+        if expect_table:
+            expect_table = False
+            schema, _, name = token.rpartition('.')
+            if schema not in schemas:
+                return None
+            if name not in TRACKED_TABLES and name not in VIEWS and name != 'DUAL':
+                return None
+        # Any mention of a tracked table counts, even outside a FROM list
+        name = token.rpartition('.')[2]
+        if name in TRACKED_TABLES:
+            tables.add(name)
+        elif name in VIEWS:
+            tables.update(VIEWS[name])
+    return frozenset(tables)
+
+
+class ResultCache:
+    """Bounded LRU cache of SQL console results.
+
+    Entries are keyed by the statement's fingerprint (see query_catalog.py)
+    and remember the version of every table the statement reads (see
+    table_versions.py). A lookup with newer versions is a miss and drops the
+    entry, so a cached result is never older than the last committed write
+    to its tables.
+    """
+
+    def __init__(self, max_entries=128, max_rows=5000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries = OrderedDict()      # fingerprint -> (versions, columns, rows)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(sql):
+        return fingerprint(sql)
+
+    def get(self, key, versions):
+        """(columns, rows) cached for key at these table versions, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != versions:
+                del self._entries[key]
+                self.invalidated += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key, versions, columns, rows):
+        """Store a result; rows must not be modified afterwards"""
+        if len(rows) > self.max_rows:
+            return False
+        with self._lock:
+            self._entries[key] = (versions, columns, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+        return True
+
+    def bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'max_rows': self.max_rows,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'bypassed': self.bypassed,
+                'invalidated': self.invalidated,
+                'evicted': self.evicted
+            }
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import table_versions
+from db_mapper import row_mapper
+
+
+class RoomCatalog:
+    """Per-process copy of the ROOM table for the room list and detail endpoints.
+
+    The copy is reloaded when the ROOM version in TABLE_VERSION changes (read
+    at most every check_seconds, so another process's write shows up within
+    that delay) and unconditionally after ttl_seconds. Returned room dicts are
+    shared between requests and must not be modified.
+    """
+
+    QUERY = "SELECT * FROM ROOM ORDER BY Room_no"
+
+    def __init__(self, ttl_seconds=300, check_seconds=5):
+        self.ttl_seconds = ttl_seconds
+        self.check_seconds = check_seconds
+        self.version = None
+        self.loaded_at = None
+        self.checked_at = None
+        self._rooms = []
+        self._by_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.version_checks = 0
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def load(self, cursor):
+        # Read the version first: a write landing between the two queries
+        # then only causes one extra reload instead of a stale catalog
+        versions = table_versions.current(cursor, ['ROOM'])
+        cursor.execute(self.QUERY)
+        map_room = row_mapper('ROOM', cursor)
+        rooms = [map_room(row) for row in cursor.fetchall()]
+        with self._lock:
+            self._rooms = rooms
+            self._by_id = {room['id']: room for room in rooms}
+            self.version = versions and versions['ROOM']
+            self.loaded_at = self.checked_at = time.monotonic()
+
+    def _refresh(self, cursor):
+        """Reload if the copy expired or ROOM changed; returns True on a cache hit"""
+        now = time.monotonic()
+        if self.loaded_at is None or now - self.loaded_at >= self.ttl_seconds:
+            self.load(cursor)
+            return False
+        if now - self.checked_at >= self.check_seconds:
+            self.version_checks += 1
+            versions = table_versions.current(cursor, ['ROOM'])
+            if (versions and versions['ROOM']) != self.version:
+                self.load(cursor)
+                return False
+            self.checked_at = now
+        return True
+
+    def rooms(self, cursor):
+        """Every room, ordered by room number"""
+        self._count(self._refresh(cursor))
+        return self._rooms
+
+    def get(self, cursor, room_id):
+        """One room by number, or None"""
+        self._count(self._refresh(cursor))
+        return self._by_id.get(room_id)
+
+    def invalidate(self):
+        with self._lock:
+            self.loaded_at = None
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'loaded': self.loaded,
+                'rooms': len(self._rooms),
+                'version': self.version,
+                'age_seconds': round(time.monotonic() - self.loaded_at, 1) if self.loaded else None,
+                'ttl_seconds': self.ttl_seconds,
+                'check_seconds': self.check_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'version_checks': self.version_checks
+            }
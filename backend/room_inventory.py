@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from mysql.connector import errorcode
+from mysql.connector.errors import IntegrityError
+
+from availability import to_date
+
+
+class RoomAlreadyBooked(Exception):
+    """Raised when a ROOM_NIGHT row for one of the requested nights already exists"""
+
+
+def nights(check_in, check_out):
+    """Days a stay holds the room: check_in through check_out, both included.
+
+    This is the overlap rule of find_overlapping_booking() and of the
+    availability index (a stay checking in on another's check-out day
+    conflicts with it), so the three modes accept the same bookings.
+    """
+    check_in, check_out = to_date(check_in), to_date(check_out)
+    return [check_in + timedelta(days=offset) for offset in range((check_out - check_in).days + 1)]
+
+
+def reserve(cursor, book_id, room_no, check_in, check_out):
+    """Claim every night of the stay for a booking.
+
+    Must run inside the booking's transaction. The (Room_no, Night) primary
+    key makes MySQL reject a second claim on the same night, so concurrent
+    requests for the same room cannot both succeed.
+    """
+    rows = [(room_no, night, book_id) for night in nights(check_in, check_out)]
+    if not rows:
+        return
+    try:
+        cursor.executemany(
+            "INSERT INTO ROOM_NIGHT (Room_no, Night, BookID) VALUES (%s, %s, %s)", rows)
+    except IntegrityError as e:
+        if e.errno == errorcode.ER_DUP_ENTRY:
+            raise RoomAlreadyBooked(f"Room {room_no} is already booked between {check_in} and {check_out}")
+        raise
+
+
+def release(cursor, book_id):
+    """Free every night held by a booking (cancel, delete, or before a move)"""
+    cursor.execute("DELETE FROM ROOM_NIGHT WHERE BookID = %s", (book_id,))
+
+
+def is_available(cursor, room_no, check_in, check_out):
+    """Primary-key range lookup: is any day of the stay already taken?"""
+    cursor.execute("""
+        SELECT BookID FROM ROOM_NIGHT
+        WHERE Room_no = %s AND Night >= %s AND Night <= %s
+        LIMIT 1
+    """, (room_no, check_in, check_out))
+    return cursor.fetchone() is None
+
+
+def rebuild(cursor):
+    """Refill ROOM_NIGHT from BOOKING (backfill when enabling the inventory mode).
+
+    Cancelled bookings (Room_no 0) hold no nights. Returns the number of
+    nights written and the bookings whose nights clashed with an earlier
+    booking of the same room, which need to be resolved by hand.
+    """
+    cursor.execute("DELETE FROM ROOM_NIGHT")
+    cursor.execute("""
+        SELECT BookID, Room_no, Check_in, Check_out FROM BOOKING
+        WHERE Room_no IS NOT NULL AND Room_no <> 0
+        AND Check_in IS NOT NULL AND Check_out IS NOT NULL
+        ORDER BY Book_date, BookID
+    """)
+    taken = {}
+    for book_id, room_no, check_in, check_out in cursor.fetchall():
+        for night in nights(check_in, check_out):
+            taken.setdefault((room_no, night), []).append(book_id)
+
+    rows = [(room_no, night, book_ids[0]) for (room_no, night), book_ids in taken.items()]
+    conflicts = sorted({book_id for book_ids in taken.values() for book_id in book_ids[1:]})
+    batch_size = 1000
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(
+            "INSERT INTO ROOM_NIGHT (Room_no, Night, BookID) VALUES (%s, %s, %s)",
+            rows[start:start + batch_size])
+    return {'nights': len(rows), 'conflicting_bookings': conflicts}
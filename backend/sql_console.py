@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+
+# MySQL errors raised when a statement is stopped
+ER_QUERY_INTERRUPTED = 1317        # KILL QUERY
+ER_QUERY_TIMEOUT = 3024            # MAX_EXECUTION_TIME exceeded
+
+
+class ConsoleRequestError(ValueError):
+    """Raised for invalid console request parameters (budget or query id)"""
+
+
+def _bounded(value, name, maximum):
+    if value is None:
+        return maximum
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit() or int(value) == 0:
+        raise ConsoleRequestError(f"{name} must be a positive integer")
+    return min(int(value), maximum)
+
+
+class Budget:
+    """Row cap and statement timeout of one console query.
+
+    Requests may ask for less than the configured limits but never more.
+    """
+
+    def __init__(self, max_rows, timeout_ms):
+        self.max_rows = max_rows
+        self.timeout_ms = timeout_ms
+
+    @classmethod
+    def from_request(cls, data, max_rows, timeout_ms):
+        return cls(_bounded(data.get('maxRows'), 'maxRows', max_rows),
+                   _bounded(data.get('timeoutMs'), 'timeoutMs', timeout_ms))
+
+    def apply(self, cursor, streaming=False):
+        """Enforce the budget on the server for the session's next statements.
+
+        SQL_SELECT_LIMIT caps the rows the outermost SELECT returns without
+        rewriting the statement; one extra row is requested so a truncated
+        result can be told apart from one that fits exactly. Apply it right
+        before the user's statement: both settings stay in force for the
+        rest of the session, until the console pool resets it when the
+        connection is returned (see db_pool.py).
+        """
+        limit = self.max_rows if streaming else self.max_rows + 1
+        cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s, SQL_SELECT_LIMIT = %s", (self.timeout_ms, limit))
+
+    def to_dict(self):
+        return {'maxRows': self.max_rows, 'timeoutMs': self.timeout_ms}
+
+
+class RunningQueries:
+    """Console statements currently executing, so they can be cancelled.
+
+    Each entry maps a query id to the MySQL thread id of the connection
+    running it. An entry is removed before its connection goes back to the
+    pool, so KILL QUERY never reaches a statement of a later request.
+    """
+
+    def __init__(self):
+        self._running = {}
+        self._lock = threading.Lock()
+        self.cancelled = 0
+
+    def start(self, connection_id, sql, query_id=None):
+        query_id = str(query_id) if query_id else uuid.uuid4().hex
+        with self._lock:
+            if query_id in self._running:
+                raise ConsoleRequestError(f"Query id {query_id} is already running")
+            self._running[query_id] = {
+                'connection_id': connection_id,
+                'query': sql,
+                'started': time.time()
+            }
+        return query_id
+
+    def finish(self, query_id):
+        with self._lock:
+            self._running.pop(query_id, None)
+
+    def cancel(self, query_id, kill):
+        """Run kill(connection_id) for a running query; False if it is not running.
+
+        The lock is held while killing so the query cannot finish and hand
+        its connection to another request in between.
+        """
+        with self._lock:
+            entry = self._running.get(query_id)
+            if entry is None:
+                return False
+            kill(entry['connection_id'])
+            self.cancelled += 1
+            return True
+
+    def list(self):
+        now = time.time()
+        with self._lock:
+            return [
+                {'id': query_id, 'query': entry['query'], 'connection_id': entry['connection_id'],
+                 'running_seconds': round(now - entry['started'], 3)}
+                for query_id, entry in self._running.items()
+            ]
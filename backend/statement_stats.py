@@ -0,0 +1,140 @@
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from query_catalog import normalize_sql
+
+_LITERALS = re.compile(r"""
+    '(?:[^'\\]|\\.|'')*'                # 'string'
+  | "(?:[^"\\]|\\.|"")*"                # "string"
+  | %\(\w+\)s | %s                      # driver placeholders
+  | \b0x[0-9a-fA-F]+\b
+  | (?<![\w`.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b
+""", re.VERBOSE)
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+
+@lru_cache(maxsize=4096)
+def digest_text(sql):
+    """Statement with every literal and placeholder replaced by '?'.
+
+    Value lists collapse to (...) and multi-row VALUES to one row, so
+    "IN (1, 2)" and "IN (3, 4, 5)" share a digest, like pg_stat_statements.
+    """
+    text = _LITERALS.sub('?', normalize_sql(sql))
+    text = _LISTS.sub('(...)', text)
+    return _ROWS.sub('(...)', text)
+
+
+def digest(sql):
+    return hashlib.sha1(digest_text(sql).encode('utf-8')).hexdigest()[:16]
+
+
+class _Digest:
+    __slots__ = ('text', 'calls', 'total', 'min', 'max', 'rows', 'samples', 'first_seen', 'last_seen',
+                 'example_sql', 'example_params')
+
+    def __init__(self, text, samples):
+        self.text = text
+        self.calls = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=samples)
+        self.first_seen = self.last_seen = time.time()
+        self.example_sql = None
+        self.example_params = None
+
+
+class StatementStats:
+    """Per-digest execution statistics of every statement the backend runs.
+
+    A QueryMonitor listener: calls, total/mean/min/max/p95 execution time
+    and rows (fetched for SELECTs, affected for writes) are accumulated per
+    digest. p95 comes from the last `samples` timings of each digest. At
+    max_digests, the least-called digest is evicted to make room.
+    """
+
+    def __init__(self, max_digests=500, samples=1000):
+        self.max_digests = max_digests
+        self.sample_size = samples
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.reset_at = time.time()
+        self.evicted = 0
+
+    def _entry(self, sql):
+        text = digest_text(sql)
+        entry = self._digests.get(text)
+        if entry is None:
+            if len(self._digests) >= self.max_digests:
+                least = min(self._digests, key=lambda key: self._digests[key].calls)
+                del self._digests[least]
+                self.evicted += 1
+            entry = self._digests[text] = _Digest(text, self.sample_size)
+        return entry
+
+    def __call__(self, sql, params, elapsed, cursor):
+        if isinstance(sql, (bytes, bytearray)):
+            sql = sql.decode('utf-8', 'replace')
+        # Writes report affected rows now; SELECT rows are counted as fetched
+        affected = cursor.rowcount if cursor.description is None and cursor.rowcount and cursor.rowcount > 0 else 0
+        with self._lock:
+            entry = self._entry(sql)
+            entry.calls += 1
+            entry.total += elapsed
+            entry.min = elapsed if entry.min is None else min(entry.min, elapsed)
+            entry.max = max(entry.max, elapsed)
+            entry.rows += affected
+            entry.samples.append(elapsed)
+            entry.last_seen = time.time()
+            entry.example_sql = sql
+            entry.example_params = params
+
+    def fetched(self, sql, count):
+        if isinstance(sql, (bytes, bytearray)):
+            sql = sql.decode('utf-8', 'replace')
+        with self._lock:
+            entry = self._digests.get(digest_text(sql))
+            if entry is not None:
+                entry.rows += count
+
+    def reset(self):
+        with self._lock:
+            self._digests.clear()
+            self.reset_at = time.time()
+            self.evicted = 0
+
+    def examples(self):
+        """(digest text, example sql, example params) per digest, for replaying"""
+        with self._lock:
+            return [(entry.text, entry.example_sql, entry.example_params) for entry in self._digests.values()]
+
+    def snapshot(self, order_by='total', limit=None):
+        with self._lock:
+            rows = []
+            for entry in self._digests.values():
+                samples = sorted(entry.samples)
+                p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else None
+                rows.append({
+                    'digest': hashlib.sha1(entry.text.encode('utf-8')).hexdigest()[:16],
+                    'query': entry.text,
+                    'calls': entry.calls,
+                    'total_ms': round(entry.total * 1000, 3),
+                    'mean_ms': round(entry.total / entry.calls * 1000, 3) if entry.calls else None,
+                    'min_ms': round(entry.min * 1000, 3) if entry.min is not None else None,
+                    'max_ms': round(entry.max * 1000, 3),
+                    'p95_ms': round(p95 * 1000, 3) if p95 is not None else None,
+                    'rows': entry.rows,
+                    'rows_per_call': round(entry.rows / entry.calls, 2) if entry.calls else None,
+                    'first_seen': entry.first_seen,
+                    'last_seen': entry.last_seen
+                })
+        key = {'total': 'total_ms', 'mean': 'mean_ms', 'p95': 'p95_ms', 'calls': 'calls', 'rows': 'rows'}[order_by]
+        rows.sort(key=lambda row: row[key] or 0, reverse=True)
+        return rows[:limit] if limit else rows
@@ -0,0 +1,123 @@
+from datetime import date
+from decimal import Decimal
+
+from availability import to_date
+
+TOTAL = 'ALL'
+
+COLUMNS = ('Bookings', 'Revenue', 'Guests', 'Cancellations', 'Ratings', 'Rating_sum')
+
+UPSERT = f"""
+    INSERT INTO STATS_SUMMARY (Bucket, Slot, {', '.join(COLUMNS)})
+    VALUES (%s, MOD(CONNECTION_ID(), %s), {', '.join(['%s'] * len(COLUMNS))})
+    ON DUPLICATE KEY UPDATE {', '.join(f'{column} = {column} + VALUES({column})' for column in COLUMNS)}
+"""
+
+
+def month_bucket(value):
+    return to_date(value).strftime('%Y-%m')
+
+
+def months_back(today, months):
+    """'YYYY-MM' of the month that lies the given number of months before today"""
+    index = today.year * 12 + today.month - 1 - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class StatsSummary:
+    """Dashboard counters kept in STATS_SUMMARY by the write endpoints.
+
+    Bucket 'ALL' holds the totals and one 'YYYY-MM' bucket per booking month
+    holds that month's bookings and revenue. Every counter is split over
+    `slots` rows picked by connection id, so concurrent transactions do not
+    queue on a single hot row while one transaction always uses the same
+    row (no lock-order deadlocks); readers add the slots up.
+
+    The record methods must run inside the transaction of the write they
+    count, so a rollback discards both.
+    """
+
+    def __init__(self, slots=8):
+        self.slots = slots
+
+    def _add(self, cursor, rows):
+        cursor.executemany(UPSERT, [
+            (bucket, self.slots) + tuple(changes.get(column, 0) for column in COLUMNS)
+            for bucket, changes in rows
+        ])
+
+    def record_booking(self, cursor, book_date, total_price, sign=1):
+        """Count a new booking (sign=-1 for a deleted one)"""
+        changes = {'Bookings': sign, 'Revenue': sign * Decimal(str(total_price or 0))}
+        rows = [(TOTAL, changes)]
+        if book_date:
+            rows.append((month_bucket(book_date), changes))
+        self._add(cursor, rows)
+
+    def record_price_change(self, cursor, book_date, old_price, new_price):
+        delta = Decimal(str(new_price or 0)) - Decimal(str(old_price or 0))
+        if delta:
+            rows = [(TOTAL, {'Revenue': delta})]
+            if book_date:
+                rows.append((month_bucket(book_date), {'Revenue': delta}))
+            self._add(cursor, rows)
+
+    def record_guest(self, cursor):
+        self._add(cursor, [(TOTAL, {'Guests': 1})])
+
+    def record_cancellation(self, cursor):
+        self._add(cursor, [(TOTAL, {'Cancellations': 1})])
+
+    def record_review(self, cursor, rating):
+        if rating is not None:
+            self._add(cursor, [(TOTAL, {'Ratings': 1, 'Rating_sum': int(rating)})])
+
+    def read(self, cursor, months=6, today=None):
+        """Dashboard figures from one primary-key range read"""
+        first_month = months_back(today or date.today(), months)
+        cursor.execute(f"""
+            SELECT Bucket, {', '.join(f'SUM({column})' for column in COLUMNS)}
+            FROM STATS_SUMMARY
+            WHERE Bucket = %s OR Bucket >= %s
+            GROUP BY Bucket
+        """, (TOTAL, first_month))
+        buckets = {row[0]: dict(zip(COLUMNS, row[1:])) for row in cursor.fetchall()}
+        totals = buckets.pop(TOTAL, dict.fromkeys(COLUMNS, 0))
+        return {
+            'total_bookings': int(totals['Bookings'] or 0),
+            'total_guests': int(totals['Guests'] or 0),
+            'total_revenue': float(totals['Revenue'] or 0),
+            'total_cancellations': int(totals['Cancellations'] or 0),
+            'average_rating': float(totals['Rating_sum'] / totals['Ratings']) if totals['Ratings'] else 0,
+            'bookings_by_month': {
+                month: int(values['Bookings']) for month, values in sorted(buckets.items()) if values['Bookings']
+            }
+        }
+
+    @staticmethod
+    def rebuild(cursor):
+        """Recount STATS_SUMMARY from the base tables (backfill or repair).
+
+        Run it while the API is not writing: writes committed during the
+        rebuild can be counted twice or not at all.
+        """
+        cursor.execute("DELETE FROM STATS_SUMMARY")
+        cursor.execute(f"""
+            INSERT INTO STATS_SUMMARY (Bucket, Slot, {', '.join(COLUMNS)})
+            SELECT '{TOTAL}', 0,
+                (SELECT COUNT(*) FROM BOOKING),
+                (SELECT COALESCE(SUM(Total_Price), 0) FROM BOOKING),
+                (SELECT COUNT(*) FROM GUEST),
+                (SELECT COUNT(*) FROM CANCELLATION),
+                (SELECT COUNT(Rating) FROM REVIEW),
+                (SELECT COALESCE(SUM(Rating), 0) FROM REVIEW)
+        """)
+        cursor.execute(f"""
+            INSERT INTO STATS_SUMMARY (Bucket, Slot, {', '.join(COLUMNS)})
+            SELECT DATE_FORMAT(Book_date, '%Y-%m'), 0, COUNT(*), COALESCE(SUM(Total_Price), 0), 0, 0, 0, 0
+            FROM BOOKING
+            WHERE Book_date IS NOT NULL
+            GROUP BY DATE_FORMAT(Book_date, '%Y-%m')
+        """)
+        cursor.execute("SELECT COUNT(*) FROM STATS_SUMMARY")
+        return cursor.fetchone()[0]
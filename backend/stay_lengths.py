@@ -0,0 +1,115 @@
+from mysql.connector import Error, errorcode
+
+# Expression for the length of stay, best first: the indexed generated
+# column, the STAY_LEN stored function (one call per row), plain DATEDIFF
+LENGTH_COLUMN = 'Stay_len'
+LENGTH_FUNCTION = 'STAY_LEN(Check_in, Check_out)'
+LENGTH_INLINE = 'DATEDIFF(Check_out, Check_in)'
+
+# Rows per stay length; a transaction updates the slot of its connection
+SLOTS = 8
+
+
+class StayLengths:
+    """Length-of-stay listing and histogram over BOOKING.
+
+    probe() looks up once which schema features the database has (the
+    STAY_LEN function, the BOOKING.Stay_len generated column, the
+    STAY_LENGTH_HISTOGRAM table kept by triggers) and later queries use the
+    best one available, so the endpoint does no per-request checking.
+    """
+
+    def __init__(self):
+        self.capabilities = None
+
+    def probe(self, cursor, database):
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM information_schema.ROUTINES
+                 WHERE ROUTINE_SCHEMA = %s AND ROUTINE_NAME = 'STAY_LEN' AND ROUTINE_TYPE = 'FUNCTION'),
+                (SELECT COUNT(*) FROM information_schema.COLUMNS
+                 WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'BOOKING' AND COLUMN_NAME = 'Stay_len'),
+                (SELECT COUNT(*) FROM information_schema.TABLES
+                 WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'STAY_LENGTH_HISTOGRAM')
+        """, (database, database, database))
+        function, column, histogram = (bool(value) for value in cursor.fetchone())
+        self.capabilities = {
+            'function_exists': function,
+            'stay_len_column': column,
+            'histogram_table': histogram
+        }
+        return self.capabilities
+
+    def length_expression(self):
+        if self.capabilities['stay_len_column']:
+            return LENGTH_COLUMN
+        if self.capabilities['function_exists']:
+            return LENGTH_FUNCTION
+        return LENGTH_INLINE
+
+    def page(self, cursor, limit, after=None, book_id=None, min_days=None, max_days=None):
+        """Up to limit {BookID, No_of_days} rows in BookID order, after BookID `after`"""
+        length = self.length_expression()
+        conditions = ["Check_in IS NOT NULL", "Check_out IS NOT NULL"]
+        params = []
+        if book_id is not None:
+            conditions.append("BookID = %s")
+            params.append(book_id)
+        if after is not None:
+            conditions.append("BookID > %s")
+            params.append(after)
+        # With the Stay_len column these use its index
+        if min_days is not None:
+            conditions.append(f"{length} >= %s")
+            params.append(min_days)
+        if max_days is not None:
+            conditions.append(f"{length} <= %s")
+            params.append(max_days)
+        cursor.execute(f"""
+            SELECT BookID, {length} AS No_of_days FROM BOOKING
+            WHERE {' AND '.join(conditions)}
+            ORDER BY BookID
+            LIMIT %s
+        """, params + [limit])
+        return [{'BookID': book_id, 'No_of_days': days} for book_id, days in cursor.fetchall()]
+
+    def histogram(self, cursor):
+        """[(days, bookings)] in days order; read from the precomputed table when it exists"""
+        if self.capabilities['histogram_table']:
+            cursor.execute("""
+                SELECT Stay_len, SUM(Bookings) FROM STAY_LENGTH_HISTOGRAM
+                GROUP BY Stay_len
+                HAVING SUM(Bookings) <> 0
+                ORDER BY Stay_len
+            """)
+        else:
+            length = self.length_expression()
+            cursor.execute(f"""
+                SELECT {length}, COUNT(*) FROM BOOKING
+                WHERE Check_in IS NOT NULL AND Check_out IS NOT NULL
+                GROUP BY {length}
+                ORDER BY {length}
+            """)
+        return [(int(days), int(bookings)) for days, bookings in cursor.fetchall()]
+
+    @staticmethod
+    def rebuild(cursor):
+        """Recount STAY_LENGTH_HISTOGRAM from BOOKING (backfill or repair).
+
+        Run it while the API is not writing bookings.
+        """
+        cursor.execute("DELETE FROM STAY_LENGTH_HISTOGRAM")
+        cursor.execute(f"""
+            INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+            SELECT {LENGTH_INLINE}, 0, COUNT(*) FROM BOOKING
+            WHERE Check_in IS NOT NULL AND Check_out IS NOT NULL
+            GROUP BY {LENGTH_INLINE}
+        """)
+        cursor.execute("SELECT COUNT(*) FROM STAY_LENGTH_HISTOGRAM")
+        return cursor.fetchone()[0]
+
+
+def is_missing_feature(error):
+    """Whether a query failed because the schema no longer matches the probe"""
+    return isinstance(error, Error) and error.errno in (
+        errorcode.ER_BAD_FIELD_ERROR, errorcode.ER_NO_SUCH_TABLE, errorcode.ER_SP_DOES_NOT_EXIST)
@@ -0,0 +1,85 @@
+import logging
+
+from flask import Response, current_app, request, stream_with_context
+from mysql.connector import Error
+
+NDJSON = 'application/x-ndjson'
+JSON_STREAM = 'application/stream+json'
+
+logger = logging.getLogger(__name__)
+
+
+def stream_mode():
+    """Streaming format requested through the Accept header, or None.
+
+    Accept: application/x-ndjson     -> one JSON document per line
+    Accept: application/stream+json  -> the usual JSON body, sent in chunks
+    Anything else keeps the buffered jsonify() response.
+    """
+    best = request.accept_mimetypes.best_match([NDJSON, JSON_STREAM, 'application/json'])
+    if best in (NDJSON, JSON_STREAM) and request.accept_mimetypes[best] > request.accept_mimetypes['application/json']:
+        return best
+    return None
+
+
+def _close(cursor):
+    # An unbuffered cursor abandoned mid-result cannot be closed cleanly; the
+    # pool then discards the connection instead of reusing it
+    try:
+        cursor.close()
+    except Error:
+        pass
+
+
+def stream_rows(cursor, mapper, mode, batch_size=500, head='[', tail=lambda count: ']', on_close=None):
+    """Stream an executed cursor's rows through mapper without buffering them.
+
+    Rows are pulled with fetchmany(batch_size), so memory stays bounded by
+    one batch and the first bytes leave before MySQL has sent the last row.
+    For the chunked JSON mode, head and tail(count) wrap the row array, which
+    lets endpoints keep their usual response envelope.
+
+    The app context is torn down as soon as the view returns, before the
+    body is generated, so the cursor's connection must not be left for the
+    teardown handlers to release. on_close() is called once the response is
+    closed, after the cursor, and should hand the connection back.
+    """
+    dumps = current_app.json.dumps
+
+    def generate_ndjson():
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield ''.join(dumps(mapper(row)) + '\n' for row in rows)
+        except Error as e:
+            logger.error(f"Streaming response aborted: {e}")
+            yield dumps({"error": str(e)}) + '\n'
+
+    def generate_array():
+        count = 0
+        try:
+            yield head
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                chunk = ','.join(dumps(mapper(row)) for row in rows)
+                yield (',' + chunk) if count else chunk
+                count += len(rows)
+            yield tail(count)
+        except Error as e:
+            # Headers are already sent; a truncated body is the failure signal
+            logger.error(f"Streaming response aborted after {count} rows: {e}")
+
+    def close():
+        # Runs even when the body was never iterated (client went away)
+        _close(cursor)
+        if on_close is not None:
+            on_close()
+
+    generate = generate_ndjson if mode == NDJSON else generate_array
+    response = Response(stream_with_context(generate()), mimetype=mode if mode == NDJSON else 'application/json')
+    response.call_on_close(close)
+    return response
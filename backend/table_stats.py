@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+
+import table_versions
+
+logger = logging.getLogger(__name__)
+
+
+class TableStats:
+    """Row counts of the application tables, cheap by default.
+
+    approximate() reads TABLE_ROWS from information_schema (InnoDB's sampled
+    estimate, itself cached by MySQL for information_schema_stats_expiry
+    seconds) and is cached here for approximate_ttl seconds. exact() runs
+    SELECT COUNT(*) only on demand: a table never counted is counted on the
+    spot, a count older than ttl is served as it is while a background
+    thread recounts it. A recount is skipped when TABLE_VERSION shows the
+    table has not been written since the last count.
+    """
+
+    def __init__(self, pool, database, tables, ttl=300, approximate_ttl=60):
+        self.pool = pool
+        self.database = database
+        self.tables = tuple(tables)
+        self.ttl = ttl
+        self.approximate_ttl = approximate_ttl
+        self._approximate = None        # (loaded at, {table: rows})
+        self._exact = {}                # table -> {'count', 'counted_at', 'version'}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='table-stats')
+        self.counts_run = 0
+
+    def approximate(self, cursor):
+        with self._lock:
+            if self._approximate is not None and time.monotonic() - self._approximate[0] < self.approximate_ttl:
+                return dict(self._approximate[1])
+        cursor.execute(f"""
+            SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({', '.join(['%s'] * len(self.tables))})
+        """, (self.database,) + self.tables)
+        rows = {name: int(count or 0) for name, count in cursor.fetchall()}
+        with self._lock:
+            self._approximate = (time.monotonic(), rows)
+        return dict(rows)
+
+    def exact(self, cursor, tables=None):
+        """{table: {'count', 'age_seconds', 'refreshing'}}; cursor counts tables never counted yet.
+
+        A table that cannot be counted (missing, or not readable) gets
+        {'error': message} instead, without affecting the other tables.
+        """
+        result = {}
+        for table in tables or self.tables:
+            with self._lock:
+                entry = self._exact.get(table)
+                stale = entry is not None and time.monotonic() - entry['counted_at'] >= self.ttl
+                if stale and table not in self._refreshing:
+                    self._refreshing.add(table)
+                    self._refresher.submit(self._refresh, table)
+            if entry is None:
+                try:
+                    entry = self._count(cursor, table)
+                except Error as e:
+                    result[table] = {'error': str(e)}
+                    continue
+            result[table] = {
+                'count': entry['count'],
+                'age_seconds': round(time.monotonic() - entry['counted_at'], 1),
+                'refreshing': table in self._refreshing
+            }
+        return result
+
+    def _count(self, cursor, table):
+        version = table_versions.current(cursor, [table])
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        entry = {'count': cursor.fetchone()[0], 'counted_at': time.monotonic(), 'version': version}
+        with self._lock:
+            self._exact[table] = entry
+            self.counts_run += 1
+        return entry
+
+    def _refresh(self, table):
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    version = table_versions.current(cursor, [table])
+                    with self._lock:
+                        entry = self._exact.get(table)
+                    if entry is not None and version is not None and version == entry['version']:
+                        # Nothing written since the last count: it is still exact
+                        with self._lock:
+                            entry['counted_at'] = time.monotonic()
+                    else:
+                        self._count(cursor, table)
+                finally:
+                    cursor.close()
+        except Error as e:
+            logger.warning(f"Could not recount {table}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(table)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'ttl_seconds': self.ttl,
+                'approximate_ttl_seconds': self.approximate_ttl,
+                'approximate_age_seconds': round(now - self._approximate[0], 1) if self._approximate else None,
+                'exact': {
+                    table: {'count': entry['count'], 'age_seconds': round(now - entry['counted_at'], 1)}
+                    for table, entry in self._exact.items()
+                },
+                'refreshing': sorted(self._refreshing),
+                'counts_run': self.counts_run
+            }
@@ -0,0 +1,94 @@
+from mysql.connector import Error, errorcode
+
+# Base tables whose writes are counted by the *_VERSION_* triggers (dbDDL.sql)
+TRACKED_TABLES = ('BOOKING', 'GUEST', 'PAYMENT', 'CANCELLATION', 'INVOICE', 'INVOICE1', 'REVIEW', 'ROOM')
+
+# Views, and tables the triggers derive from base tables -> the tracked
+# tables they depend on
+VIEWS = {
+    'PENDING_PMT': ('PAYMENT', 'BOOKING'),
+    'PENDING_BALANCE': ('PAYMENT',)
+}
+
+# Rows per table; a transaction bumps the slot of its connection
+SLOTS = 8
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS TABLE_VERSION (
+        Table_name VARCHAR(30) NOT NULL,
+        Slot TINYINT NOT NULL,
+        Version BIGINT NOT NULL,
+        PRIMARY KEY(Table_name, Slot)
+    )
+"""
+
+
+def create_table(cursor):
+    """Create TABLE_VERSION if the database predates it.
+
+    DDL commits implicitly, so this runs at startup on a connection of its
+    own, never inside a caller's transaction.
+    """
+    cursor.execute(CREATE_TABLE)
+
+
+def bump(cursor, *tables):
+    """Mark tables as changed so every backend process drops its cached copy.
+
+    Run it in the same transaction as the write it announces. Row writes to
+    the tracked tables are counted by triggers already; call this for
+    changes triggers do not see, such as ALTER TABLE, or for databases
+    created before the triggers existed. TABLE_VERSION must exist (see
+    create_table()).
+    """
+    cursor.executemany(f"""
+        INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES (%s, MOD(CONNECTION_ID(), {SLOTS}), 1)
+        ON DUPLICATE KEY UPDATE Version = Version + 1
+    """, [(table,) for table in tables])
+
+
+def current(cursor, tables):
+    """Version of each table (sum of its slots); 0 for tables never bumped.
+
+    Returns None when the TABLE_VERSION table does not exist yet, in which
+    case callers can only rely on their TTL.
+    """
+    placeholders = ', '.join(['%s'] * len(tables))
+    try:
+        cursor.execute(f"""
+            SELECT Table_name, SUM(Version) FROM TABLE_VERSION
+            WHERE Table_name IN ({placeholders})
+            GROUP BY Table_name
+        """, list(tables))
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return None
+        raise
+    versions = dict.fromkeys(tables, 0)
+    for name, version in cursor.fetchall():
+        versions[name] = int(version)
+    return versions
+
+
+def lock_slot(cursor, table):
+    """Version of this connection's slot of table, locked until the transaction ends.
+
+    Called before and after a transaction's writes, the difference is the
+    number of rows of table the transaction wrote, whatever other
+    connections commit meanwhile. The slot row is created if missing so
+    the lock never falls on a gap. None when TABLE_VERSION does not exist.
+    """
+    try:
+        cursor.execute(f"""
+            INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES (%s, MOD(CONNECTION_ID(), {SLOTS}), 0)
+            ON DUPLICATE KEY UPDATE Version = Version
+        """, (table,))
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return None
+        raise
+    cursor.execute(f"""
+        SELECT Version FROM TABLE_VERSION
+        WHERE Table_name = %s AND Slot = MOD(CONNECTION_ID(), {SLOTS}) FOR UPDATE
+    """, (table,))
+    return int(cursor.fetchone()[0])
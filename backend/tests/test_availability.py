@@ -0,0 +1,175 @@
+from datetime import date
+
+import pytest
+
+from availability import AvailabilityIndex, RoomIntervals, to_date
+from table_versions import SLOTS
+
+
+class FakeDatabase:
+    """BOOKING rows and TABLE_VERSION slots; every statement commits at once"""
+
+    def __init__(self):
+        self.bookings = {}      # book_id -> (room_no, check_in, check_out)
+        self.versions = {}      # (table, slot) -> version
+
+    def write_booking(self, connection_id, book_id, row):
+        """Insert, update (row) or delete (None) a booking, bumping a slot like the triggers do"""
+        if row is None:
+            del self.bookings[book_id]
+        else:
+            self.bookings[book_id] = row
+        key = ('BOOKING', connection_id % SLOTS)
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+
+class FakeCursor:
+    def __init__(self, database, connection_id):
+        self.database = database
+        self.connection_id = connection_id
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        slot = ('BOOKING', self.connection_id % SLOTS)
+        if sql.startswith('SELECT Table_name, SUM(Version)'):
+            totals = {}
+            for (table, _), version in self.database.versions.items():
+                if table in params:
+                    totals[table] = totals.get(table, 0) + version
+            self.rows = list(totals.items())
+        elif sql.startswith('INSERT INTO TABLE_VERSION'):
+            self.database.versions.setdefault(slot, 0)
+        elif sql.startswith('SELECT Version FROM TABLE_VERSION'):
+            self.rows = [(self.database.versions[slot],)]
+        elif sql.startswith('SELECT BookID, Room_no, Check_in, Check_out FROM BOOKING WHERE BookID'):
+            book_id = params[0]
+            row = self.database.bookings.get(book_id)
+            self.rows = [(book_id,) + row] if row else []
+        elif sql.startswith('SELECT BookID, Room_no, Check_in, Check_out FROM BOOKING'):
+            self.rows = [(book_id,) + row for book_id, row in self.database.bookings.items()]
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+@pytest.fixture
+def database():
+    database = FakeDatabase()
+    database.write_booking(9, 1, (101, date(2024, 5, 1), date(2024, 5, 4)))
+    database.write_booking(9, 2, (102, date(2024, 5, 10), date(2024, 5, 12)))
+    return database
+
+
+@pytest.fixture
+def index(database):
+    index = AvailabilityIndex()
+    index.load(FakeCursor(database, 1))
+    return index
+
+
+def test_overlap_uses_inclusive_dates_like_sql():
+    intervals = RoomIntervals()
+    intervals.add(1, date(2024, 5, 1), date(2024, 5, 4))
+    assert intervals.overlaps(date(2024, 5, 4), date(2024, 5, 6))
+    assert intervals.overlaps(date(2024, 4, 28), date(2024, 5, 1))
+    assert not intervals.overlaps(date(2024, 5, 5), date(2024, 5, 9))
+    assert not intervals.overlaps(date(2024, 4, 20), date(2024, 4, 30))
+
+
+def test_overlap_sees_long_booking_behind_later_short_ones():
+    intervals = RoomIntervals()
+    intervals.add(1, date(2024, 5, 1), date(2024, 5, 30))
+    intervals.add(2, date(2024, 5, 2), date(2024, 5, 3))
+    assert intervals.overlaps(date(2024, 5, 20), date(2024, 5, 21))
+
+    intervals.remove(1, date(2024, 5, 1), date(2024, 5, 30))
+    assert not intervals.overlaps(date(2024, 5, 20), date(2024, 5, 21))
+    assert len(intervals) == 1
+
+
+def test_to_date_accepts_api_strings():
+    assert to_date('2024-05-01') == date(2024, 5, 1)
+    assert to_date(date(2024, 5, 1)) == date(2024, 5, 1)
+    assert to_date(None) is None
+
+
+def test_load_records_booking_version(index, database):
+    cursor = FakeCursor(database, 1)
+    assert index.version == 2
+    assert index.current(cursor)
+    assert not index.is_free(101, '2024-05-03', '2024-05-05')
+    assert index.is_free(101, '2024-05-05', '2024-05-09')
+    assert index.verify(cursor)['consistent']
+
+
+def test_write_from_another_process_invalidates(index, database):
+    database.write_booking(3, 3, (101, date(2024, 6, 1), date(2024, 6, 3)))
+    assert not index.current(FakeCursor(database, 1))
+
+
+def test_tracked_write_keeps_index_current(index, database):
+    # The sequence create_reservation() runs around its INSERT
+    cursor = FakeCursor(database, 1)
+    write = index.track_write(cursor)
+    database.write_booking(1, 3, (101, date(2024, 6, 1), date(2024, 6, 3)))
+    write.written(cursor)
+    index.put(3, 101, '2024-06-01', '2024-06-03')
+
+    assert index.advance(cursor, write)
+    assert index.version == 3
+    assert index.current(cursor)
+    assert not index.is_free(101, '2024-06-02', '2024-06-02')
+    assert index.verify(cursor)['consistent']
+
+
+def test_tracked_writes_chain_and_delete(index, database):
+    cursor = FakeCursor(database, 1)
+    for book_id, row in ((3, (103, date(2024, 7, 1), date(2024, 7, 2))), (1, None)):
+        write = index.track_write(cursor)
+        database.write_booking(1, book_id, row)
+        write.written(cursor)
+        index.sync_booking(cursor, book_id)
+        assert index.advance(cursor, write)
+    assert index.current(cursor)
+    assert index.is_free(101, '2024-05-01', '2024-05-04')
+    assert index.verify(cursor)['consistent']
+
+
+def test_tracked_write_does_not_hide_a_concurrent_one(index, database):
+    cursor = FakeCursor(database, 1)
+    write = index.track_write(cursor)
+    database.write_booking(1, 3, (101, date(2024, 6, 1), date(2024, 6, 3)))
+    write.written(cursor)
+    # Another process commits before this one re-reads the version
+    database.write_booking(2, 4, (102, date(2024, 6, 1), date(2024, 6, 3)))
+    index.put(3, 101, '2024-06-01', '2024-06-03')
+
+    assert not index.advance(cursor, write)
+    assert not index.current(cursor)
+
+
+def test_tracked_write_does_not_span_a_reload(index, database):
+    cursor = FakeCursor(database, 1)
+    write = index.track_write(cursor)
+    database.write_booking(1, 3, (101, date(2024, 6, 1), date(2024, 6, 3)))
+    write.written(cursor)
+    index.load(cursor)
+    database.write_booking(2, 4, (102, date(2024, 6, 1), date(2024, 6, 3)))
+
+    assert not index.advance(cursor, write)
+    assert not index.current(cursor)
+
+
+def test_writes_before_load_are_not_tracked(database):
+    index = AvailabilityIndex()
+    cursor = FakeCursor(database, 1)
+    write = index.track_write(cursor)
+    write.written(cursor)
+    assert write.count is None
+    assert not index.advance(cursor, write)
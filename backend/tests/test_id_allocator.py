@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+
+import pytest
+from mysql.connector import Error, errorcode
+
+from id_allocator import IdAllocator
+
+
+class FakeSequences:
+    """ID_SEQUENCE plus the MAX() of each base table, behind a pool-like API"""
+
+    def __init__(self, max_ids, table_exists=True):
+        self.max_ids = max_ids          # seed query prefix -> highest stored id
+        self.sequences = {} if table_exists else None
+        self.connections = 0
+
+    @contextmanager
+    def connection(self):
+        self.connections += 1
+        yield FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return FakeCursor(self.database)
+
+    def commit(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+        self.rowcount = 0
+        self.last_insert_id = None
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        sequences = self.database.sequences
+        if sql.startswith('CREATE TABLE IF NOT EXISTS ID_SEQUENCE'):
+            self.database.sequences = {} if sequences is None else sequences
+        elif sequences is None and 'ID_SEQUENCE' in sql:
+            raise Error(errno=errorcode.ER_NO_SUCH_TABLE)
+        elif sql.startswith('UPDATE ID_SEQUENCE'):
+            block_size, name = params
+            self.rowcount = int(name in sequences)
+            if self.rowcount:
+                sequences[name] += block_size
+                self.last_insert_id = sequences[name]
+        elif sql.startswith('INSERT IGNORE INTO ID_SEQUENCE'):
+            name, next_val = params
+            sequences.setdefault(name, next_val)
+        elif sql == 'SELECT LAST_INSERT_ID()':
+            self.rows = [(self.last_insert_id,)]
+        elif sql.startswith('SELECT MAX('):
+            self.rows = [(next((value for prefix, value in self.database.max_ids.items()
+                                if sql.startswith(prefix)), None),)]
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def close(self):
+        pass
+
+
+def test_ids_come_from_one_block_until_it_runs_out():
+    pool = FakeSequences({'SELECT MAX(BookID)': 100041})
+    allocator = IdAllocator(pool, block_size=3)
+
+    assert [allocator.next_id('BOOKING') for _ in range(4)] == [100042, 100043, 100044, 100045]
+    assert allocator.blocks_fetched == 2
+    assert pool.connections == 2
+    assert allocator.stats()['remaining'] == {'BOOKING': 2}
+
+
+def test_empty_table_starts_at_the_first_id():
+    allocator = IdAllocator(FakeSequences({}), block_size=5)
+    assert allocator.next_id('PAYMENT') == 5671
+    assert allocator.next_id('GUEST') == 1
+
+
+def test_stored_ids_below_the_first_id_are_ignored():
+    allocator = IdAllocator(FakeSequences({'SELECT MAX(BookID)': 9002}), block_size=5)
+    assert allocator.next_id('BOOKING') == 100001
+
+
+def test_missing_table_is_created_and_seeded():
+    pool = FakeSequences({"SELECT MAX(CAST(SUBSTRING(CanID, 2)": 7}, table_exists=False)
+    allocator = IdAllocator(pool, block_size=2)
+
+    assert allocator.next_id('CANCELLATION') == 8
+    assert pool.sequences == {'CANCELLATION': 10}
+
+
+def test_processes_get_disjoint_blocks():
+    pool = FakeSequences({'SELECT MAX(GusID)': 10})
+    first, second = IdAllocator(pool, block_size=4), IdAllocator(pool, block_size=4)
+
+    ids = [first.next_id('GUEST'), second.next_id('GUEST'), first.next_id('GUEST')]
+    assert ids == [11, 15, 12]
+
+
+def test_unknown_sequence_is_rejected():
+    with pytest.raises(KeyError):
+        IdAllocator(FakeSequences({}), block_size=2).next_id('ROOM')
@@ -0,0 +1,63 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from pagination import InvalidPageRequest, decode_cursor, descending_after, encode_cursor, parse_limit
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(date(2024, 5, 1), 100042)
+    assert '=' not in token
+    assert decode_cursor(token, 2) == ['2024-05-01', 100042]
+    assert decode_cursor(encode_cursor(None, 7), 2) == [None, 7]
+
+
+@pytest.mark.parametrize('token', ['not a cursor!', encode_cursor(1, 2, 3), 'eyJhIjogMX0'])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidPageRequest):
+        decode_cursor(token, 2)
+
+
+def test_parse_limit():
+    assert parse_limit(None, 100) is None
+    assert parse_limit('', 100, default=20) == 20
+    assert parse_limit('30', 100) == 30
+    assert parse_limit('500', 100) == 100
+    for value in ('0', '-1', 'ten'):
+        with pytest.raises(InvalidPageRequest):
+            parse_limit(value, 100)
+
+
+@pytest.fixture
+def bookings():
+    # SQLite, like MySQL, sorts NULLs last in descending order
+    database = sqlite3.connect(':memory:')
+    database.execute("CREATE TABLE BOOKING (BookID INTEGER PRIMARY KEY, Book_date TEXT)")
+    database.executemany("INSERT INTO BOOKING VALUES (?, ?)", [
+        (1, '2024-05-01'), (2, '2024-05-03'), (3, None), (4, '2024-05-03'),
+        (5, None), (6, '2024-04-30'), (7, '2024-05-01'), (8, None)
+    ])
+    yield database
+    database.close()
+
+
+def test_keyset_pages_cover_null_dates(bookings):
+    order = " ORDER BY Book_date DESC, BookID DESC"
+    expected = [row[0] for row in bookings.execute("SELECT BookID FROM BOOKING" + order)]
+
+    seen, after = [], None
+    while True:
+        query, params = "SELECT BookID, Book_date FROM BOOKING", []
+        if after:
+            condition, params = descending_after('Book_date', 'BookID', *decode_cursor(after, 2))
+            query += " WHERE " + condition.replace('%s', '?')
+        rows = bookings.execute(query + order + " LIMIT 3", params).fetchall()
+        seen.extend(book_id for book_id, _ in rows)
+        if len(rows) < 3:
+            break
+        last_id, last_date = rows[-1]
+        after = encode_cursor(last_date, last_id)
+
+    assert seen == expected
+    assert expected[-3:] == [8, 5, 3]
@@ -0,0 +1,118 @@
+import re
+import sqlite3
+from decimal import Decimal
+
+import pytest
+from mysql.connector import Error, errorcode
+
+import payment_ledger
+import pending_balances
+
+
+class SQLiteCursor:
+    """Runs the MySQL statements of payment_ledger/pending_balances on SQLite"""
+
+    def __init__(self, database):
+        self.cursor = database.cursor()
+
+    def execute(self, sql, params=()):
+        sql = sql.replace('%s', '?').replace('FOR UPDATE', '')
+        upsert = re.search(r'ON DUPLICATE KEY UPDATE(.*)$', sql, re.DOTALL)
+        if upsert:
+            assignments = re.sub(r'VALUES\((\w+)\)', r'excluded.\1', upsert.group(1))
+            sql = sql[:upsert.start()] + 'ON CONFLICT DO UPDATE SET' + assignments
+        try:
+            self.cursor.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            if 'no such table' in str(e):
+                raise Error(msg=str(e), errno=errorcode.ER_NO_SUCH_TABLE)
+            raise
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+@pytest.fixture
+def database():
+    database = sqlite3.connect(':memory:')
+    database.executescript("""
+        CREATE TABLE BOOKING (BookID INTEGER PRIMARY KEY, Total_Price NUMERIC);
+        CREATE TABLE PAYMENT (PayID INTEGER PRIMARY KEY, BookID INTEGER, GusID INTEGER,
+                              Pd_amt NUMERIC, Remain_bal NUMERIC);
+        CREATE TABLE BOOKING_BALANCE (BookID INTEGER PRIMARY KEY, Paid NUMERIC NOT NULL DEFAULT 0,
+                                      Payments INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE PENDING_BALANCE (BookID INTEGER PRIMARY KEY, PayID INTEGER NOT NULL,
+                                      GusID INTEGER NOT NULL, Remain_bal NUMERIC NOT NULL DEFAULT 0);
+        INSERT INTO BOOKING VALUES (1, 300), (2, 200), (3, 150), (4, 500);
+    """)
+    yield database
+    database.close()
+
+
+def pay(database, pay_id, book_id, paid, remaining):
+    database.execute("INSERT INTO PAYMENT VALUES (?, ?, ?, ?, ?)", (pay_id, book_id, 7, paid, remaining))
+
+
+def test_record_keeps_a_running_balance(database):
+    cursor = SQLiteCursor(database)
+    assert payment_ledger.lock_booking(cursor, 1) == (Decimal('300'), Decimal('0'))
+
+    pay(database, 11, 1, 100, 200)
+    payment_ledger.record(cursor, 11)
+    pay(database, 12, 1, 50, 150)
+    payment_ledger.record(cursor, 12)
+    pay(database, 13, None, 20, 0)
+    payment_ledger.record(cursor, 13)
+
+    assert payment_ledger.lock_booking(cursor, 1) == (Decimal('300'), Decimal('150'))
+    assert payment_ledger.lock_booking(cursor, 99) is None
+    assert payment_ledger.reconcile(cursor) == []
+
+
+def test_reconcile_reports_and_repairs_drift(database):
+    cursor = SQLiteCursor(database)
+    pay(database, 11, 1, 100, 200)
+    pay(database, 21, 2, 200, 0)
+    payment_ledger.record(cursor, 11)
+    # Drift of every kind: a wrong total, a payment never recorded and a
+    # balance left behind by a deleted payment
+    database.execute("UPDATE BOOKING_BALANCE SET Paid = 90 WHERE BookID = 1")
+    database.execute("INSERT INTO BOOKING_BALANCE VALUES (3, 40, 1)")
+
+    drift = payment_ledger.reconcile(cursor, fix=True)
+    assert [row['booking_id'] for row in drift] == [1, 2, 3]
+    assert drift[0] == {'booking_id': 1, 'ledger_paid': 90.0, 'ledger_payments': 1, 'paid': 100.0, 'payments': 1}
+
+    assert payment_ledger.reconcile(cursor) == []
+    assert database.execute("SELECT * FROM BOOKING_BALANCE ORDER BY BookID").fetchall() == [(1, 100, 1), (2, 200, 1)]
+
+
+@pytest.fixture
+def payments(database):
+    for pay_id, book_id, paid, remaining in ((11, 1, 100, 200), (12, 1, 50, 150), (21, 2, 200, 0),
+                                             (31, 3, 50, 100), (41, 4, 100, 400)):
+        pay(database, pay_id, book_id, paid, remaining)
+    return database
+
+
+def test_rebuild_keeps_each_bookings_latest_payment(payments):
+    cursor = SQLiteCursor(payments)
+    assert pending_balances.rebuild(cursor) == {'bookings': 4, 'outstanding': 3}
+    assert payments.execute("SELECT BookID, PayID, Remain_bal FROM PENDING_BALANCE ORDER BY BookID").fetchall() == [
+        (1, 12, 150), (2, 21, 0), (3, 31, 100), (4, 41, 400)]
+
+
+def test_pages_match_with_and_without_the_balance_table(payments):
+    cursor = SQLiteCursor(payments)
+    pending_balances.rebuild(cursor)
+    first = pending_balances.page(cursor, 2)
+    assert [row[1] for row in first] == [4, 1]
+    last = first[-1]
+    assert [row[1] for row in pending_balances.page(cursor, 2, after=(last[4], last[1]))] == [3]
+    assert [row[1] for row in pending_balances.page(cursor, 5, 'booking', descending=True)] == [4, 3, 1]
+
+    payments.execute("DROP TABLE PENDING_BALANCE")
+    assert pending_balances.page(cursor, 2) == first
@@ -0,0 +1,60 @@
+import os
+
+from query_catalog import DEFAULT_PATH, QueryCatalog, fingerprint, normalize_sql, parse
+
+SCRIPT = """-- Guests by city
+-- (second line of the comment block)
+SELECT *
+FROM GUEST
+WHERE City = 'Dallas';
+
+-- Not a query
+UPDATE ROOM SET Price = 1;
+
+SELECT COUNT(*) FROM BOOKING;
+"""
+
+
+def test_normalize_drops_formatting_only():
+    sql = """SELECT  *   -- every column
+        FROM GUEST /* all of them */ WHERE City = 'New   York';"""
+    assert normalize_sql(sql) == "SELECT * FROM GUEST WHERE City = 'New   York'"
+
+
+def test_normalize_keeps_quoted_text_and_hints():
+    assert normalize_sql("SELECT '--x', `a  b` FROM T # trailing") == "SELECT '--x', `a  b` FROM T"
+    assert normalize_sql("SELECT /*+ NO_INDEX(T) */ 1 FROM T") == "SELECT /*+ NO_INDEX(T) */ 1 FROM T"
+
+
+def test_fingerprint_ignores_formatting_but_not_literals():
+    assert fingerprint("SELECT * FROM GUEST;") == fingerprint("SELECT *\n  FROM GUEST")
+    assert fingerprint("SELECT * FROM GUEST WHERE GusID = 1") != fingerprint("SELECT * FROM GUEST WHERE GusID = 2")
+
+
+def test_parse_takes_first_comment_line_as_description():
+    queries = parse(SCRIPT)
+    assert [query.id for query in queries] == [1, 2]
+    assert queries[0].description == 'Guests by city'
+    assert queries[0].query == "SELECT *\nFROM GUEST\nWHERE City = 'Dallas';"
+    assert queries[0].fingerprint == fingerprint(queries[0].query)
+    assert queries[1].description == 'Query 2'
+
+
+def test_catalog_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / 'dbSQL.sql'
+    path.write_text(SCRIPT)
+    catalog = QueryCatalog(str(path))
+    assert len(catalog.queries()) == 2
+    assert len(catalog.queries()) == 2
+    assert catalog.loads == 1
+
+    path.write_text(SCRIPT + "\n-- Rooms\nSELECT * FROM ROOM;\n")
+    os.utime(path, ns=(0, catalog.mtime + 1))
+    assert catalog.queries()[-1].description == 'Rooms'
+    assert catalog.loads == 2
+
+
+def test_shipped_script_parses():
+    queries = QueryCatalog(DEFAULT_PATH).queries()
+    assert queries
+    assert all(query.query.upper().startswith('SELECT') for query in queries)
@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+from flask import Flask
+
+from request_budget import RequestQueryBudget, assert_max_queries, query_count
+
+
+@pytest.fixture
+def budget():
+    return RequestQueryBudget(max_queries=3, max_db_ms=None, repeat_threshold=2,
+                              routes={'lookups': {'max_queries': 10}})
+
+
+@pytest.fixture
+def client(budget):
+    app = Flask(__name__)
+    budget.init_app(app)
+
+    @app.route('/lookups/<int:count>')
+    def lookups(count):
+        for guest_id in range(count):
+            budget(f"SELECT * FROM GUEST WHERE GusID = {guest_id}", None, 0.001, None)
+        return 'ok'
+
+    @app.route('/list')
+    def list_guests():
+        budget("SELECT * FROM GUEST", None, 0.001, None)
+        return 'ok'
+
+    return app.test_client()
+
+
+def test_server_timing_counts_queries(client):
+    response = client.get('/lookups/4')
+    assert query_count(response) == 4
+    assert_max_queries(response, 4)
+    with pytest.raises(AssertionError, match='GET /lookups/4 ran 4 queries'):
+        assert_max_queries(response, 3)
+
+
+def test_statements_outside_requests_are_ignored(budget):
+    budget("SELECT 1", None, 0.001, None)
+    assert budget.usage() is None
+
+
+def test_route_budget_and_repeats_are_logged(client, budget, caplog):
+    with caplog.at_level(logging.WARNING, logger='request_budget'):
+        assert_max_queries(client.get('/list'), 1)
+        assert not caplog.records
+
+        client.get('/lookups/3')
+        assert budget.over_budget == 0
+        assert 'possible N+1' in caplog.text
+
+        client.get('/lookups/11')
+        assert budget.over_budget == 1
+        assert 'over its query budget: 11 queries (max 10)' in caplog.text
@@ -0,0 +1,60 @@
+import pytest
+
+from result_cache import ResultCache, tables_read
+
+
+@pytest.mark.parametrize('sql, tables', [
+    ("SELECT * FROM BOOKING", {'BOOKING'}),
+    ("SELECT * FROM BOOKING b JOIN GUEST g ON g.GusID = b.GusID", {'BOOKING', 'GUEST'}),
+    ("SELECT * FROM BOOKING b STRAIGHT_JOIN GUEST g ON g.GusID = b.GusID", {'BOOKING', 'GUEST'}),
+    ("SELECT * FROM (BOOKING, GUEST)", {'BOOKING', 'GUEST'}),
+    ("SELECT * FROM BOOKING LEFT JOIN (PAYMENT, GUEST) ON 1 = 1", {'BOOKING', 'PAYMENT', 'GUEST'}),
+    ("SELECT * FROM (SELECT BookID FROM BOOKING) AS b", {'BOOKING'}),
+    ("SELECT * FROM PENDING_PMT", {'PAYMENT', 'BOOKING'}),
+    ("SELECT * FROM hotel.ROOM", {'ROOM'}),
+])
+def test_tables_read(sql, tables):
+    assert tables_read(sql, 'hotel') == tables
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT * FROM BOOKING STRAIGHT_JOIN ROOM_NIGHT",
+    "SELECT * FROM BOOKING b STRAIGHT_JOIN ROOM_NIGHT n ON n.BookID = b.BookID",
+    "SELECT * FROM (BOOKING, ROOM_NIGHT)",
+    "SELECT * FROM BOOKING JOIN (GUEST, ROOM_NIGHT) ON 1 = 1",
+    "SELECT * FROM (SELECT * FROM ROOM_NIGHT) AS n",
+    "SELECT * FROM other.BOOKING",
+    "SELECT NOW() FROM BOOKING",
+    "SELECT * FROM BOOKING WHERE GusID = @guest",
+])
+def test_tables_read_refuses_untracked_or_volatile(sql):
+    assert tables_read(sql, 'hotel') is None
+
+
+def test_literals_are_not_tables():
+    assert tables_read("SELECT * FROM BOOKING WHERE Status = 'FROM ROOM_NIGHT'") == {'BOOKING'}
+
+
+def test_key_ignores_formatting_and_newer_versions_miss():
+    cache = ResultCache(max_entries=2)
+    key = cache.key("SELECT * FROM BOOKING")
+    cache.put(key, {'BOOKING': 1}, ['BookID'], [(1,)])
+    assert cache.get(cache.key("select  *  from BOOKING;"), {'BOOKING': 1}) is None   # case is significant
+    assert cache.get(cache.key("SELECT *\n  FROM BOOKING;"), {'BOOKING': 1}) == (['BookID'], [(1,)])
+    assert cache.get(key, {'BOOKING': 2}) is None
+    assert cache.get(key, {'BOOKING': 1}) is None     # the stale entry was dropped
+    assert cache.invalidated == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    first, second, third = (cache.key(f"SELECT {n} FROM ROOM") for n in (1, 2, 3))
+    cache.put(first, {}, ['1'], [(1,)])
+    cache.put(second, {}, ['2'], [(2,)])
+    assert cache.get(first, {}) is not None
+    cache.put(third, {}, ['3'], [(3,)])
+
+    assert cache.get(second, {}) is None
+    assert cache.get(first, {}) == (['1'], [(1,)])
+    assert cache.get(third, {}) == (['3'], [(3,)])
+    assert cache.evicted == 1
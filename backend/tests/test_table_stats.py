@@ -0,0 +1,44 @@
+from mysql.connector import Error, errorcode
+
+from table_stats import TableStats
+
+
+class FakeCursor:
+    """COUNT(*) answers per table; tables not listed do not exist"""
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if 'TABLE_VERSION' in sql:
+            self.rows = [(params[0], 1)]
+        elif sql.startswith('SELECT COUNT(*) FROM '):
+            table = sql.split()[-1]
+            if table not in self.counts:
+                raise Error(msg=f"Table 'hotel.{table}' doesn't exist", errno=errorcode.ER_NO_SUCH_TABLE)
+            self.rows = [(self.counts[table],)]
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_exact_reports_errors_per_table():
+    stats = TableStats(pool=None, database='hotel', tables=('BOOKING', 'INVOICE1', 'ROOM'))
+    result = stats.exact(FakeCursor({'BOOKING': 12, 'ROOM': 5}))
+
+    assert result['BOOKING']['count'] == 12
+    assert result['ROOM']['count'] == 5
+    assert result['INVOICE1'] == {'error': "1146: Table 'hotel.INVOICE1' doesn't exist"}
+    assert stats.counts_run == 2
+
+
+def test_failed_table_is_counted_again_next_time():
+    stats = TableStats(pool=None, database='hotel', tables=('INVOICE1',))
+    assert 'error' in stats.exact(FakeCursor({}))['INVOICE1']
+    assert stats.exact(FakeCursor({'INVOICE1': 3}))['INVOICE1']['count'] == 3
@@ -1,7 +1,46 @@
 -- Drop existing objects first to avoid conflicts
 DROP TRIGGER IF EXISTS UPDATE_ROOM_ON_CANCELLATION;
+DROP TRIGGER IF EXISTS BOOKING_VERSION_INSERT;
+DROP TRIGGER IF EXISTS BOOKING_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS BOOKING_VERSION_DELETE;
+DROP TRIGGER IF EXISTS GUEST_VERSION_INSERT;
+DROP TRIGGER IF EXISTS GUEST_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS GUEST_VERSION_DELETE;
+DROP TRIGGER IF EXISTS PAYMENT_VERSION_INSERT;
+DROP TRIGGER IF EXISTS PAYMENT_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS PAYMENT_VERSION_DELETE;
+DROP TRIGGER IF EXISTS CANCELLATION_VERSION_INSERT;
+DROP TRIGGER IF EXISTS CANCELLATION_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS CANCELLATION_VERSION_DELETE;
+DROP TRIGGER IF EXISTS INVOICE_VERSION_INSERT;
+DROP TRIGGER IF EXISTS INVOICE_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS INVOICE_VERSION_DELETE;
+DROP TRIGGER IF EXISTS INVOICE1_VERSION_INSERT;
+DROP TRIGGER IF EXISTS INVOICE1_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS INVOICE1_VERSION_DELETE;
+DROP TRIGGER IF EXISTS REVIEW_VERSION_INSERT;
+DROP TRIGGER IF EXISTS REVIEW_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS REVIEW_VERSION_DELETE;
+DROP TRIGGER IF EXISTS ROOM_VERSION_INSERT;
+DROP TRIGGER IF EXISTS ROOM_VERSION_UPDATE;
+DROP TRIGGER IF EXISTS ROOM_VERSION_DELETE;
+DROP TRIGGER IF EXISTS BOOKING_STAY_LENGTH_INSERT;
+DROP TRIGGER IF EXISTS BOOKING_STAY_LENGTH_UPDATE;
+DROP TRIGGER IF EXISTS BOOKING_STAY_LENGTH_DELETE;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_INSERT;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_UPDATE;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_MOVE;
+DROP TRIGGER IF EXISTS PAYMENT_PENDING_DELETE;
 DROP FUNCTION IF EXISTS STAY_LEN;
 DROP VIEW IF EXISTS PENDING_PMT;
+DROP TABLE IF EXISTS ROOM_NIGHT;
+DROP TABLE IF EXISTS ID_SEQUENCE;
+DROP TABLE IF EXISTS TABLE_VERSION;
+DROP TABLE IF EXISTS STATS_SUMMARY;
+DROP TABLE IF EXISTS STAY_LENGTH_HISTOGRAM;
+DROP TABLE IF EXISTS BOOKING_BALANCE;
+DROP TABLE IF EXISTS PENDING_BALANCE;
+DROP TABLE IF EXISTS SCHEMA_VERSION;
 DROP TABLE IF EXISTS ROOM;
 DROP TABLE IF EXISTS REVIEW;
 DROP TABLE IF EXISTS INVOICE1;
@@ -101,11 +140,99 @@ CREATE TABLE ROOM (
     PRIMARY KEY(Room_no)
 );
 
+-- One row per booked room and day (check-in through check-out); the primary
+-- key rejects double bookings
+CREATE TABLE ROOM_NIGHT (
+    Room_no INT(4) NOT NULL,
+    Night DATE NOT NULL,
+    BookID INT(6) NOT NULL,
+    PRIMARY KEY(Room_no, Night),
+    KEY IDX_ROOM_NIGHT_BOOKID (BookID)
+);
+
+-- Next free primary key per table, reserved in blocks by the backend
+CREATE TABLE ID_SEQUENCE (
+    Seq_name VARCHAR(30) NOT NULL,
+    Next_val BIGINT NOT NULL,
+    PRIMARY KEY(Seq_name)
+);
+
+-- Change counter per table and slot, compared by the backend's caches
+CREATE TABLE TABLE_VERSION (
+    Table_name VARCHAR(30) NOT NULL,
+    Slot TINYINT NOT NULL,
+    Version BIGINT NOT NULL,
+    PRIMARY KEY(Table_name, Slot)
+);
+
+-- Dashboard counters per bucket ('ALL' or 'YYYY-MM'), spread over a few slot rows
+CREATE TABLE STATS_SUMMARY (
+    Bucket VARCHAR(7) NOT NULL,
+    Slot TINYINT NOT NULL,
+    Bookings BIGINT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    Guests BIGINT NOT NULL DEFAULT 0,
+    Cancellations BIGINT NOT NULL DEFAULT 0,
+    Ratings BIGINT NOT NULL DEFAULT 0,
+    Rating_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY(Bucket, Slot)
+);
+
+-- Paid-to-date per booking, kept by POST /api/payments in ledger mode
+-- (see backend/payment_ledger.py)
+CREATE TABLE BOOKING_BALANCE (
+    BookID INT(6) NOT NULL,
+    Paid DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    Payments INT NOT NULL DEFAULT 0,
+    PRIMARY KEY(BookID)
+);
+
+-- Outstanding balance per booking: Remain_bal of its latest payment, kept
+-- by the PAYMENT_PENDING_* triggers (see backend/pending_balances.py)
+CREATE TABLE PENDING_BALANCE (
+    BookID INT(6) NOT NULL,
+    PayID INT(6) NOT NULL,
+    GusID INT(6) NOT NULL,
+    Remain_bal DECIMAL(10,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY(BookID),
+    INDEX IDX_PENDING_BALANCE_REMAIN_BAL (Remain_bal, BookID)
+);
+
+-- Bookings per length of stay, kept by the BOOKING_STAY_LENGTH_* triggers
+-- (see backend/stay_lengths.py); summed over Slot rows like TABLE_VERSION
+CREATE TABLE STAY_LENGTH_HISTOGRAM (
+    Stay_len INT NOT NULL,
+    Slot TINYINT NOT NULL,
+    Bookings BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY(Stay_len, Slot)
+);
+
+-- Applied schema versions; INDEX_SET is the version of the index set below
+CREATE TABLE SCHEMA_VERSION (
+    Component VARCHAR(30) NOT NULL,
+    Version INT NOT NULL,
+    PRIMARY KEY(Component)
+);
+
+-- Create indexes: index set version 2, keep in step with backend/index_set.py
+-- Reservation list: newest first, optionally for one guest (keyset on Book_date, BookID)
+CREATE INDEX IDX_BOOKING_BOOK_DATE ON BOOKING (Book_date, BookID);
+CREATE INDEX IDX_BOOKING_GUEST_BOOK_DATE ON BOOKING (GusID, Book_date, BookID);
+-- Payments of one booking
+CREATE INDEX IDX_PAYMENT_BOOKING ON PAYMENT (BookID);
+-- Overlap check of a room's bookings
+CREATE INDEX IDX_BOOKING_ROOM_DATES ON BOOKING (Room_no, Check_in, Check_out);
+CREATE INDEX IDX_CANCELLATION_BOOKING ON CANCELLATION (BookID);
+CREATE INDEX IDX_REVIEW_GUEST ON REVIEW (GusID);
+-- Duplicate e-mail checks on customer create and update
+CREATE INDEX IDX_GUEST_EMAIL ON GUEST (Email);
+INSERT INTO SCHEMA_VERSION (Component, Version) VALUES ('INDEX_SET', 2);
+
 -- Create view
 CREATE VIEW PENDING_PMT AS
 SELECT P.PayID, B.GusID, B.Total_Price, P.Remain_bal
 FROM PAYMENT P
-JOIN BOOKING B ON B.GusID = P.GusID
+JOIN BOOKING B ON B.BookID = P.BookID
 WHERE P.Remain_bal > 0;
 
 -- Create function
@@ -128,3 +255,157 @@ BEGIN
     WHERE BookID = NEW.BookID;
 END;
 
+-- Count every write to the base tables so backend processes drop cached data
+CREATE TRIGGER BOOKING_VERSION_INSERT AFTER INSERT ON BOOKING FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('BOOKING', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER BOOKING_VERSION_UPDATE AFTER UPDATE ON BOOKING FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('BOOKING', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER BOOKING_VERSION_DELETE AFTER DELETE ON BOOKING FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('BOOKING', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER GUEST_VERSION_INSERT AFTER INSERT ON GUEST FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('GUEST', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER GUEST_VERSION_UPDATE AFTER UPDATE ON GUEST FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('GUEST', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER GUEST_VERSION_DELETE AFTER DELETE ON GUEST FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('GUEST', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER PAYMENT_VERSION_INSERT AFTER INSERT ON PAYMENT FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('PAYMENT', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER PAYMENT_VERSION_UPDATE AFTER UPDATE ON PAYMENT FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('PAYMENT', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER PAYMENT_VERSION_DELETE AFTER DELETE ON PAYMENT FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('PAYMENT', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER CANCELLATION_VERSION_INSERT AFTER INSERT ON CANCELLATION FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('CANCELLATION', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER CANCELLATION_VERSION_UPDATE AFTER UPDATE ON CANCELLATION FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('CANCELLATION', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER CANCELLATION_VERSION_DELETE AFTER DELETE ON CANCELLATION FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('CANCELLATION', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE_VERSION_INSERT AFTER INSERT ON INVOICE FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE_VERSION_UPDATE AFTER UPDATE ON INVOICE FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE_VERSION_DELETE AFTER DELETE ON INVOICE FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE1_VERSION_INSERT AFTER INSERT ON INVOICE1 FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE1', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE1_VERSION_UPDATE AFTER UPDATE ON INVOICE1 FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE1', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER INVOICE1_VERSION_DELETE AFTER DELETE ON INVOICE1 FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('INVOICE1', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER REVIEW_VERSION_INSERT AFTER INSERT ON REVIEW FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('REVIEW', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER REVIEW_VERSION_UPDATE AFTER UPDATE ON REVIEW FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('REVIEW', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER REVIEW_VERSION_DELETE AFTER DELETE ON REVIEW FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('REVIEW', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER ROOM_VERSION_INSERT AFTER INSERT ON ROOM FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('ROOM', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER ROOM_VERSION_UPDATE AFTER UPDATE ON ROOM FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('ROOM', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER ROOM_VERSION_DELETE AFTER DELETE ON ROOM FOR EACH ROW
+INSERT INTO TABLE_VERSION (Table_name, Slot, Version) VALUES ('ROOM', MOD(CONNECTION_ID(), 8), 1)
+ON DUPLICATE KEY UPDATE Version = Version + 1;
+
+CREATE TRIGGER BOOKING_STAY_LENGTH_INSERT AFTER INSERT ON BOOKING FOR EACH ROW
+INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+SELECT DATEDIFF(NEW.Check_out, NEW.Check_in), MOD(CONNECTION_ID(), 8), 1 FROM DUAL
+WHERE NEW.Check_in IS NOT NULL AND NEW.Check_out IS NOT NULL
+ON DUPLICATE KEY UPDATE Bookings = Bookings + 1;
+
+CREATE TRIGGER BOOKING_STAY_LENGTH_UPDATE AFTER UPDATE ON BOOKING FOR EACH ROW
+INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+SELECT * FROM (
+    SELECT DATEDIFF(OLD.Check_out, OLD.Check_in) AS Stay_len, MOD(CONNECTION_ID(), 8) AS Slot, -1 AS Bookings FROM DUAL
+    WHERE OLD.Check_in IS NOT NULL AND OLD.Check_out IS NOT NULL
+    AND NOT (OLD.Check_in <=> NEW.Check_in AND OLD.Check_out <=> NEW.Check_out)
+    UNION ALL
+    SELECT DATEDIFF(NEW.Check_out, NEW.Check_in), MOD(CONNECTION_ID(), 8), 1 FROM DUAL
+    WHERE NEW.Check_in IS NOT NULL AND NEW.Check_out IS NOT NULL
+    AND NOT (OLD.Check_in <=> NEW.Check_in AND OLD.Check_out <=> NEW.Check_out)
+) AS CHANGES
+ON DUPLICATE KEY UPDATE Bookings = STAY_LENGTH_HISTOGRAM.Bookings + CHANGES.Bookings;
+
+CREATE TRIGGER BOOKING_STAY_LENGTH_DELETE AFTER DELETE ON BOOKING FOR EACH ROW
+INSERT INTO STAY_LENGTH_HISTOGRAM (Stay_len, Slot, Bookings)
+SELECT DATEDIFF(OLD.Check_out, OLD.Check_in), MOD(CONNECTION_ID(), 8), -1 FROM DUAL
+WHERE OLD.Check_in IS NOT NULL AND OLD.Check_out IS NOT NULL
+ON DUPLICATE KEY UPDATE Bookings = Bookings - 1;
+
+CREATE TRIGGER PAYMENT_PENDING_INSERT AFTER INSERT ON PAYMENT FOR EACH ROW
+INSERT INTO PENDING_BALANCE (BookID, PayID, GusID, Remain_bal)
+SELECT NEW.BookID, NEW.PayID, NEW.GusID, COALESCE(NEW.Remain_bal, 0) FROM DUAL
+WHERE NEW.BookID IS NOT NULL
+ON DUPLICATE KEY UPDATE
+    GusID = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(GusID), PENDING_BALANCE.GusID),
+    Remain_bal = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(Remain_bal), PENDING_BALANCE.Remain_bal),
+    PayID = GREATEST(PENDING_BALANCE.PayID, VALUES(PayID));
+
+CREATE TRIGGER PAYMENT_PENDING_UPDATE AFTER UPDATE ON PAYMENT FOR EACH ROW
+INSERT INTO PENDING_BALANCE (BookID, PayID, GusID, Remain_bal)
+SELECT NEW.BookID, NEW.PayID, NEW.GusID, COALESCE(NEW.Remain_bal, 0) FROM DUAL
+WHERE NEW.BookID IS NOT NULL
+ON DUPLICATE KEY UPDATE
+    GusID = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(GusID), PENDING_BALANCE.GusID),
+    Remain_bal = IF(VALUES(PayID) >= PENDING_BALANCE.PayID, VALUES(Remain_bal), PENDING_BALANCE.Remain_bal),
+    PayID = GREATEST(PENDING_BALANCE.PayID, VALUES(PayID));
+
+-- A payment moved to another booking: recompute the one it left
+CREATE TRIGGER PAYMENT_PENDING_MOVE AFTER UPDATE ON PAYMENT FOR EACH ROW
+UPDATE PENDING_BALANCE
+SET Remain_bal = COALESCE((SELECT COALESCE(P.Remain_bal, 0) FROM PAYMENT P
+                           WHERE P.BookID = OLD.BookID ORDER BY P.PayID DESC LIMIT 1), 0),
+    PayID = COALESCE((SELECT MAX(P.PayID) FROM PAYMENT P WHERE P.BookID = OLD.BookID), 0)
+WHERE BookID = OLD.BookID AND NOT (OLD.BookID <=> NEW.BookID);
+
+CREATE TRIGGER PAYMENT_PENDING_DELETE AFTER DELETE ON PAYMENT FOR EACH ROW
+UPDATE PENDING_BALANCE
+SET Remain_bal = COALESCE((SELECT COALESCE(P.Remain_bal, 0) FROM PAYMENT P
+                           WHERE P.BookID = OLD.BookID ORDER BY P.PayID DESC LIMIT 1), 0),
+    PayID = COALESCE((SELECT MAX(P.PayID) FROM PAYMENT P WHERE P.BookID = OLD.BookID), 0)
+WHERE BookID = OLD.BookID AND PayID = OLD.PayID;
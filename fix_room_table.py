@@ -6,6 +6,7 @@ import sys
 # Add the parent directory to the path to import config
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from backend.config import DB_CONFIG
+from backend.table_versions import bump, create_table
 
 def create_connection():
     """Create a connection to the MySQL database"""
@@ -33,6 +34,9 @@ def fix_room_table():
     cursor = connection.cursor()
     
     try:
+        # bump() needs TABLE_VERSION; DDL commits, so create it before any write
+        create_table(cursor)
+        
         # First check if ROOM table has data
         cursor.execute("SELECT COUNT(*) FROM ROOM")
         count = cursor.fetchone()[0]
@@ -71,6 +75,8 @@ def fix_room_table():
         for room in room_data:
             cursor.execute(insert_query, room)
         
+        # Tell running backends to reload their room catalog
+        bump(cursor, 'ROOM')
         connection.commit()
         print(f"Inserted {len(room_data)} records into ROOM table")
         
@@ -237,7 +237,7 @@ const DatabaseFeatures = () => {
             </Box>
             <Box sx={{ p: 3 }}>
               <Typography paragraph>
-                This demonstrates the <code>PENDING_PMT</code> database view which shows all payments with remaining balances.
+                This shows every booking that still has a remaining balance after its latest payment, the data behind the <code>PENDING_PMT</code> database view.
               </Typography>
               
               {loading.pendingPayments ? (
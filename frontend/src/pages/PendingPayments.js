@@ -23,7 +23,7 @@ function PendingPayments() {
       try {
         setLoading(true);
         const response = await axios.get('http://localhost:5000/api/pending-payments');
-        setPayments(response.data);
+        setPayments(response.data.payments || []);
         setLoading(false);
       } catch (err) {
         setError('Failed to fetch pending payments');
@@ -52,7 +52,7 @@ function PendingPayments() {
             <Table>
               <TableHead>
                 <TableRow>
-                  <TableCell>Payment ID</TableCell>
+                  <TableCell>Booking ID</TableCell>
                   <TableCell>Customer</TableCell>
                   <TableCell>Total Amount</TableCell>
                   <TableCell>Remaining Balance</TableCell>
@@ -61,11 +61,11 @@ function PendingPayments() {
               </TableHead>
               <TableBody>
                 {payments.map((payment) => (
-                  <TableRow key={payment.payment_id}>
-                    <TableCell>{payment.payment_id}</TableCell>
-                    <TableCell>{payment.first_name} {payment.last_name}</TableCell>
-                    <TableCell>${payment.total_amount}</TableCell>
-                    <TableCell>${payment.remaining_balance}</TableCell>
+                  <TableRow key={payment.BookID}>
+                    <TableCell>{payment.BookID}</TableCell>
+                    <TableCell>{payment.GusID}</TableCell>
+                    <TableCell>${payment.Total_Price}</TableCell>
+                    <TableCell>${payment.Remain_bal}</TableCell>
                     <TableCell>
                       <Button 
                         variant="contained" 
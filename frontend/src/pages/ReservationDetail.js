@@ -70,7 +70,7 @@ function ReservationDetail() {
     if (reservation && reservation.id) {
       const fetchStayLength = async () => {
         try {
-          const response = await axios.get(`http://localhost:5000/api/reservation-lengths`);
+          const response = await axios.get(`http://localhost:5000/api/reservation-lengths?booking=${reservation.id}`);
           if (response.data.success) {
             const stayData = response.data.reservation_lengths.find(
               item => item.BookID === parseInt(reservation.id)
@@ -29,27 +29,14 @@ function ReservationList() {
   useEffect(() => {
     const fetchReservations = async () => {
       try {
-        // Fetch all reservations
-        const response = await axios.get('http://localhost:5000/api/reservations');
-        
-        // Create a map to store customer data for faster lookup
-        const customerMap = {};
-        const customersResponse = await axios.get('http://localhost:5000/api/customers');
-        customersResponse.data.forEach(customer => {
-          customerMap[customer.id] = customer;
-        });
-        
-        // Create a map to store room data for faster lookup
-        const roomMap = {};
-        const roomsResponse = await axios.get('http://localhost:5000/api/rooms');
-        roomsResponse.data.forEach(room => {
-          roomMap[room.id] = room;
+        // Fetch all reservations with their customer and room embedded
+        const response = await axios.get('http://localhost:5000/api/reservations', {
+          params: { expand: 'customer,room' }
         });
         
         // Enhance reservation data with customer and room information
         const enhancedReservations = response.data.map(reservation => {
-          const customer = customerMap[reservation.customer_id];
-          const room = roomMap[reservation.room_id];
+          const { customer, room } = reservation;
           
           return {
             ...reservation,
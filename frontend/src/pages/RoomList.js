@@ -84,36 +84,16 @@ function RoomList() {
 
     try {
       setLoading(true);
-      // Get all reservations
-      const reservationsResponse = await axios.get('http://localhost:5000/api/reservations');
-      const reservations = reservationsResponse.data;
-  
-      // Create a map of room availability
-      const roomAvailability = {};
-      
-      // Mark rooms as unavailable if they have overlapping reservations
-      reservations.forEach(reservation => {
-        const roomId = reservation.room_id;
-        const resCheckIn = new Date(reservation.check_in_date);
-        const resCheckOut = new Date(reservation.check_out_date);
-        const selectedCheckIn = new Date(checkInDate);
-        const selectedCheckOut = new Date(checkOutDate);
-        
-        // Check if dates overlap
-        if (
-          (selectedCheckIn <= resCheckOut && selectedCheckOut >= resCheckIn) ||
-          (resCheckIn <= selectedCheckOut && resCheckOut >= selectedCheckIn)
-        ) {
-          roomAvailability[roomId] = 'Booked';
-        } else if (!roomAvailability[roomId]) {
-          roomAvailability[roomId] = 'Available';
-        }
+      // One request returns every room that is free for the selected dates
+      const response = await axios.get('http://localhost:5000/api/availability/search', {
+        params: { check_in: checkInDate, check_out: checkOutDate }
       });
+      const availableRoomIds = new Set(response.data.rooms.map(room => room.id));
       
       // Update room status based on availability
       const updatedRooms = rooms.map(room => ({
         ...room,
-        status: roomAvailability[room.id || room.room_no] || 'Available'
+        status: availableRoomIds.has(room.id) ? 'Available' : 'Booked'
       }));
       
       setFilteredRooms(updatedRooms);
@@ -31,6 +31,7 @@ import axios from 'axios';
 import PlayArrowIcon from '@mui/icons-material/PlayArrow';
 import CodeIcon from '@mui/icons-material/Code';
 import ListIcon from '@mui/icons-material/List';
+import StopIcon from '@mui/icons-material/Stop';
 
 const API_URL = 'http://localhost:5000/api';
 
@@ -64,6 +65,8 @@ const SQLQueryInterface = () => {
   const [predefinedQueries, setPredefinedQueries] = useState([]);
   const [selectedPredefinedQuery, setSelectedPredefinedQuery] = useState(null);
   const [tabValue, setTabValue] = useState(0);
+  const [runningQueryId, setRunningQueryId] = useState(null);
+  const [truncated, setTruncated] = useState(false);
 
   // Fetch predefined queries from the server
   useEffect(() => {
@@ -94,13 +97,19 @@ const SQLQueryInterface = () => {
     setSuccess(false);
     setQueryResults(null);
     setColumns([]);
+    setTruncated(false);
+
+    // Sent with the query so the Cancel button can stop it on the server
+    const queryId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    setRunningQueryId(queryId);
 
     try {
-      const response = await axios.post(`${API_URL}/execute-query`, { query });
+      const response = await axios.post(`${API_URL}/execute-query`, { query, queryId });
       
       if (response.data.success) {
         setQueryResults(response.data.results);
         setColumns(response.data.columns);
+        setTruncated(response.data.truncated);
         setSuccess(true);
       } else {
         setError(response.data.error || 'Failed to execute query');
@@ -110,6 +119,16 @@ const SQLQueryInterface = () => {
       setError(err.response?.data?.error || 'An error occurred while executing the query');
     } finally {
       setLoading(false);
+      setRunningQueryId(null);
+    }
+  };
+
+  const handleCancelQuery = async () => {
+    if (!runningQueryId) return;
+    try {
+      await axios.post(`${API_URL}/execute-query/${runningQueryId}/cancel`);
+    } catch (err) {
+      console.error('Error cancelling query:', err);
     }
   };
 
@@ -174,6 +193,17 @@ const SQLQueryInterface = () => {
           >
             {loading ? 'Executing...' : 'Execute Query'}
           </Button>
+          {loading && (
+            <Button
+              variant="outlined"
+              color="error"
+              onClick={handleCancelQuery}
+              startIcon={<StopIcon />}
+              sx={{ mt: 2, ml: 2 }}
+            >
+              Cancel
+            </Button>
+          )}
         </Paper>
       </TabPanel>
 
@@ -230,6 +260,17 @@ const SQLQueryInterface = () => {
                 >
                   {loading ? 'Executing...' : 'Execute Query'}
                 </Button>
+                {loading && (
+                  <Button
+                    variant="outlined"
+                    color="error"
+                    onClick={handleCancelQuery}
+                    startIcon={<StopIcon />}
+                    sx={{ mt: 2, ml: 2 }}
+                  >
+                    Cancel
+                  </Button>
+                )}
               </Paper>
             )}
           </Grid>
@@ -248,6 +289,12 @@ const SQLQueryInterface = () => {
         </Alert>
       )}
 
+      {truncated && (
+        <Alert severity="warning" sx={{ mt: 3 }}>
+          The result was cut off at {queryResults?.length} rows. Add a LIMIT or a narrower WHERE clause to see the rest.
+        </Alert>
+      )}
+
       {queryResults && (
         <Paper elevation={3} sx={{ mt: 4 }}>
           <Box sx={{ 